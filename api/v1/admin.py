@@ -67,4 +67,15 @@ async def update_configuration(config_updates: Dict[str, Any]):
     return {
         "message": "Configuration updated successfully",
         "updated_keys": list(config_updates.keys())
-    }
\ No newline at end of file
+    }
+
+
+@router.post("/embeddings/compact")
+async def compact_embedding_store():
+    """Compact the persistent embedding store"""
+    from core.ai.model_manager import model_manager
+    
+    try:
+        return await model_manager.compact_embedding_store()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Embedding store compaction failed: {e}")
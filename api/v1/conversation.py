@@ -103,11 +103,13 @@ async def chat_with_agent(
         from core.agents.conversation_processor import ConversationProcessor
         processor = ConversationProcessor(session_data, model_manager)
         
-        result = await processor.process_message(
-            user_message=request.message,
-            context=request.context,
-            stream=request.stream
-        )
+        # Model calls queue fairly per user, or per session for anonymous users
+        with model_manager.tenant(request.user_id or session_id):
+            result = await processor.process_message(
+                user_message=request.message,
+                context=request.context,
+                stream=request.stream
+            )
         
         # Update session with new data
         await session_mgr.update_session(session_id, {
@@ -186,32 +188,34 @@ async def multimodal_interaction(
             await session_mgr.create_session(session_id)
             session_data = await session_mgr.get_session(session_id)
         
-        # Process multimodal input
-        from core.ai.multimodal_processor import MultimodalProcessor
-        processor = MultimodalProcessor(model_manager)
-        
-        multimodal_result = await processor.process_multimodal_input({
-            "text": request.text,
-            "image": request.image_data,
-            "audio": request.audio_data,
-            "document": request.document_data,
-            "context": request.context
-        })
-        
-        # Use the synthesized understanding for conversation
-        from core.agents.conversation_processor import ConversationProcessor
-        conv_processor = ConversationProcessor(session_data, model_manager)
-        
-        # Create enriched message from multimodal analysis
-        enriched_message = conv_processor.create_enriched_message(
-            original_text=request.text or "Multimodal input provided",
-            multimodal_analysis=multimodal_result
-        )
-        
-        result = await conv_processor.process_message(
-            user_message=enriched_message,
-            context={**request.context, "multimodal": True}
-        )
+        # Model calls queue fairly per session
+        with model_manager.tenant(session_id):
+            # Process multimodal input
+            from core.ai.multimodal_processor import MultimodalProcessor
+            processor = MultimodalProcessor(model_manager)
+            
+            multimodal_result = await processor.process_multimodal_input({
+                "text": request.text,
+                "image": request.image_data,
+                "audio": request.audio_data,
+                "document": request.document_data,
+                "context": request.context
+            })
+            
+            # Use the synthesized understanding for conversation
+            from core.agents.conversation_processor import ConversationProcessor
+            conv_processor = ConversationProcessor(session_data, model_manager)
+            
+            # Create enriched message from multimodal analysis
+            enriched_message = conv_processor.create_enriched_message(
+                original_text=request.text or "Multimodal input provided",
+                multimodal_analysis=multimodal_result
+            )
+            
+            result = await conv_processor.process_message(
+                user_message=enriched_message,
+                context={**request.context, "multimodal": True}
+            )
         
         processing_time = (time.time() - start_time) * 1000
         
@@ -286,7 +290,10 @@ async def cleanup_expired_sessions(
     """Cleanup expired conversation sessions"""
     
     cleaned_count = await session_mgr.cleanup_expired_sessions()
-    return {"message": f"Cleaned up {cleaned_count} expired sessions"}
+    return {
+        "message": f"Cleaned up {cleaned_count} expired sessions",
+        "progress": session_mgr.get_cleanup_stats()
+    }
 
 
 @router.post("/chat/stream")
@@ -314,11 +321,12 @@ async def stream_chat_response(
             from core.agents.conversation_processor import ConversationProcessor
             processor = ConversationProcessor(session_data, model_manager)
             
-            async for chunk in processor.process_message_stream(
-                user_message=request.message,
-                context=request.context
-            ):
-                yield f"data: {chunk}\n\n"
+            with model_manager.tenant(request.user_id or session_id):
+                async for chunk in processor.process_message_stream(
+                    user_message=request.message,
+                    context=request.context
+                ):
+                    yield f"data: {chunk}\n\n"
             
             yield "data: [DONE]\n\n"
             
@@ -338,12 +346,40 @@ async def get_models_status():
     
     try:
         status = await model_manager.get_status()
-        return {"models": status, "manager_initialized": model_manager.initialized}
+        return {
+            "models": status,
+            "cache": model_manager.get_cache_stats(),
+            "embedding_batching": model_manager.get_batching_stats(),
+            "embedding_store": model_manager.get_embedding_store_stats(),
+            "coalescing": model_manager.get_coalescing_stats(),
+            "rate_limits": model_manager.get_rate_limit_stats(),
+            "scheduler": model_manager.get_scheduler_stats(),
+            "routing": model_manager.get_routing_stats(),
+            "hedging": model_manager.get_hedging_stats(),
+            "streaming": model_manager.get_streaming_stats(),
+            "metrics": model_manager.get_metrics(),
+            "token_counts": model_manager.get_token_count_stats(),
+            "context": model_manager.get_context_stats(),
+            "prompts": model_manager.get_prompt_stats(),
+            "traffic_capture": model_manager.get_traffic_capture_stats(),
+            "manager_initialized": model_manager.initialized
+        }
     except Exception as e:
         logger.error(f"Error getting models status: {e}")
         raise HTTPException(status_code=500, detail="Error retrieving models status")
 
 
+@router.get("/models/metrics")
+async def get_models_metrics():
+    """Get raw latency and token histograms, mergeable across workers"""
+    
+    try:
+        return model_manager.get_metrics_snapshot()
+    except Exception as e:
+        logger.error(f"Error getting models metrics: {e}")
+        raise HTTPException(status_code=500, detail="Error retrieving models metrics")
+
+
 async def _process_conversation_analytics(
     session_id: str,
     user_message: str,
@@ -2,7 +2,6 @@
 Advanced AI Agent - Production Backend
 Integrated with Azure OpenAI and full enterprise features
 """
-import asyncio
 import os
 import sys
 import traceback
@@ -125,6 +124,43 @@ else:
             self.updated_at = updated_at
 
 
+# =============================================================================
+# PROMPT TEMPLATES
+# =============================================================================
+
+# Kept byte-identical between requests so Azure OpenAI prompt caching applies
+AGENT_SYSTEM_PROMPT = """Eres un Advanced AI Agent profesional y útil desplegado en Azure.
+
+Características de tu personalidad:
+- Profesional pero amigable
+- Conocimiento técnico especializado en desarrollo web, Azure, y tecnología
+- Respuestas concisas pero informativas
+- Siempre dispuesto a ayudar
+
+Contexto del sistema:
+- Estás ejecutándose en Azure App Services
+- Usas Azure OpenAI con modelos GPT-4o Mini
+- Frontend desplegado en Azure Static Web Apps
+- Sistema completamente operacional y escalable
+
+Instrucciones:
+- Responde de manera útil y precisa
+- Si no sabes algo, admítelo honestamente
+- Mantén un tono profesional pero accesible
+- Puedes ayudar con desarrollo, tecnología, Azure, negocios y temas generales"""
+
+SIMPLE_AGENT_SYSTEM_PROMPT = """Eres un Advanced AI Agent profesional desplegado en Azure.
+        
+Responde de manera útil, concisa y profesional. Puedes ayudar con desarrollo web, tecnología, Azure, consultas de negocio y temas generales."""
+
+try:
+    from core.ai.prompt_templates import prompt_registry
+    prompt_registry.register("agent_system", AGENT_SYSTEM_PROMPT)
+    prompt_registry.register("simple_agent_system", SIMPLE_AGENT_SYSTEM_PROMPT)
+except Exception as e:
+    print(f"Prompt registry not available: {e}")
+
+
 # =============================================================================
 # APPLICATION LIFECYCLE
 # =============================================================================
@@ -143,6 +179,7 @@ if 'FastAPI' in globals() and 'asynccontextmanager' in globals():
         if FULL_AI_AVAILABLE:
             try:
                 await model_manager.initialize()
+                model_manager.set_fallback_handler(generate_fallback_response)
                 print("✅ AI Model Manager initialized successfully")
             except Exception as e:
                 print(f"⚠️ AI initialization failed: {e}")
@@ -295,53 +332,47 @@ def add_message_to_conversation(conversation_id: str, message: ChatMessage):
     if metadata.title == "Nueva conversación" and len(conversation) >= 2:
         metadata.title = get_conversation_title(conversation)
 
+def get_conversation_state(messages: List[ChatMessage]) -> Optional[str]:
+    """Conversation flow state, as far as the in-memory conversation tells it
+    
+    Sessions start in "greeting" (see SessionManager.create_session), so a
+    conversation whose only message is the user's first turn is a greeting.
+    Later states are set by the conversation flow, which does not run here.
+    """
+    if len(messages) == 1 and messages[0].role == "user":
+        return "greeting"
+    return None
+
 async def generate_ai_response_advanced(messages: List[ChatMessage], 
                                       temperature: float = 0.7,
-                                      max_tokens: int = 1000) -> Dict[str, Any]:
+                                      max_tokens: int = 1000,
+                                      conversation_id: Optional[str] = None) -> Dict[str, Any]:
     """Generate AI response using Azure OpenAI"""
     # Try full AI system first
     if FULL_AI_AVAILABLE and model_manager.initialized:
         try:
             # Convert to OpenAI format
-            openai_messages = []
-            for msg in messages[-10:]:  # Keep last 10 messages for context
-                openai_messages.append({
-                    "role": msg.role,
-                    "content": msg.content
-                })
-            
-            # Add system message for context
-            system_message = {
-                "role": "system",
-                "content": """Eres un Advanced AI Agent profesional y útil desplegado en Azure.
-
-Características de tu personalidad:
-- Profesional pero amigable
-- Conocimiento técnico especializado en desarrollo web, Azure, y tecnología
-- Respuestas concisas pero informativas
-- Siempre dispuesto a ayudar
-
-Contexto del sistema:
-- Estás ejecutándose en Azure App Services
-- Usas Azure OpenAI con modelos GPT-4o Mini
-- Frontend desplegado en Azure Static Web Apps
-- Sistema completamente operacional y escalable
-
-Instrucciones:
-- Responde de manera útil y precisa
-- Si no sabes algo, admítelo honestamente
-- Mantén un tono profesional pero accesible
-- Puedes ayudar con desarrollo, tecnología, Azure, negocios y temas generales"""
-            }
+            history = [{"role": msg.role, "content": msg.content} for msg in messages]
             
-            openai_messages.insert(0, system_message)
+            # Recent turns within the token budget, older ones as a rolling summary
+            openai_messages = model_manager.build_context(
+                history,
+                system_prompt=prompt_registry.render("agent_system"),
+                system_prompt_tokens=prompt_registry.count_tokens("agent_system"),
+                model_type=ModelType.CHAT,
+                max_tokens=max_tokens,
+                session_id=conversation_id
+            )
             
             # Generate response using model manager
             response = await model_manager.chat_completion(
                 messages=openai_messages,
                 model_type=ModelType.CHAT,
                 temperature=temperature,
-                max_tokens=max_tokens
+                max_tokens=max_tokens,
+                conversation_state=get_conversation_state(messages),
+                tenant_id=conversation_id,
+                session_id=conversation_id
             )
             
             return {
@@ -414,12 +445,7 @@ async def generate_simple_ai_response(messages: List[ChatMessage],
         })
     
     # Add system message
-    system_message = {
-        "role": "system",
-        "content": """Eres un Advanced AI Agent profesional desplegado en Azure.
-        
-Responde de manera útil, concisa y profesional. Puedes ayudar con desarrollo web, tecnología, Azure, consultas de negocio y temas generales."""
-    }
+    system_message = {"role": "system", "content": SIMPLE_AGENT_SYSTEM_PROMPT}
     
     openai_messages.insert(0, system_message)
     
@@ -443,8 +469,6 @@ Responde de manera útil, concisa y profesional. Puedes ayudar con desarrollo we
 
 async def generate_fallback_response(user_message: str) -> Dict[str, Any]:
     """Generate fallback response when AI is not available"""
-    await asyncio.sleep(0.5)  # Simulate processing
-    
     msg_lower = user_message.lower()
     
     responses = {
@@ -465,7 +489,7 @@ async def generate_fallback_response(user_message: str) -> Dict[str, Any]:
                 "content": response,
                 "model_used": "fallback_system",
                 "tokens_used": None,
-                "processing_time_ms": 500
+                "processing_time_ms": 0
             }
     
     # Default response
@@ -473,7 +497,7 @@ async def generate_fallback_response(user_message: str) -> Dict[str, Any]:
         "content": f'Entiendo que me preguntas sobre: "{user_message}". Como Advanced AI Agent, estoy aquí para ayudarte con desarrollo, tecnología, Azure, consultas de negocio y muchos otros temas. ¿Podrías ser más específico sobre lo que necesitas? 🤖💭',
         "model_used": "fallback_system", 
         "tokens_used": None,
-        "processing_time_ms": 500
+        "processing_time_ms": 0
     }
 
 
@@ -551,7 +575,8 @@ async def chat_endpoint(request):
         ai_result = await generate_ai_response_advanced(
             conversation,
             temperature=temperature,
-            max_tokens=max_tokens
+            max_tokens=max_tokens,
+            conversation_id=conversation_id
         )
         
         # Add AI response to conversation
@@ -627,6 +652,8 @@ async def delete_conversation(conversation_id: str):
     
     del conversations[conversation_id]
     del conversation_metadata[conversation_id]
+    if FULL_AI_AVAILABLE:
+        model_manager.forget_session(conversation_id)
     
     return {"message": "Conversation deleted successfully"}
 
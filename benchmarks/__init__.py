@@ -0,0 +1 @@
+"""Benchmarks for Advanced AI Agent"""
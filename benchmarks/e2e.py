@@ -0,0 +1,204 @@
+"""
+End-to-End Benchmarks
+Chat endpoints at controlled concurrency against a mock model server and in-memory Redis
+
+    python -m benchmarks.e2e --requests 500 --concurrency 32 --save-baseline benchmarks/baselines/e2e.json
+    python -m benchmarks.e2e --requests 500 --concurrency 32 --compare benchmarks/baselines/e2e.json
+
+A comparison run exits with status 1 when a scenario regresses beyond the
+tolerance, and with status 2 before running anything when the baseline file
+is missing. Baselines are only meaningful on the machine and settings that
+recorded them, so none is committed: record one with --save-baseline on the
+machine that runs the comparison, and refresh it the same way after an
+intended performance change or a change of machine or settings.
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import logging
+import os
+import sys
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from benchmarks.stubs import InMemoryRedis, MockModelServer, configure_environment
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "e2e.json")
+
+SCENARIOS = ("conversation_chat", "conversation_stream", "app_chat")
+
+MESSAGES = (
+    "Hola, necesito una página web para mi empresa",
+    "¿Cuánto cuesta una integración con Azure?",
+    "Quiero automatizar la facturación de mis clientes",
+    "¿En cuánto tiempo estaría listo el proyecto?"
+)
+
+
+def message_for(index: int) -> str:
+    return f"{MESSAGES[index % len(MESSAGES)]} (#{index})"
+
+
+def conversation_app():
+    """The v1 conversation router alone, without main.py's database lifespan"""
+    from fastapi import FastAPI
+    from api.v1.conversation import router
+
+    app = FastAPI()
+    app.include_router(router, prefix="/api/v1/conversation")
+    return app
+
+
+async def build_scenarios(names: List[str], sessions: int) -> Dict[str, Callable[[int], Awaitable[Any]]]:
+    """Request senders by scenario name, each taking the request index"""
+    from benchmarks.harness import asgi_request
+
+    senders: Dict[str, Callable[[int], Awaitable[Any]]] = {}
+
+    if "conversation_chat" in names or "conversation_stream" in names:
+        from core.ai.model_manager import model_manager
+        if not model_manager.initialized:
+            await model_manager.initialize()
+        v1_app = conversation_app()
+
+        async def conversation_chat(index: int):
+            return await asgi_request(v1_app, "POST", "/api/v1/conversation/chat", {
+                "message": message_for(index),
+                "session_id": f"bench-{index % sessions}",
+                "user_id": "benchmark"
+            })
+
+        async def conversation_stream(index: int):
+            return await asgi_request(v1_app, "POST", "/api/v1/conversation/chat/stream", {
+                "message": message_for(index),
+                "session_id": f"bench-stream-{index % sessions}",
+                "user_id": "benchmark",
+                "stream": True
+            })
+
+        senders["conversation_chat"] = conversation_chat
+        senders["conversation_stream"] = conversation_stream
+
+    if "app_chat" in names:
+        legacy_app = importlib.import_module("app").app
+
+        async def app_chat(index: int):
+            return await asgi_request(legacy_app, "POST", "/chat", {
+                "message": message_for(index),
+                "conversation_id": f"bench-{index % sessions}",
+                "max_tokens": 200
+            })
+
+        senders["app_chat"] = app_chat
+
+    return {name: senders[name] for name in names}
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    from benchmarks.harness import measure_allocations, run_load
+    import core.database
+
+    core.database.redis_client = InMemoryRedis(latency_ms=args.redis_latency_ms)
+    senders = await build_scenarios(args.scenarios, args.sessions)
+
+    results = {}
+    for name, send in senders.items():
+        result = await run_load(send, args.requests, args.concurrency, args.warmup)
+        result["alloc_kib_per_request"] = await measure_allocations(send, args.alloc_requests)
+        results[name] = result
+        print_result(name, result)
+
+    if "conversation_chat" in senders or "conversation_stream" in senders:
+        from core.ai.model_manager import model_manager
+        await model_manager.cleanup()
+    return results
+
+
+def print_result(name: str, result: Dict[str, Any]):
+    latency, lag, alloc = result["latency_ms"], result["loop_lag_ms"], result["alloc_kib_per_request"]
+    print(
+        f"{name:<22} {result['throughput_rps']:>8} req/s  "
+        f"p50 {latency['p50']} p95 {latency['p95']} p99 {latency['p99']} ms  "
+        f"lag p99 {lag['p99']} ms  alloc {alloc['peak']} KiB  status {result['status']}"
+    )
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="End-to-end chat endpoint benchmarks")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=200, help="Timed requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight")
+    parser.add_argument("--warmup", type=int, default=10, help="Untimed requests before each scenario")
+    parser.add_argument("--alloc-requests", type=int, default=20,
+                        help="Sequential requests traced for allocations (0 disables)")
+    parser.add_argument("--sessions", type=int, default=20, help="Distinct conversations to spread requests over")
+    parser.add_argument("--model-latency", default="fixed", help="Mock server time-to-first-token distribution")
+    parser.add_argument("--model-latency-ms", type=float, default=50.0)
+    parser.add_argument("--model-tokens-per-second", type=float, default=2000.0)
+    parser.add_argument("--redis-latency-ms", type=float, default=0.2, help="Simulated Redis round trip")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE, help="Store results as the baseline")
+    parser.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE, help="Fail on regressions against a baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative regression")
+    parser.add_argument("--verbose", action="store_true", help="Keep application logging")
+    return parser.parse_args(argv)
+
+
+def benchmark_config(args: argparse.Namespace) -> Dict[str, Any]:
+    """Settings that must match for two runs to be comparable"""
+    return {
+        name: getattr(args, name) for name in (
+            "requests", "concurrency", "sessions", "model_latency", "model_latency_ms",
+            "model_tokens_per_second", "redis_latency_ms"
+        )
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.compare and not os.path.exists(args.compare):
+        print(
+            f"No baseline at {args.compare}. Record one on this machine with the same settings first:\n"
+            f"    python -m benchmarks.e2e --requests {args.requests} --concurrency {args.concurrency} "
+            f"--save-baseline {args.compare}",
+            file=sys.stderr
+        )
+        return 2
+    if not args.verbose:
+        logging.disable(logging.WARNING)
+
+    with MockModelServer(
+        latency=args.model_latency,
+        latency_ms=args.model_latency_ms,
+        tokens_per_second=args.model_tokens_per_second
+    ) as server:
+        configure_environment(server.url)
+        results = asyncio.run(run(args))
+
+    from benchmarks.harness import compare, load_baseline, save_baseline
+
+    config = benchmark_config(args)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump({"config": config, "results": results}, handle, indent=2)
+    if args.save_baseline:
+        save_baseline(args.save_baseline, results, config)
+        print(f"Baseline saved to {args.save_baseline}")
+
+    if args.compare:
+        baseline = load_baseline(args.compare)
+        if baseline.get("config") != config:
+            print(f"Warning: baseline was recorded with {baseline.get('config')}")
+        regressions = compare(results, baseline.get("results", {}), args.tolerance)
+        if regressions:
+            print("Regressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
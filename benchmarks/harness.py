@@ -0,0 +1,277 @@
+"""
+Benchmark Harness
+In-process ASGI driver, closed-loop load, event-loop lag, allocations and baseline comparison
+"""
+
+import asyncio
+import json
+import os
+import platform
+import statistics
+import time
+import tracemalloc
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from core.ai.metrics import LogHistogram
+
+REPORT_QUANTILES = (0.5, 0.95, 0.99)
+
+# (path in a scenario result, higher is better, smallest difference worth reporting)
+REGRESSION_CHECKS: Tuple[Tuple[str, bool, float], ...] = (
+    ("throughput_rps", True, 0.5),
+    ("latency_ms.p50", False, 1.0),
+    ("latency_ms.p95", False, 1.0),
+    ("latency_ms.p99", False, 1.0),
+    ("ttfb_ms.p95", False, 1.0),
+    ("loop_lag_ms.p99", False, 1.0),
+    ("alloc_kib_per_request.peak", False, 4.0),
+    ("alloc_kib_per_request.retained", False, 4.0),
+    ("error_rate", False, 0.01),
+)
+
+
+@dataclass
+class Response:
+    """Outcome of one request driven through the ASGI app"""
+    status: int
+    latency: float
+    ttfb: Optional[float]
+    body: bytes
+
+
+async def asgi_request(app, method: str, path: str,
+                       payload: Optional[Dict[str, Any]] = None) -> Response:
+    """Call an ASGI app directly and time the first and last body bytes
+
+    No sockets or HTTP client are involved, so latency is the application's
+    own work plus its backends.
+    """
+    body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode("ascii"),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [
+            (b"host", b"bench"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("ascii"))
+        ],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80)
+    }
+
+    finished = asyncio.Event()
+    request_sent = False
+    status = 0
+    first_byte_at: Optional[float] = None
+    chunks: List[bytes] = []
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        # Streaming responses listen for a disconnect; only send it once done
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status, first_byte_at
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunk = message.get("body", b"")
+            if chunk:
+                if first_byte_at is None:
+                    first_byte_at = time.perf_counter()
+                chunks.append(chunk)
+            if not message.get("more_body", False):
+                finished.set()
+
+    started = time.perf_counter()
+    try:
+        await app(scope, receive, send)
+    finally:
+        finished.set()
+    ended = time.perf_counter()
+
+    return Response(
+        status=status,
+        latency=ended - started,
+        ttfb=first_byte_at - started if first_byte_at is not None else None,
+        body=b"".join(chunks)
+    )
+
+
+class LoopLagMonitor:
+    """Measures how late a periodic timer fires on the running loop
+
+    Lag is the time the loop spent on other callbacks past the timer's due
+    time, so it grows with any synchronous work done in request handlers.
+    """
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.lag_ms = LogHistogram()
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            due = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.lag_ms.record(max(0.0, loop.time() - due) * 1000)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+def quantiles(histogram: LogHistogram) -> Dict[str, Optional[float]]:
+    """Mean and p50/p95/p99 of a histogram, rounded for reports"""
+    result = {"mean": round(histogram.mean, 3) if histogram.count else None}
+    for q in REPORT_QUANTILES:
+        value = histogram.quantile(q)
+        result[f"p{int(q * 100)}"] = round(value, 3) if value is not None else None
+    return result
+
+
+async def run_load(send: Callable[[int], Awaitable[Response]], requests: int,
+                   concurrency: int, warmup: int = 0) -> Dict[str, Any]:
+    """Closed-loop load: `concurrency` workers issue `requests` calls between them"""
+    for index in range(warmup):
+        await send(-1 - index)
+
+    latency_ms = LogHistogram()
+    ttfb_ms = LogHistogram()
+    statuses: Counter = Counter()
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index
+        while next_index < requests:
+            index = next_index
+            next_index += 1
+            try:
+                response = await send(index)
+            except Exception:
+                statuses["exception"] += 1
+                continue
+            statuses[str(response.status)] += 1
+            latency_ms.record(response.latency * 1000)
+            if response.ttfb is not None:
+                ttfb_ms.record(response.ttfb * 1000)
+
+    monitor = LoopLagMonitor()
+    monitor.start()
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    await monitor.stop()
+
+    errors = sum(count for status, count in statuses.items() if not status.startswith("2"))
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 2) if elapsed else None,
+        "latency_ms": quantiles(latency_ms),
+        "ttfb_ms": quantiles(ttfb_ms),
+        "loop_lag_ms": {**quantiles(monitor.lag_ms), "max": round(monitor.lag_ms.max or 0.0, 3)},
+        "status": dict(statuses),
+        "error_rate": round(errors / requests, 4) if requests else 0.0
+    }
+
+
+async def measure_allocations(send: Callable[[int], Awaitable[Response]],
+                              requests: int) -> Dict[str, Optional[float]]:
+    """Traced memory per request, one request at a time
+
+    peak is the median high-water mark above the starting point while a
+    request runs; retained is the mean growth left behind afterwards.
+    Tracing slows Python down, so this runs apart from the timed load.
+    """
+    if requests <= 0:
+        return {"peak": None, "retained": None}
+
+    peaks: List[float] = []
+    retained: List[float] = []
+    tracemalloc.start()
+    try:
+        for index in range(requests):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            await send(index)
+            after, peak = tracemalloc.get_traced_memory()
+            peaks.append((peak - before) / 1024)
+            retained.append((after - before) / 1024)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "peak": round(statistics.median(peaks), 2),
+        "retained": round(statistics.mean(retained), 2)
+    }
+
+
+def _lookup(result: Dict[str, Any], path: str) -> Optional[float]:
+    value: Any = result
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value if isinstance(value, (int, float)) else None
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+            tolerance: float) -> List[str]:
+    """Regressions of results against a baseline, beyond a relative tolerance"""
+    regressions = []
+    for scenario, result in results.items():
+        reference = baseline.get(scenario)
+        if reference is None:
+            continue
+        for path, higher_is_better, min_delta in REGRESSION_CHECKS:
+            current, previous = _lookup(result, path), _lookup(reference, path)
+            if current is None or previous is None:
+                continue
+            delta = previous - current if higher_is_better else current - previous
+            if delta > min_delta and delta > tolerance * abs(previous):
+                regressions.append(f"{scenario}: {path} {previous} -> {current}")
+    return regressions
+
+
+def save_baseline(path: str, results: Dict[str, Dict[str, Any]], config: Dict[str, Any]):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump({
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "config": config,
+            "results": results
+        }, handle, indent=2)
+
+
+def load_baseline(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as handle:
+        return json.load(handle)
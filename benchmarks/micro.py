@@ -0,0 +1,385 @@
+"""
+Microbenchmarks
+Per-call cost of the helpers on every request path, emitted as JSON
+
+    python -m benchmarks.micro --output micro.json
+    python -m benchmarks.micro --filter session_manager --repeats 9
+    python -m benchmarks.micro --groups batch --redis-latency-ms 0.5 --iterations 20
+
+Each benchmark runs `iterations` calls per repeat after an untimed setup,
+and reports nanoseconds per call (min, median and mean over repeats) and
+Redis round trips per call. Redis is the in-memory stand-in, with no added
+latency unless --redis-latency-ms is given, so by default cache and
+session figures are serialization and bookkeeping cost only.
+"""
+
+import argparse
+import asyncio
+import importlib
+import inspect
+import itertools
+import json
+import logging
+import platform
+import statistics
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.stubs import InMemoryRedis, configure_environment
+
+SIZES = (10, 100, 1000)
+
+SAMPLE_TEXT = (
+    "Necesito una plataforma web con integración a Azure, autenticación de usuarios, "
+    "panel de administración y reportes mensuales de ventas para tres sucursales."
+)
+
+_unique = itertools.count()
+
+
+@dataclass
+class Microbenchmark:
+    """A timed call and the untimed setup that builds its state for each repeat
+
+    setup receives the iteration count; call receives the state and the
+    iteration index. Either may be a coroutine function.
+    """
+    name: str
+    call: Callable[[Any, int], Any]
+    setup: Callable[[int], Any] = lambda iterations: None
+    params: Dict[str, Any] = field(default_factory=dict)
+
+
+def text_of(words: int) -> str:
+    base = SAMPLE_TEXT.split()
+    return " ".join(base[i % len(base)] for i in range(words))
+
+
+def history_of(messages: int) -> List[Dict[str, str]]:
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"{SAMPLE_TEXT} ({i})"}
+        for i in range(messages)
+    ]
+
+
+def token_benchmarks() -> List[Microbenchmark]:
+    """ModelManager.count_tokens and validate_input_length"""
+    from core.ai.model_manager import ModelManager, ModelType
+
+    manager = ModelManager()
+    benchmarks = []
+
+    def cached_setup(iterations: int, text: str):
+        manager.count_tokens(text)
+        return text
+
+    def unique_texts(iterations: int, text: str):
+        return [f"{next(_unique)} {text}" for _ in range(iterations)]
+
+    for words in (20, 2000):
+        text = text_of(words)
+        benchmarks.append(Microbenchmark(
+            name="model_manager.count_tokens.cached",
+            params={"words": words},
+            setup=lambda iterations, text=text: cached_setup(iterations, text),
+            call=lambda text, i: manager.count_tokens(text)
+        ))
+        benchmarks.append(Microbenchmark(
+            name="model_manager.count_tokens.uncached",
+            params={"words": words},
+            setup=lambda iterations, text=text: unique_texts(iterations, text),
+            call=lambda texts, i: manager.count_tokens(texts[i])
+        ))
+
+    def session_setup(iterations: int, messages: int):
+        session_id = f"bench-{next(_unique)}"
+        history = history_of(messages)
+        manager.validate_input_length(history, ModelType.CHAT, session_id=session_id)
+        return session_id, history
+
+    def next_turn(state, i: int):
+        # One new turn per call, as in a live conversation
+        session_id, history = state
+        history.append({"role": "user", "content": f"{SAMPLE_TEXT} [{i}]"})
+        return manager.validate_input_length(history, ModelType.CHAT, session_id=session_id)
+
+    for messages in SIZES:
+        benchmarks.append(Microbenchmark(
+            name="model_manager.validate_input_length",
+            params={"messages": messages},
+            setup=lambda iterations, messages=messages: history_of(messages),
+            call=lambda history, i: manager.validate_input_length(history, ModelType.CHAT)
+        ))
+        benchmarks.append(Microbenchmark(
+            name="model_manager.validate_input_length.session",
+            params={"messages": messages},
+            setup=lambda iterations, messages=messages: session_setup(iterations, messages),
+            call=next_turn
+        ))
+
+    return benchmarks
+
+
+def cache_benchmarks() -> List[Microbenchmark]:
+    """CacheManager JSON round-trips and SessionManager reads and writes"""
+    from core.database import cache_manager, session_manager
+
+    benchmarks = []
+
+    async def json_roundtrip(payload, i: int):
+        await cache_manager.set_json("bench:json", payload)
+        return await cache_manager.get_json("bench:json")
+
+    async def stored_session(iterations: int, messages: int) -> str:
+        session_id = f"bench-{next(_unique)}"
+        await session_manager.create_session(session_id, {"user_id": "benchmark"})
+        await session_manager.update_session(session_id, {"messages": history_of(messages)})
+        return session_id
+
+    async def get_session(session_id: str, i: int):
+        return await session_manager.get_session(session_id)
+
+    async def update_session(session_id: str, i: int):
+        return await session_manager.update_session(session_id, {"conversation_state": "discovery"})
+
+    for messages in SIZES:
+        benchmarks.append(Microbenchmark(
+            name="cache_manager.json_roundtrip",
+            params={"messages": messages},
+            setup=lambda iterations, messages=messages: {"messages": history_of(messages)},
+            call=json_roundtrip
+        ))
+        for name, call in (("session_manager.get_session", get_session),
+                           ("session_manager.update_session", update_session)):
+            benchmarks.append(Microbenchmark(
+                name=name,
+                params={"messages": messages},
+                setup=lambda iterations, messages=messages: stored_session(iterations, messages),
+                call=call
+            ))
+
+    return benchmarks
+
+
+def codec_benchmarks() -> List[Microbenchmark]:
+    """Session payload encode/decode per cache codec, against stdlib json"""
+    from core import codec
+
+    available = {"none": True, "zstd": codec.ZSTD_AVAILABLE, "lz4": codec.LZ4_AVAILABLE}
+    variants = [("legacy", "none"), ("json", "zstd"), ("json", "lz4")]
+    if codec.MSGPACK_AVAILABLE:
+        variants += [("msgpack", "none"), ("msgpack", "zstd"), ("msgpack", "lz4")]
+
+    benchmarks = []
+    for messages in SIZES:
+        session = {"session_id": "benchmark", "conversation_state": "discovery", "messages": history_of(messages)}
+        stdlib_payload = json.dumps(session)
+        benchmarks.append(Microbenchmark(
+            name="codec.stdlib_json.roundtrip",
+            params={"messages": messages, "bytes": len(stdlib_payload.encode())},
+            call=lambda state, i, session=session: json.loads(json.dumps(session))
+        ))
+        for serializer, compression in variants:
+            if not available[compression]:
+                continue
+            cache_codec = codec.CacheCodec(serializer, compression)
+            payload = cache_codec.encode(session)
+            benchmarks.append(Microbenchmark(
+                name=f"codec.{serializer}.{compression}.roundtrip",
+                params={"messages": messages, "bytes": len(payload)},
+                call=lambda state, i, session=session, cache_codec=cache_codec:
+                    cache_codec.decode(cache_codec.encode(session))
+            ))
+
+    return benchmarks
+
+
+def batch_benchmarks() -> List[Microbenchmark]:
+    """Per-key calls against the batched CacheManager API for 10/100/1000 keys"""
+    from core.database import cache_manager
+
+    benchmarks = []
+
+    async def stored_keys(iterations: int, count: int) -> Dict[str, str]:
+        items = {f"bench:batch:{next(_unique)}:{i}": f"{SAMPLE_TEXT} ({i})" for i in range(count)}
+        await cache_manager.set_many(items)
+        return items
+
+    async def get_each(items: Dict[str, str], i: int):
+        return [await cache_manager.get(key, near_cache=False) for key in items]
+
+    async def get_many(items: Dict[str, str], i: int):
+        return await cache_manager.get_many(list(items), near_cache=False)
+
+    async def set_each(items: Dict[str, str], i: int):
+        for key, value in items.items():
+            await cache_manager.set(key, value)
+
+    async def set_many(items: Dict[str, str], i: int):
+        return await cache_manager.set_many(items)
+
+    async def delete_each(items: Dict[str, str], i: int):
+        for key in items:
+            await cache_manager.delete(key)
+
+    async def delete_many(items: Dict[str, str], i: int):
+        return await cache_manager.delete_many(list(items))
+
+    for count in SIZES:
+        for name, call in (("cache_manager.get.per_key", get_each),
+                           ("cache_manager.get_many", get_many),
+                           ("cache_manager.set.per_key", set_each),
+                           ("cache_manager.set_many", set_many),
+                           ("cache_manager.delete.per_key", delete_each),
+                           ("cache_manager.delete_many", delete_many)):
+            benchmarks.append(Microbenchmark(
+                name=name,
+                params={"keys": count},
+                setup=lambda iterations, count=count: stored_keys(iterations, count),
+                call=call
+            ))
+
+    return benchmarks
+
+
+def conversation_benchmarks() -> List[Microbenchmark]:
+    """app.py's in-memory conversation store"""
+    legacy_app = importlib.import_module("app")
+
+    def conversation_setup(iterations: int, history: int):
+        conversation_id = f"bench-{next(_unique)}"
+        for i in range(history):
+            legacy_app.add_message_to_conversation(
+                conversation_id, legacy_app.ChatMessage(role="user", content=f"{SAMPLE_TEXT} ({i})")
+            )
+        messages = [
+            legacy_app.ChatMessage(role="assistant", content=f"{SAMPLE_TEXT} [{i}]")
+            for i in range(iterations)
+        ]
+        return conversation_id, messages
+
+    def add_message(state, i: int):
+        conversation_id, messages = state
+        legacy_app.add_message_to_conversation(conversation_id, messages[i])
+
+    return [
+        Microbenchmark(
+            name="app.add_message_to_conversation",
+            params={"history": history},
+            setup=lambda iterations, history=history: conversation_setup(iterations, history),
+            call=add_message
+        )
+        for history in (0,) + SIZES
+    ]
+
+
+GROUPS = {
+    "tokens": token_benchmarks,
+    "cache": cache_benchmarks,
+    "codec": codec_benchmarks,
+    "batch": batch_benchmarks,
+    "conversation": conversation_benchmarks
+}
+
+
+async def measure(benchmark: Microbenchmark, iterations: int, repeats: int,
+                  redis: InMemoryRedis) -> Dict[str, Any]:
+    """Nanoseconds and Redis round trips per call over `repeats` timed runs of `iterations` calls"""
+    is_async = inspect.iscoroutinefunction(benchmark.call)
+    per_call: List[float] = []
+    round_trips = 0
+
+    for repeat in range(repeats + 1):
+        state = benchmark.setup(iterations)
+        if inspect.isawaitable(state):
+            state = await state
+
+        round_trips_before = redis.round_trips
+        started = time.perf_counter_ns()
+        if is_async:
+            for i in range(iterations):
+                await benchmark.call(state, i)
+        else:
+            for i in range(iterations):
+                benchmark.call(state, i)
+        per_call.append((time.perf_counter_ns() - started) / iterations)
+        if repeat == 0:
+            round_trips = redis.round_trips - round_trips_before
+
+    # The first run only warms caches and imports
+    per_call = per_call[1:]
+    median = statistics.median(per_call)
+    return {
+        "name": benchmark.name,
+        "params": benchmark.params,
+        "iterations": iterations,
+        "repeats": repeats,
+        "ns_per_call": {
+            "min": round(min(per_call), 1),
+            "median": round(median, 1),
+            "mean": round(statistics.mean(per_call), 1)
+        },
+        "calls_per_s": round(1e9 / median, 1) if median else None,
+        "redis_round_trips_per_call": round(round_trips / iterations, 2)
+    }
+
+
+async def run(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    import core.database
+
+    redis = core.database.redis_client = InMemoryRedis(latency_ms=args.redis_latency_ms)
+
+    results = []
+    for group in args.groups:
+        for benchmark in GROUPS[group]():
+            if args.filter and args.filter not in benchmark.name:
+                continue
+            result = await measure(benchmark, args.iterations, args.repeats, redis)
+            results.append(result)
+            print(
+                f"{benchmark.name:<48} {json.dumps(benchmark.params):<20} "
+                f"{result['ns_per_call']['median']:>12} ns/call "
+                f"{result['redis_round_trips_per_call']:>8} round trips/call",
+                file=sys.stderr
+            )
+    return results
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Microbenchmarks of per-request helpers")
+    parser.add_argument("--groups", nargs="+", choices=list(GROUPS), default=list(GROUPS))
+    parser.add_argument("--filter", help="Only run benchmarks whose name contains this text")
+    parser.add_argument("--iterations", type=int, default=200, help="Calls per timed repeat")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed repeats per benchmark")
+    parser.add_argument("--redis-latency-ms", type=float, default=0.0,
+                        help="Simulated Redis round trip, to show the cost of extra round trips")
+    parser.add_argument("--output", help="Write JSON here instead of standard output")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    logging.disable(logging.WARNING)
+    configure_environment()
+
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": asyncio.run(run(args))
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
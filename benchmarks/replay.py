@@ -0,0 +1,219 @@
+"""
+Traffic Replay
+Re-issues a traffic capture through ModelManager against the mock model server
+
+    TRAFFIC_CAPTURE_ENABLED=true ...          # record in the app, see core/ai/traffic_capture.py
+    python -m benchmarks.replay data/traffic_capture.jsonl --speed 1
+    python -m benchmarks.replay data/traffic_capture.jsonl --speed 4 --model-latency-ms 400
+    python -m benchmarks.replay data/traffic_capture.jsonl --speed 0 --concurrency 64
+
+Calls start at their captured offsets divided by --speed, so the mix,
+burstiness and priorities of the original traffic are kept while the load
+is scaled. --speed 0 issues them back to back with at most --concurrency in
+flight, to find the saturation throughput. The report compares replayed
+latency with the captured latency and includes the scheduler and rate
+limiter figures, which show where requests queued.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from benchmarks.stubs import InMemoryRedis, MockModelServer, configure_environment
+
+
+def load_records(path: str, kinds: List[str], limit: Optional[int]) -> List[Dict[str, Any]]:
+    from core.ai.traffic_capture import read_capture
+
+    records = [record for record in read_capture(path) if record.get("kind") in kinds]
+    records.sort(key=lambda record: record["started_at"])
+    return records[:limit] if limit else records
+
+
+async def issue(manager, record: Dict[str, Any]):
+    """Repeat one captured call, consuming streams to the end"""
+    from core.ai.model_manager import ModelType
+    from core.ai.scheduler import RequestPriority
+
+    request = record["request"]
+    priority = RequestPriority[request["priority"]] if request.get("priority") else None
+
+    if record["kind"] == "embeddings":
+        return await manager.generate_embeddings(
+            request["texts"],
+            priority=priority or RequestPriority.STANDARD,
+            tenant_id=request.get("tenant_id")
+        )
+
+    result = await manager.chat_completion(
+        messages=request["messages"],
+        model_type=ModelType(request["model_type"]) if request.get("model_type") else None,
+        temperature=request.get("temperature", 0.7),
+        max_tokens=request.get("max_tokens"),
+        functions=request.get("functions"),
+        stream=request.get("stream", False),
+        use_cache=request.get("use_cache", True),
+        conversation_state=request.get("conversation_state"),
+        priority=priority or RequestPriority.INTERACTIVE,
+        tenant_id=request.get("tenant_id"),
+        hedge=request.get("hedge"),
+        session_id=request.get("session_id")
+    )
+    if "stream" in result:
+        async for _ in result["stream"]:
+            pass
+    return result
+
+
+async def replay(records: List[Dict[str, Any]], speed: float, concurrency: int) -> Dict[str, Any]:
+    from benchmarks.harness import LoopLagMonitor, quantiles
+    from core.ai.metrics import LogHistogram
+    from core.ai.model_manager import model_manager
+
+    if not model_manager.initialized:
+        await model_manager.initialize()
+    model_manager.traffic_recorder = None
+
+    latency = {kind: LogHistogram() for kind in ("chat", "embeddings")}
+    captured = {kind: LogHistogram() for kind in ("chat", "embeddings")}
+    slowdown = {kind: LogHistogram() for kind in ("chat", "embeddings")}
+    lateness_ms = LogHistogram()
+    outcomes: Dict[str, Counter] = {"chat": Counter(), "embeddings": Counter()}
+    in_flight = 0
+    peak_in_flight = 0
+    limit = asyncio.Semaphore(concurrency) if speed <= 0 else None
+
+    async def run_one(record: Dict[str, Any]):
+        nonlocal in_flight, peak_in_flight
+        kind = record["kind"]
+        in_flight += 1
+        peak_in_flight = max(peak_in_flight, in_flight)
+        started = time.perf_counter()
+        try:
+            await issue(model_manager, record)
+            outcomes[kind]["ok"] += 1
+        except Exception as e:
+            outcomes[kind][type(e).__name__] += 1
+            return
+        finally:
+            in_flight -= 1
+            if limit is not None:
+                limit.release()
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        latency[kind].record(elapsed_ms)
+        if "error" not in record:
+            captured[kind].record(record["latency_ms"])
+            if record["latency_ms"] > 0:
+                slowdown[kind].record(elapsed_ms / record["latency_ms"])
+
+    loop = asyncio.get_running_loop()
+    origin = records[0]["started_at"] if records else 0.0
+    tasks = []
+    monitor = LoopLagMonitor()
+    monitor.start()
+    began = loop.time()
+
+    for record in records:
+        if limit is not None:
+            await limit.acquire()
+        else:
+            due = began + (record["started_at"] - origin) / speed
+            delay = due - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            lateness_ms.record(max(0.0, loop.time() - due) * 1000)
+        tasks.append(asyncio.create_task(run_one(record)))
+
+    await asyncio.gather(*tasks)
+    elapsed = loop.time() - began
+    await monitor.stop()
+
+    capture_span = records[-1]["started_at"] - origin if records else 0.0
+    report = {
+        "records": len(records),
+        "speed": speed,
+        "elapsed_s": round(elapsed, 3),
+        "offered_rps": round(len(records) * speed / capture_span, 2) if speed > 0 and capture_span else None,
+        "achieved_rps": round(len(records) / elapsed, 2) if elapsed else None,
+        "peak_in_flight": peak_in_flight,
+        "dispatch_lateness_ms": quantiles(lateness_ms),
+        "loop_lag_ms": quantiles(monitor.lag_ms),
+        "calls": {
+            kind: {
+                "outcomes": dict(outcomes[kind]),
+                "latency_ms": quantiles(latency[kind]),
+                "captured_latency_ms": quantiles(captured[kind]),
+                "slowdown": quantiles(slowdown[kind])
+            }
+            for kind in ("chat", "embeddings") if outcomes[kind]
+        },
+        "scheduler": model_manager.get_scheduler_stats(),
+        "rate_limits": model_manager.get_rate_limit_stats(),
+        "coalescing": model_manager.get_coalescing_stats()
+    }
+    await model_manager.cleanup()
+    return report
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Replay captured model traffic against a mock backend")
+    parser.add_argument("capture", help="JSONL file written by the traffic recorder")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="Time scale: 2 replays twice as fast; 0 sends back to back")
+    parser.add_argument("--concurrency", type=int, default=32, help="In-flight cap when --speed is 0")
+    parser.add_argument("--kinds", nargs="+", choices=("chat", "embeddings"), default=["chat", "embeddings"])
+    parser.add_argument("--limit", type=int, help="Replay only the first N records")
+    parser.add_argument("--endpoint", help="Use a running server instead of starting the mock")
+    parser.add_argument("--model-latency", default="lognormal")
+    parser.add_argument("--model-latency-ms", type=float, default=300.0)
+    parser.add_argument("--model-tokens-per-second", type=float, default=80.0)
+    parser.add_argument("--output", help="Write the report here instead of standard output")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    logging.disable(logging.WARNING)
+    os.environ["TRAFFIC_CAPTURE_ENABLED"] = "False"
+
+    server = None
+    if args.endpoint is None:
+        server = MockModelServer(
+            latency=args.model_latency,
+            latency_ms=args.model_latency_ms,
+            tokens_per_second=args.model_tokens_per_second
+        )
+        server.start()
+
+    try:
+        configure_environment(args.endpoint or server.url)
+        import core.database
+        core.database.redis_client = InMemoryRedis()
+
+        records = load_records(args.capture, args.kinds, args.limit)
+        if not records:
+            print(f"No replayable records in {args.capture}", file=sys.stderr)
+            return 1
+        report = asyncio.run(replay(records, args.speed, args.concurrency))
+    finally:
+        if server is not None:
+            server.stop()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
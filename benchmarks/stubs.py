@@ -0,0 +1,295 @@
+"""
+Benchmark Backends
+In-memory Redis and a mock Azure OpenAI server process for offline benchmarks
+"""
+
+import asyncio
+import fnmatch
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def configure_environment(model_url: str = "http://127.0.0.1:8765"):
+    """Fill the settings core needs from the environment; must run before core is imported"""
+    os.environ["AZURE_OPENAI_ENDPOINT"] = model_url
+    os.environ["AZURE_OPENAI_API_KEY"] = "mock"
+    os.environ["USE_MANAGED_IDENTITY"] = "False"
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ.setdefault("JWT_SECRET_KEY", "benchmark")
+    os.environ.setdefault("DATABASE_URL", "postgresql://benchmark@localhost/benchmark")
+
+
+def _encode(value: Any) -> bytes:
+    return value if isinstance(value, bytes) else str(value).encode()
+
+
+class InMemoryRedis:
+    """The subset of redis.asyncio.Redis used by CacheManager and SessionManager
+
+    Values and key listings are bytes, as with decode_responses=False. Every command
+    awaits a fixed latency (or at least yields to the loop) to stand in for
+    the network round trip; a pipeline pays it once. Pub/sub delivers within
+    the process.
+    """
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency = latency_ms / 1000
+        self.commands = 0
+        self._data: Dict[str, bytes] = {}
+        self._expires: Dict[str, float] = {}
+        # Every key ever written, in first-write order; SCAN cursors index into it
+        self._scan_order: List[str] = []
+        self._scan_known: set = set()
+        self.round_trips = 0
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+        self._pipelined = False
+
+    async def _round_trip(self):
+        self.commands += 1
+        if not self._pipelined:
+            self.round_trips += 1
+            await asyncio.sleep(self.latency)
+
+    def _store(self, key: str, value: Any):
+        if key not in self._scan_known:
+            self._scan_known.add(key)
+            self._scan_order.append(key)
+        self._data[key] = _encode(value)
+
+    def _live(self, key: str) -> bool:
+        expires_at = self._expires.get(key)
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return key in self._data
+
+    async def ping(self) -> bool:
+        await self._round_trip()
+        return True
+
+    async def get(self, key: str) -> Optional[bytes]:
+        await self._round_trip()
+        return self._data[key] if self._live(key) else None
+
+    async def mget(self, keys: List[str], *args: str) -> List[Optional[bytes]]:
+        await self._round_trip()
+        return [self._data[key] if self._live(key) else None for key in [*keys, *args]]
+
+    async def set(self, key: str, value: Any, ex: Optional[int] = None, px: Optional[int] = None,
+                  nx: bool = False) -> Optional[bool]:
+        await self._round_trip()
+        if nx and self._live(key):
+            return None
+        self._store(key, value)
+        if ex or px:
+            self._expires[key] = time.monotonic() + (ex or px / 1000)
+        else:
+            self._expires.pop(key, None)
+        return True
+
+    async def setex(self, key: str, ttl: int, value: Any) -> bool:
+        return await self.set(key, value, ex=ttl)
+
+    async def expire(self, key: str, ttl: int) -> bool:
+        await self._round_trip()
+        if not self._live(key):
+            return False
+        self._expires[key] = time.monotonic() + ttl
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        await self._round_trip()
+        deleted = 0
+        for key in keys:
+            key = key.decode() if isinstance(key, bytes) else key
+            if self._live(key):
+                del self._data[key]
+                self._expires.pop(key, None)
+                deleted += 1
+        return deleted
+
+    async def unlink(self, *keys: str) -> int:
+        return await self.delete(*keys)
+
+    async def scan(self, cursor: int = 0, match: Optional[str] = None,
+                   count: Optional[int] = None) -> Tuple[int, List[bytes]]:
+        """Cursors index the write order, so keys present for a whole pass are all returned"""
+        await self._round_trip()
+        end = min(cursor + (count or 10), len(self._scan_order))
+        keys = [
+            key.encode() for key in self._scan_order[cursor:end]
+            if self._live(key) and fnmatch.fnmatchcase(key, match or "*")
+        ]
+        return (end if end < len(self._scan_order) else 0), keys
+
+    async def exists(self, *keys: str) -> int:
+        await self._round_trip()
+        return sum(1 for key in keys if self._live(key))
+
+    async def incr(self, key: str, amount: int = 1) -> int:
+        await self._round_trip()
+        value = int(self._data[key]) + amount if self._live(key) else amount
+        self._store(key, value)
+        return value
+
+    async def keys(self, pattern: str = "*") -> List[bytes]:
+        await self._round_trip()
+        return [
+            key.encode() for key in list(self._data)
+            if self._live(key) and fnmatch.fnmatchcase(key, pattern)
+        ]
+
+    async def eval(self, script: str, numkeys: int, *keys_and_args: str) -> int:
+        """Only the compare-and-delete script CacheManager releases leases with"""
+        await self._round_trip()
+        key, token = keys_and_args
+        if self._live(key) and self._data[key] == _encode(token):
+            del self._data[key]
+            self._expires.pop(key, None)
+            return 1
+        return 0
+
+    async def publish(self, channel: str, message: str) -> int:
+        await self._round_trip()
+        queues = self._subscribers.get(channel, [])
+        for queue in queues:
+            queue.put_nowait({"type": "message", "channel": channel.encode(), "data": _encode(message)})
+        return len(queues)
+
+    def pubsub(self) -> "InMemoryPubSub":
+        return InMemoryPubSub(self)
+
+    def pipeline(self, transaction: bool = True) -> "InMemoryPipeline":
+        return InMemoryPipeline(self)
+
+    async def close(self):
+        pass
+
+
+class InMemoryPubSub:
+    """Subscription to InMemoryRedis channels"""
+
+    def __init__(self, redis: InMemoryRedis):
+        self.redis = redis
+        self.channels: List[str] = []
+        self._queue: asyncio.Queue = asyncio.Queue()
+
+    async def subscribe(self, *channels: str):
+        for channel in channels:
+            self.redis._subscribers.setdefault(channel, []).append(self._queue)
+            self.channels.append(channel)
+
+    async def get_message(self, ignore_subscribe_messages: bool = False,
+                          timeout: Optional[float] = 0.0) -> Optional[Dict[str, Any]]:
+        # asyncio.wait rather than wait_for, which can swallow a cancellation that races a message
+        getter = asyncio.ensure_future(self._queue.get())
+        try:
+            done, _ = await asyncio.wait({getter}, timeout=timeout)
+        finally:
+            if not getter.done():
+                getter.cancel()
+        return getter.result() if done else None
+
+    async def aclose(self):
+        for channel in self.channels:
+            self.redis._subscribers[channel].remove(self._queue)
+        self.channels = []
+
+
+class InMemoryPipeline:
+    """Queues commands and runs them in one simulated round trip"""
+
+    def __init__(self, redis: InMemoryRedis):
+        self.redis = redis
+        self._commands: List[Any] = []
+
+    def __getattr__(self, name: str):
+        command = getattr(self.redis, name)
+
+        def queue(*args, **kwargs):
+            self._commands.append((command, args, kwargs))
+            return self
+        return queue
+
+    async def execute(self) -> List[Any]:
+        self.redis.round_trips += 1
+        await asyncio.sleep(self.redis.latency)
+        commands, self._commands = self._commands, []
+        self.redis._pipelined = True
+        try:
+            return [await command(*args, **kwargs) for command, args, kwargs in commands]
+        finally:
+            self.redis._pipelined = False
+
+    async def __aenter__(self) -> "InMemoryPipeline":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._commands = []
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class MockModelServer:
+    """scripts/mock_openai_server.py in a child process, so it does not share the benchmark's event loop"""
+
+    def __init__(self, latency: str = "fixed", latency_ms: float = 50.0,
+                 tokens_per_second: float = 2000.0, completion_tokens: int = 60,
+                 seed: int = 1, port: Optional[int] = None):
+        self.port = port or free_port()
+        self.args = [
+            "--port", str(self.port),
+            "--latency", latency,
+            "--latency-ms", str(latency_ms),
+            "--tokens-per-second", str(tokens_per_second),
+            "--completion-tokens", str(completion_tokens),
+            "--seed", str(seed)
+        ]
+        self.process: Optional[subprocess.Popen] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self, timeout: float = 15.0):
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "scripts.mock_openai_server", *self.args],
+            cwd=REPO_ROOT
+        )
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Mock model server exited with code {self.process.returncode}")
+            try:
+                with socket.create_connection(("127.0.0.1", self.port), timeout=0.2):
+                    return
+            except OSError:
+                time.sleep(0.1)
+        self.stop()
+        raise RuntimeError(f"Mock model server did not start on port {self.port}")
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self.process = None
+
+    def __enter__(self) -> "MockModelServer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,146 @@
+"""
+Backend Pool
+Load balancing and circuit breaking across deployments serving one model
+"""
+
+import random
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+from openai import APIConnectionError
+
+from core.ai.circuit_breaker import CircuitBreaker
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+BALANCING_STRATEGIES = ("least_outstanding", "power_of_two")
+
+
+@dataclass(eq=False)
+class Backend:
+    """One (endpoint, deployment) serving a model"""
+    endpoint: str
+    deployment: str
+    weight: float = 1.0
+    api_key: Optional[str] = None
+    outstanding: int = 0
+    total_requests: int = 0
+    failures: int = 0
+    average_latency_ms: float = 0.0
+    breaker: Optional[CircuitBreaker] = field(default=None, repr=False)
+
+    @property
+    def name(self) -> str:
+        return f"{self.endpoint}/{self.deployment}"
+
+    def load(self) -> float:
+        return (self.outstanding + 1) / self.weight
+
+
+class BackendPool:
+    """Balances calls over backends, skipping those whose circuit is open"""
+
+    def __init__(self, name: str, backends: Sequence[Backend], strategy: str = "least_outstanding",
+                 breaker_options: Optional[Dict[str, Any]] = None):
+        if not backends:
+            raise ValueError(f"Backend pool {name} needs at least one backend")
+        if strategy not in BALANCING_STRATEGIES:
+            raise ValueError(f"Unknown load balancing strategy: {strategy}")
+
+        self.name = name
+        self.backends = list(backends)
+        self.strategy = strategy
+
+        for backend in self.backends:
+            backend.breaker = CircuitBreaker(backend.name, **(breaker_options or {}))
+
+    def __len__(self) -> int:
+        return len(self.backends)
+
+    def has_available(self) -> bool:
+        """Whether any backend would accept a call right now"""
+        return any(backend.breaker.is_available() for backend in self.backends)
+
+    def pick(self, exclude: Sequence[Backend] = ()) -> Optional[Backend]:
+        """Choose a backend for the next call, or None when every circuit is open"""
+        candidates = [
+            b for b in self.backends if b not in exclude and b.breaker.is_available()
+        ]
+        if not candidates:
+            return None
+
+        if len(candidates) == 1:
+            return candidates[0]
+
+        if self.strategy == "power_of_two":
+            first, second = random.choices(candidates, weights=[b.weight for b in candidates], k=2)
+            return first if first.load() <= second.load() else second
+
+        return min(candidates, key=Backend.load)
+
+    def on_start(self, backend: Backend) -> bool:
+        """Claim the backend for a call; False if its circuit rejected it"""
+        if not backend.breaker.acquire():
+            return False
+        backend.outstanding += 1
+        backend.total_requests += 1
+        return True
+
+    def on_success(self, backend: Backend, latency: float):
+        backend.outstanding -= 1
+        backend.breaker.record_success(latency)
+        backend.average_latency_ms = 0.9 * backend.average_latency_ms + 0.1 * latency * 1000 \
+            if backend.average_latency_ms else latency * 1000
+
+    def on_cancel(self, backend: Backend):
+        """A call abandoned by its caller says nothing about backend health"""
+        backend.outstanding -= 1
+        backend.breaker.release()
+
+    def on_failure(self, backend: Backend, error: Exception):
+        backend.outstanding -= 1
+        if not self.is_backend_failure(error):
+            backend.breaker.release()
+            return
+
+        backend.failures += 1
+        backend.breaker.record_failure()
+
+    @staticmethod
+    def is_backend_failure(error: Exception) -> bool:
+        """Server errors and connection failures count against a backend
+
+        Anything else says nothing about the backend's health: throttling is
+        left to the rate limiter, and errors raised by our own code or local
+        queue timeouts are not the backend's doing.
+        """
+        # Also covers APITimeoutError
+        if isinstance(error, APIConnectionError):
+            return True
+        status_code = getattr(error, "status_code", None)
+        if not isinstance(status_code, int):
+            return False
+        return status_code >= 500
+
+    @staticmethod
+    def is_throttled(error: Exception) -> bool:
+        """An upstream 429; another deployment may still have quota"""
+        return getattr(error, "status_code", None) == 429
+
+    def get_stats(self) -> List[Dict[str, Any]]:
+        """Get load and circuit state per backend"""
+        return [
+            {
+                "endpoint": backend.endpoint,
+                "deployment": backend.deployment,
+                "weight": backend.weight,
+                "circuit": backend.breaker.get_stats(),
+                "outstanding": backend.outstanding,
+                "total_requests": backend.total_requests,
+                "failures": backend.failures,
+                "average_latency_ms": round(backend.average_latency_ms, 2)
+            }
+            for backend in self.backends
+        ]
@@ -0,0 +1,155 @@
+"""
+Circuit Breaker
+Closed / open / half-open breaker tripped by error rate, slow calls or failure streaks
+"""
+
+import time
+from collections import deque
+from enum import Enum
+from typing import Any, Dict
+
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class CircuitState(Enum):
+    """Circuit breaker states"""
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Fails calls fast while a dependency is unhealthy
+
+    While closed, the outcomes of the last window_size calls are kept. The
+    breaker opens once at least min_calls are recorded and either the failure
+    rate or the slow-call rate reaches its threshold, or after
+    consecutive_failures failures in a row. An open breaker rejects calls for
+    open_seconds (doubled on every trip that follows a failed probe), then
+    lets half_open_probes calls through: a successful probe closes it, a
+    failed one opens it again.
+    """
+
+    def __init__(self, name: str, failure_rate_threshold: float = 0.5,
+                 slow_call_rate_threshold: float = 0.8, slow_call_seconds: float = 15.0,
+                 min_calls: int = 10, window_size: int = 50, consecutive_failures: int = 5,
+                 open_seconds: float = 30.0, max_open_seconds: float = 300.0,
+                 half_open_probes: int = 1):
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.min_calls = min_calls
+        self.consecutive_failures = consecutive_failures
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.half_open_probes = half_open_probes
+
+        self.state = CircuitState.CLOSED
+        self.opened_until = 0.0
+        self.trips = 0
+        self.rejected = 0
+        self._reopen_count = 0
+        self._probes_in_flight = 0
+        self._failure_streak = 0
+        # (failed, slow) per call
+        self._outcomes: deque = deque(maxlen=window_size)
+
+    def is_available(self) -> bool:
+        """Whether a call would currently be let through, without claiming a probe"""
+        if self.state == CircuitState.CLOSED:
+            return True
+        if self.state == CircuitState.OPEN:
+            return time.monotonic() >= self.opened_until
+        return self._probes_in_flight < self.half_open_probes
+
+    def acquire(self) -> bool:
+        """Claim permission for one call; False means fail fast"""
+        if self.state == CircuitState.OPEN and time.monotonic() >= self.opened_until:
+            self.state = CircuitState.HALF_OPEN
+            self._probes_in_flight = 0
+            logger.info(f"Circuit {self.name} half-open, probing")
+
+        if self.state == CircuitState.CLOSED:
+            return True
+        if self.state == CircuitState.HALF_OPEN and self._probes_in_flight < self.half_open_probes:
+            self._probes_in_flight += 1
+            return True
+
+        self.rejected += 1
+        return False
+
+    def release(self):
+        """Give back a call that ended without saying anything about health"""
+        if self.state == CircuitState.HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+    def record_success(self, latency: float):
+        if self.state == CircuitState.HALF_OPEN:
+            self._close()
+            return
+
+        self._failure_streak = 0
+        self._outcomes.append((False, latency >= self.slow_call_seconds))
+        self._check_rates()
+
+    def record_failure(self):
+        if self.state == CircuitState.HALF_OPEN:
+            self._reopen_count += 1
+            self._open("probe failed")
+            return
+        if self.state == CircuitState.OPEN:
+            return
+
+        self._failure_streak += 1
+        self._outcomes.append((True, False))
+        if self._failure_streak >= self.consecutive_failures:
+            self._open(f"{self._failure_streak} consecutive failures")
+        else:
+            self._check_rates()
+
+    def _check_rates(self):
+        calls = len(self._outcomes)
+        if calls < self.min_calls:
+            return
+
+        failure_rate = sum(1 for failed, _ in self._outcomes if failed) / calls
+        slow_rate = sum(1 for _, slow in self._outcomes if slow) / calls
+        if failure_rate >= self.failure_rate_threshold:
+            self._open(f"failure rate {failure_rate:.0%}")
+        elif slow_rate >= self.slow_call_rate_threshold:
+            self._open(f"slow call rate {slow_rate:.0%}")
+
+    def _open(self, reason: str):
+        duration = min(self.max_open_seconds, self.open_seconds * 2 ** self._reopen_count)
+        self.state = CircuitState.OPEN
+        self.opened_until = time.monotonic() + duration
+        self.trips += 1
+        self._probes_in_flight = 0
+        self._failure_streak = 0
+        self._outcomes.clear()
+        logger.warning(f"Circuit {self.name} opened for {duration:.0f}s: {reason}")
+
+    def _close(self):
+        self.state = CircuitState.CLOSED
+        self._reopen_count = 0
+        self._probes_in_flight = 0
+        self._outcomes.clear()
+        logger.info(f"Circuit {self.name} closed")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get state, trip count and recent failure rate"""
+        calls = len(self._outcomes)
+        return {
+            "state": self.state.value,
+            "trips": self.trips,
+            "rejected": self.rejected,
+            "open_for_seconds": round(max(0.0, self.opened_until - time.monotonic()), 1)
+            if self.state == CircuitState.OPEN else 0.0,
+            "recent_calls": calls,
+            "recent_failure_rate": round(
+                sum(1 for failed, _ in self._outcomes if failed) / calls, 4
+            ) if calls else 0.0
+        }
@@ -0,0 +1,196 @@
+"""
+Context Builder
+Token-budgeted conversation context with a rolling summary of older turns
+"""
+
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from core.ai.prompt_templates import prompt_registry
+from core.ai.token_counter import message_digest
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+# Role and separator tokens the chat format adds around every message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+@dataclass
+class ConversationSummary:
+    """Summary of a conversation's first covered_count messages"""
+    text: str
+    tokens: int
+    covered_count: int
+    last_digest: bytes
+
+
+class ContextBuilder:
+    """Packs conversation history newest-first into a token budget
+
+    Messages that no longer fit are folded into a per-conversation rolling
+    summary. Summaries are refreshed in the background once at least
+    summary_min_messages turns have been dropped since the last one, and the
+    current summary is used meanwhile, so building a context never waits on
+    a model call.
+    """
+
+    def __init__(self, count_tokens: Callable[[Any], int],
+                 summarize: Optional[Callable[[Optional[str], List[Dict[str, Any]]], Awaitable[str]]] = None,
+                 max_history_tokens: int = 3000, summary_min_messages: int = 4,
+                 max_conversations: int = 10000):
+        self.count_tokens = count_tokens
+        self.summarize = summarize
+        self.max_history_tokens = max_history_tokens
+        self.summary_min_messages = summary_min_messages
+        self.max_conversations = max_conversations
+
+        self._summaries: "OrderedDict[str, ConversationSummary]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.stats = {
+            "builds": 0, "prompt_tokens": 0, "dropped_messages": 0,
+            "summaries": 0, "summary_failures": 0
+        }
+
+    def _message_tokens(self, message: Dict[str, Any]) -> int:
+        return self.count_tokens(message.get("content")) + MESSAGE_OVERHEAD_TOKENS
+
+    def build(self, history: List[Dict[str, Any]], system_prompt: Optional[str] = None,
+              context_window: int = 128000, max_tokens: int = 1000,
+              conversation_id: Optional[str] = None,
+              system_prompt_tokens: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Build the messages for one request: system prompt, summary, then recent history
+
+        Summary and history share max_history_tokens, and together with the
+        system prompt and the completion must fit the context window. The
+        newest message is always kept. Pass system_prompt_tokens when the
+        prompt's count is already known, e.g. from the prompt registry.
+        """
+        messages = []
+        used = 0
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+            if system_prompt_tokens is None:
+                system_prompt_tokens = self.count_tokens(system_prompt)
+            used += system_prompt_tokens + MESSAGE_OVERHEAD_TOKENS
+
+        summary = self._current_summary(conversation_id, history)
+        summary_tokens = summary.tokens + MESSAGE_OVERHEAD_TOKENS if summary is not None else 0
+        used += summary_tokens
+
+        budget = min(self.max_history_tokens - summary_tokens, context_window - max_tokens - used)
+
+        packed: List[Dict[str, Any]] = []
+        history_tokens = 0
+        start = len(history)
+        for index in range(len(history) - 1, -1, -1):
+            tokens = self._message_tokens(history[index])
+            if packed and history_tokens + tokens > budget:
+                break
+            packed.append(history[index])
+            history_tokens += tokens
+            start = index
+        packed.reverse()
+
+        covered = summary.covered_count if summary is not None else 0
+        if summary is not None:
+            messages.append(prompt_registry.message("conversation_summary", summary=summary.text))
+
+        if conversation_id is not None and start - covered >= self.summary_min_messages:
+            self._schedule_summary(conversation_id, summary, history[covered:start], start, history)
+
+        messages.extend(packed)
+
+        self.stats["builds"] += 1
+        self.stats["prompt_tokens"] += used + history_tokens
+        self.stats["dropped_messages"] += start
+        return messages
+
+    def _current_summary(self, conversation_id: Optional[str],
+                         history: List[Dict[str, Any]]) -> Optional[ConversationSummary]:
+        """The cached summary, if the history still starts with the turns it covers"""
+        if conversation_id is None:
+            return None
+
+        summary = self._summaries.get(conversation_id)
+        if summary is None:
+            return None
+
+        if (len(history) < summary.covered_count
+                or message_digest(history[summary.covered_count - 1]) != summary.last_digest):
+            del self._summaries[conversation_id]
+            return None
+
+        self._summaries.move_to_end(conversation_id)
+        return summary
+
+    def _schedule_summary(self, conversation_id: str, previous: Optional[ConversationSummary],
+                          dropped: List[Dict[str, Any]], covered_count: int,
+                          history: List[Dict[str, Any]]):
+        if self.summarize is None or conversation_id in self._in_flight:
+            return
+
+        last_digest = message_digest(history[covered_count - 1])
+        task = asyncio.ensure_future(
+            self._refresh_summary(conversation_id, previous, list(dropped), covered_count, last_digest)
+        )
+        self._in_flight[conversation_id] = task
+        task.add_done_callback(lambda done: self._on_summary_done(conversation_id, done))
+
+    def _on_summary_done(self, conversation_id: str, task: asyncio.Task):
+        if self._in_flight.get(conversation_id) is task:
+            del self._in_flight[conversation_id]
+
+    async def _refresh_summary(self, conversation_id: str, previous: Optional[ConversationSummary],
+                               dropped: List[Dict[str, Any]], covered_count: int, last_digest: bytes):
+        try:
+            text = await self.summarize(previous.text if previous else None, dropped)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.stats["summary_failures"] += 1
+            logger.warning(f"Conversation summary failed for {conversation_id}: {e}")
+            return
+
+        if not text:
+            self.stats["summary_failures"] += 1
+            return
+
+        self._summaries[conversation_id] = ConversationSummary(
+            text=text,
+            tokens=prompt_registry.count_tokens("conversation_summary", summary=text)
+            or self.count_tokens(text),
+            covered_count=covered_count,
+            last_digest=last_digest
+        )
+        self._summaries.move_to_end(conversation_id)
+        if len(self._summaries) > self.max_conversations:
+            self._summaries.popitem(last=False)
+        self.stats["summaries"] += 1
+
+    def forget(self, conversation_id: str):
+        """Drop a conversation's summary"""
+        self._summaries.pop(conversation_id, None)
+        task = self._in_flight.pop(conversation_id, None)
+        if task is not None:
+            task.cancel()
+
+    async def close(self):
+        """Cancel summaries still being generated"""
+        tasks = list(self._in_flight.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get average prompt size, dropped turns and summary counters"""
+        builds = self.stats["builds"]
+        return {
+            **self.stats,
+            "average_prompt_tokens": round(self.stats["prompt_tokens"] / builds, 1) if builds else 0.0,
+            "conversations_summarized": len(self._summaries),
+            "summaries_in_flight": len(self._in_flight)
+        }
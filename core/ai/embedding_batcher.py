@@ -0,0 +1,172 @@
+"""
+Embedding Batcher
+Micro-batching dispatcher that merges concurrent embedding requests into one API call
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+@dataclass
+class EmbeddingBatcherStats:
+    """Embedding batcher counters"""
+    total_items: int = 0
+    total_batches: int = 0
+    failed_batches: int = 0
+    size_flushes: int = 0
+    token_flushes: int = 0
+    timer_flushes: int = 0
+    total_queue_wait_ms: float = 0.0
+    max_queue_wait_ms: float = 0.0
+    total_batch_latency_ms: float = 0.0
+    started_at: Optional[float] = None
+    last_completed_at: Optional[float] = None
+
+
+class EmbeddingBatcher:
+    """Collects single-text embedding requests and flushes them as one batch"""
+
+    def __init__(self, submit_func: Callable[[List[str], int], Awaitable[List[List[float]]]],
+                 count_tokens: Callable[[str], int], max_batch_size: int = 256,
+                 max_batch_tokens: int = 8000, max_wait_ms: float = 5.0):
+        self.submit_func = submit_func
+        self.count_tokens = count_tokens
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.max_wait = max_wait_ms / 1000
+        self.stats = EmbeddingBatcherStats()
+
+        # Pending items: (text, token count, enqueue time, future)
+        self._pending: List[Tuple[str, int, float, asyncio.Future]] = []
+        self._pending_priority: Optional[int] = None
+        self._pending_tokens = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._in_flight: set = set()
+
+    async def embed(self, text: str, priority: int = 0) -> List[float]:
+        """Embed one text, sharing the upstream call with concurrent callers
+
+        A batch is submitted with the most urgent (lowest) priority among its items.
+        """
+        loop = asyncio.get_running_loop()
+        tokens = self.count_tokens(text)
+
+        # Keep each batch under the token budget
+        if self._pending and self._pending_tokens + tokens > self.max_batch_tokens:
+            self.stats.token_flushes += 1
+            self._flush()
+
+        future = loop.create_future()
+        now = time.perf_counter()
+        if self.stats.started_at is None:
+            self.stats.started_at = now
+
+        self._pending.append((text, tokens, now, future))
+        self._pending_tokens += tokens
+        if self._pending_priority is None or priority < self._pending_priority:
+            self._pending_priority = priority
+
+        if len(self._pending) >= self.max_batch_size:
+            self.stats.size_flushes += 1
+            self._flush()
+        elif self._pending_tokens >= self.max_batch_tokens:
+            self.stats.token_flushes += 1
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._on_timer)
+
+        return await future
+
+    def _on_timer(self):
+        self._timer = None
+        if self._pending:
+            self.stats.timer_flushes += 1
+            self._flush()
+
+    def _flush(self):
+        """Dispatch the pending items as one batch"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        priority, self._pending_priority = self._pending_priority, None
+        self._pending_tokens = 0
+
+        task = asyncio.ensure_future(self._run_batch(batch, priority))
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+
+    async def _run_batch(self, batch: List[Tuple[str, int, float, asyncio.Future]], priority: int):
+        """Call the API once and fan results back out to the waiting futures"""
+        start_time = time.perf_counter()
+
+        for _, _, enqueued_at, _ in batch:
+            wait_ms = (start_time - enqueued_at) * 1000
+            self.stats.total_queue_wait_ms += wait_ms
+            self.stats.max_queue_wait_ms = max(self.stats.max_queue_wait_ms, wait_ms)
+
+        try:
+            embeddings = await self.submit_func([text for text, _, _, _ in batch], priority)
+            if len(embeddings) != len(batch):
+                raise ValueError(f"Expected {len(batch)} embeddings, got {len(embeddings)}")
+        except Exception as e:
+            self.stats.failed_batches += 1
+            for _, _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        else:
+            for (_, _, _, future), embedding in zip(batch, embeddings):
+                if not future.done():
+                    future.set_result(embedding)
+        finally:
+            completed_at = time.perf_counter()
+            self.stats.total_batches += 1
+            self.stats.total_items += len(batch)
+            self.stats.total_batch_latency_ms += (completed_at - start_time) * 1000
+            self.stats.last_completed_at = completed_at
+
+            # A cancelled batch must not leave its callers waiting forever
+            for _, _, _, future in batch:
+                if not future.done():
+                    future.cancel()
+
+    async def close(self):
+        """Flush pending items and wait for in-flight batches"""
+        if self._pending:
+            self._flush()
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get batch size, queue wait and throughput figures"""
+        stats = self.stats
+        batches = max(stats.total_batches, 1)
+        items = max(stats.total_items, 1)
+
+        elapsed = 0.0
+        if stats.started_at is not None and stats.last_completed_at is not None:
+            elapsed = stats.last_completed_at - stats.started_at
+
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_batch_tokens": self.max_batch_tokens,
+            "max_wait_ms": self.max_wait * 1000,
+            "total_items": stats.total_items,
+            "total_batches": stats.total_batches,
+            "failed_batches": stats.failed_batches,
+            "flushes": {
+                "size": stats.size_flushes,
+                "tokens": stats.token_flushes,
+                "timer": stats.timer_flushes
+            },
+            "average_batch_size": round(stats.total_items / batches, 2),
+            "average_queue_wait_ms": round(stats.total_queue_wait_ms / items, 3),
+            "max_queue_wait_ms": round(stats.max_queue_wait_ms, 3),
+            "average_batch_latency_ms": round(stats.total_batch_latency_ms / batches, 2),
+            "items_per_second": round(stats.total_items / elapsed, 2) if elapsed > 0 else 0.0,
+            "pending": len(self._pending)
+        }
@@ -0,0 +1,356 @@
+"""
+Persistent Embedding Store
+Content-addressed on-disk embedding cache backed by a memory-mapped vector file
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Any, Iterable, List, Optional
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class EmbeddingStore:
+    """Append-only vector file shared by all workers through the page cache
+
+    Layout of the store directory:
+      meta.json       - vector dimension, dtype, format version and generation
+      vectors[.N].bin - fixed-size rows of raw vectors, memory-mapped for reads
+      index[.N].tsv   - append-only "key<TAB>row<TAB>deployment" lines
+      .lock           - advisory lock serializing appends and compaction
+
+    Compaction writes the next generation's files and then switches
+    meta.json to it in one atomic rename, so readers never pair an index with
+    the vectors of another generation. Generation 0 keeps the unsuffixed
+    names of the first format version.
+
+    Every method touches the disk; from async code run them in a worker
+    thread. Writes take a file lock, get_many never waits on it.
+    """
+
+    FORMAT_VERSION = 2
+
+    def __init__(self, path: str, dtype: str = "float16", hot_cache_size: int = 10000,
+                 enabled: bool = True):
+        self.path = path
+        self.dtype = dtype
+        self.hot_cache_size = hot_cache_size
+        self.enabled = enabled and NUMPY_AVAILABLE
+        self.dimension: Optional[int] = None
+        self.generation = 0
+
+        self._hot: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._index: Dict[str, int] = {}
+        self._index_offset = 0
+        self._meta_inode: Optional[int] = None
+        self._mmap = None
+        self._opened = False
+        # In-process state is shared between the event loop and worker threads
+        self._state_lock = threading.RLock()
+
+        self.stats = {"hot_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "compactions": 0}
+
+        if enabled and not NUMPY_AVAILABLE:
+            logger.warning("numpy not available - persistent embedding store disabled")
+
+    @staticmethod
+    def make_key(deployment: str, text: str) -> str:
+        """Content-addressed key for a text embedded by a deployment"""
+        return hashlib.sha256(f"{deployment}\0{text}".encode("utf-8")).hexdigest()
+
+    @property
+    def _meta_path(self) -> str:
+        return os.path.join(self.path, "meta.json")
+
+    def _generation_path(self, name: str, extension: str, generation: int) -> str:
+        suffix = f".{generation}" if generation else ""
+        return os.path.join(self.path, f"{name}{suffix}.{extension}")
+
+    @property
+    def _vectors_path(self) -> str:
+        return self._generation_path("vectors", "bin", self.generation)
+
+    @property
+    def _index_path(self) -> str:
+        return self._generation_path("index", "tsv", self.generation)
+
+    @property
+    def _row_bytes(self) -> int:
+        return self.dimension * np.dtype(self.dtype).itemsize
+
+    @contextmanager
+    def _lock(self):
+        """Exclusive advisory lock across worker processes"""
+        with open(os.path.join(self.path, ".lock"), "a") as lock_file:
+            if FCNTL_AVAILABLE:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if FCNTL_AVAILABLE:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _open(self):
+        """Load metadata and index written by this or other workers"""
+        if self._opened:
+            return
+
+        os.makedirs(self.path, exist_ok=True)
+        self._opened = True
+        self._refresh_index()
+
+    def _load_meta(self):
+        """Follow meta.json, switching to a new generation after a compaction"""
+        try:
+            inode = os.stat(self._meta_path).st_ino
+        except FileNotFoundError:
+            return
+        if inode == self._meta_inode:
+            return
+
+        with open(self._meta_path) as f:
+            meta = json.load(f)
+        self._meta_inode = inode
+        self.dimension = meta["dimension"]
+        self.dtype = meta["dtype"]
+
+        generation = meta.get("generation", 0)
+        if generation != self.generation:
+            self.generation = generation
+            self._index.clear()
+            self._index_offset = 0
+            self._mmap = None
+
+    def _write_meta(self, generation: int):
+        """Atomically point the store at a generation"""
+        meta_tmp = f"{self._meta_path}.tmp"
+        with open(meta_tmp, "w") as f:
+            json.dump({
+                "version": self.FORMAT_VERSION,
+                "dimension": self.dimension,
+                "dtype": self.dtype,
+                "generation": generation
+            }, f)
+        os.replace(meta_tmp, self._meta_path)
+
+    def _refresh_index(self):
+        """Read index lines appended since the last refresh"""
+        with self._state_lock:
+            self._load_meta()
+            try:
+                with open(self._index_path, "rb") as f:
+                    f.seek(self._index_offset)
+                    data = f.read()
+            except FileNotFoundError:
+                # Nothing written yet, or compacted away since meta.json was read
+                return
+
+            # Ignore a trailing partial line still being written
+            end = data.rfind(b"\n") + 1
+            for line in data[:end].decode("utf-8").splitlines():
+                key, row, _ = line.split("\t", 2)
+                self._index[key] = int(row)
+            self._index_offset += end
+
+    def _vectors(self):
+        """Memory map covering every row currently on disk"""
+        rows = os.path.getsize(self._vectors_path) // self._row_bytes
+        if self._mmap is None or self._mmap.shape[0] < rows:
+            self._mmap = np.memmap(self._vectors_path, dtype=self.dtype, mode="r",
+                                   shape=(rows, self.dimension))
+        return self._mmap
+
+    def _remember(self, key: str, vector: List[float]):
+        # Callers hold _state_lock
+        self._hot[key] = vector
+        self._hot.move_to_end(key)
+        while len(self._hot) > self.hot_cache_size:
+            self._hot.popitem(last=False)
+
+    def get_many(self, deployment: str, texts: Iterable[str]) -> List[Optional[List[float]]]:
+        """Look up embeddings, returning None for texts not in the store"""
+        texts = list(texts)
+        if not self.enabled:
+            return [None] * len(texts)
+
+        self._open()
+        keys = [self.make_key(deployment, text) for text in texts]
+
+        with self._state_lock:
+            # Pick up rows appended or compacted by other workers before touching disk
+            if any(key not in self._hot for key in keys):
+                self._refresh_index()
+
+            results: List[Optional[List[float]]] = []
+            for key in keys:
+                vector = self._hot.get(key)
+                if vector is not None:
+                    self._hot.move_to_end(key)
+                    self.stats["hot_hits"] += 1
+                elif key in self._index:
+                    vector = self._read_row(self._index[key])
+                    if vector is not None:
+                        self._remember(key, vector)
+                        self.stats["disk_hits"] += 1
+                    else:
+                        self.stats["misses"] += 1
+                else:
+                    self.stats["misses"] += 1
+                results.append(vector)
+
+        return results
+
+    def _read_row(self, row: int) -> Optional[List[float]]:
+        """One vector of the current generation, or None if it was compacted away"""
+        try:
+            return self._vectors()[row].astype(np.float32).tolist()
+        except (FileNotFoundError, IndexError, ValueError):
+            # A compaction removed this generation between the index refresh and the read
+            self._mmap = None
+            return None
+
+    def put_many(self, deployment: str, texts: Iterable[str], embeddings: Iterable[List[float]]):
+        """Append new embeddings to the store
+
+        Raises ValueError if a vector's length differs from the store's dimension.
+        """
+        if not self.enabled:
+            return
+
+        self._open()
+        items = [
+            (self.make_key(deployment, text), embedding)
+            for text, embedding in zip(texts, embeddings)
+        ]
+        if not items:
+            return
+
+        with self._lock():
+            self._refresh_index()
+            unique = OrderedDict(
+                (key, embedding) for key, embedding in items if key not in self._index
+            )
+            items = list(unique.items())
+            if not items:
+                return
+
+            dimension = self.dimension if self.dimension is not None else len(items[0][1])
+            for _, embedding in items:
+                if len(embedding) != dimension:
+                    raise ValueError(
+                        f"Embedding has {len(embedding)} dimensions, store {self.path} holds {dimension}"
+                    )
+
+            if self.dimension is None:
+                self.dimension = dimension
+                self._write_meta(self.generation)
+
+            matrix = np.asarray([embedding for _, embedding in items], dtype=self.dtype)
+            size = os.path.getsize(self._vectors_path) if os.path.exists(self._vectors_path) else 0
+            first_row = size // self._row_bytes
+
+            with open(self._vectors_path, "ab") as f:
+                # Drop a partial row left behind by an interrupted write
+                if size % self._row_bytes:
+                    f.truncate(first_row * self._row_bytes)
+                f.write(matrix.tobytes())
+
+            lines = "".join(
+                f"{key}\t{first_row + i}\t{deployment}\n" for i, (key, _) in enumerate(items)
+            )
+            with open(self._index_path, "a", encoding="utf-8") as f:
+                f.write(lines)
+
+            with self._state_lock:
+                self._refresh_index()
+                for key, embedding in items:
+                    self._remember(key, list(embedding))
+                self.stats["writes"] += len(items)
+
+    def compact(self, keep_deployments: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """Rewrite the store without duplicate rows or retired deployments"""
+        if not self.enabled:
+            return {"rows_before": 0, "rows_after": 0}
+
+        self._open()
+        keep = set(keep_deployments) if keep_deployments is not None else None
+
+        with self._lock():
+            self._refresh_index()
+            if self.dimension is None or not os.path.exists(self._index_path) \
+                    or os.path.getsize(self._vectors_path) < self._row_bytes:
+                return {"rows_before": 0, "rows_after": 0}
+
+            latest: "OrderedDict[str, tuple]" = OrderedDict()
+            with open(self._index_path, encoding="utf-8") as f:
+                for line in f:
+                    if not line.endswith("\n"):
+                        continue
+                    key, row, deployment = line.rstrip("\n").split("\t", 2)
+                    if keep is None or deployment in keep:
+                        latest[key] = (int(row), deployment)
+
+            with self._state_lock:
+                vectors = self._vectors()
+            rows_before = vectors.shape[0]
+
+            # Readers keep using the current generation until meta.json points at the next
+            old_vectors, old_index = self._vectors_path, self._index_path
+            generation = self.generation + 1
+            vectors_path = self._generation_path("vectors", "bin", generation)
+            index_path = self._generation_path("index", "tsv", generation)
+            with open(vectors_path, "wb") as vf, open(index_path, "w", encoding="utf-8") as xf:
+                for new_row, (key, (row, deployment)) in enumerate(latest.items()):
+                    vf.write(np.ascontiguousarray(vectors[row]).tobytes())
+                    xf.write(f"{key}\t{new_row}\t{deployment}\n")
+
+            self._write_meta(generation)
+            self._refresh_index()
+
+            # Open maps of the old files stay valid after unlinking
+            for stale in (old_vectors, old_index):
+                try:
+                    os.remove(stale)
+                except OSError as e:
+                    logger.warning(f"Could not remove compacted embedding store file {stale}: {e}")
+
+        self.stats["compactions"] += 1
+        logger.info(f"Embedding store compacted: {rows_before} -> {len(latest)} rows")
+        return {"rows_before": rows_before, "rows_after": len(latest)}
+
+    def disable(self, reason: str):
+        """Stop using the store after an error; embeddings are then always computed"""
+        if self.enabled:
+            logger.error(f"Embedding store {self.path} disabled: {reason}")
+        self.enabled = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit counters and store size"""
+        return {
+            "enabled": self.enabled,
+            "path": self.path,
+            "dtype": self.dtype,
+            "dimension": self.dimension,
+            "generation": self.generation,
+            "indexed_rows": len(self._index),
+            "hot_entries": len(self._hot),
+            **self.stats
+        }
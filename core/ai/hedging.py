@@ -0,0 +1,116 @@
+"""
+Request Hedging
+Duplicate slow calls after a latency percentile and keep whichever answers first
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from core.ai.model_router import RollingStats
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class RequestHedger:
+    """Fires a backup call when the primary outlives the recent latency percentile
+
+    Hedges are paid for from a budget that earns `budget` credits per call
+    (capped at max_credit), so at most that fraction of extra upstream calls
+    is ever sent, even while the upstream is uniformly slow. The hedge factory
+    may return None when there is no capacity for a backup call right now;
+    the primary is then awaited alone.
+    """
+
+    def __init__(self, quantile: float = 0.95, budget: float = 0.05, min_samples: int = 20,
+                 max_credit: float = 10.0, window_size: int = 512):
+        self.quantile = quantile
+        self.budget = budget
+        self.min_samples = min_samples
+        self.max_credit = max_credit
+        self.window_size = window_size
+
+        self._credit = 0.0
+        self._latencies: Dict[Hashable, RollingStats] = {}
+        self.stats = {"requests": 0, "fired": 0, "won": 0, "skipped_budget": 0, "skipped_capacity": 0}
+
+    def _window(self, key: Hashable) -> RollingStats:
+        window = self._latencies.get(key)
+        if window is None:
+            window = self._latencies[key] = RollingStats(self.window_size)
+        return window
+
+    def hedge_delay(self, key: Hashable) -> Optional[float]:
+        """Seconds to wait before hedging, or None while there is too little data"""
+        window = self._window(key)
+        if window.count < self.min_samples:
+            return None
+        return window.quantile(self.quantile)
+
+    async def run(self, key: Hashable, primary: Callable[[], Awaitable[Any]],
+                  hedge: Callable[[], Optional[Awaitable[Any]]]) -> Any:
+        """Run primary, racing it against hedge once it is slower than the percentile"""
+        self.stats["requests"] += 1
+        self._credit = min(self.max_credit, self._credit + self.budget)
+
+        delay = self.hedge_delay(key)
+        start_time = time.monotonic()
+        primary_task = asyncio.ensure_future(primary())
+        hedge_task = None
+
+        try:
+            if delay is not None:
+                await asyncio.wait({primary_task}, timeout=delay)
+
+            hedge_call = None
+            if not primary_task.done() and delay is not None:
+                if self._credit < 1.0:
+                    self.stats["skipped_budget"] += 1
+                else:
+                    hedge_call = hedge()
+                    if hedge_call is None:
+                        self.stats["skipped_capacity"] += 1
+
+            if hedge_call is None:
+                result = await primary_task
+                self._window(key).record(time.monotonic() - start_time, True)
+                return result
+
+            self._credit -= 1.0
+            self.stats["fired"] += 1
+            hedge_task = asyncio.ensure_future(hedge_call)
+
+            pending = {primary_task, hedge_task}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge_task:
+                            self.stats["won"] += 1
+                        self._window(key).record(time.monotonic() - start_time, True)
+                        return task.result()
+
+            # Both failed: report the primary's error
+            raise primary_task.exception()
+        finally:
+            # The loser, or both calls if our caller went away
+            for task in (primary_task, hedge_task):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hedges fired and won, and the current hedge delay per key"""
+        delays = {}
+        for key in self._latencies:
+            delay = self.hedge_delay(key)
+            delays[getattr(key, "value", str(key))] = round(delay * 1000, 2) if delay is not None else None
+
+        return {
+            **self.stats,
+            "quantile": self.quantile,
+            "budget": self.budget,
+            "fired_ratio": round(self.stats["fired"] / max(self.stats["requests"], 1), 4),
+            "credit": round(self._credit, 2),
+            "hedge_delay_ms": delays
+        }
@@ -0,0 +1,198 @@
+"""
+Model Metrics
+Mergeable log-bucketed histograms of latency and token counts per model and operation
+"""
+
+import math
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+
+SUMMARY_QUANTILES = (0.5, 0.9, 0.99)
+
+
+class LogHistogram:
+    """Histogram with logarithmic buckets and a bounded relative error
+
+    A value v lands in bucket ceil(log_gamma(v)) with gamma = (1 + a) / (1 - a),
+    so every quantile is reported within relative accuracy a. Buckets depend
+    only on a, which makes histograms from different workers mergeable by
+    adding their counts. Values at or below zero are counted separately.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+
+        self.buckets: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def record(self, value: float, count: int = 1):
+        if value > 0:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        else:
+            self.zero_count += count
+
+        self.count += count
+        self.sum += value * count
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Value at quantile q, within the relative accuracy"""
+        if not self.count:
+            return None
+
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0.0
+
+        seen = self.zero_count
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                value = 2 * self._gamma ** index / (self._gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def merge(self, other: "LogHistogram"):
+        """Add another histogram's counts into this one"""
+        if not math.isclose(other.relative_accuracy, self.relative_accuracy):
+            raise ValueError("Cannot merge histograms with different relative accuracy")
+
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable form, for merging in another process"""
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "buckets": {str(index): count for index, count in self.buckets.items()},
+            "zero_count": self.zero_count,
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min,
+            "max": self.max
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LogHistogram":
+        histogram = cls(data["relative_accuracy"])
+        histogram.buckets = {int(index): count for index, count in data["buckets"].items()}
+        histogram.zero_count = data["zero_count"]
+        histogram.count = data["count"]
+        histogram.sum = data["sum"]
+        histogram.min = data["min"]
+        histogram.max = data["max"]
+        return histogram
+
+    def summary(self) -> Dict[str, Any]:
+        """Count, mean and p50/p90/p99"""
+        result = {"count": self.count, "mean": round(self.mean, 2) if self.count else None}
+        for q in SUMMARY_QUANTILES:
+            value = self.quantile(q)
+            result[f"p{int(q * 100)}"] = round(value, 2) if value is not None else None
+        return result
+
+
+class ModelMetrics:
+    """Histograms and counters keyed by (model, operation)
+
+    Recording is plain dict and integer updates on the event loop, without
+    locks. Workers combine figures by exchanging snapshot() output and
+    calling merge_snapshot().
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self._histograms: Dict[Tuple[str, str, str], LogHistogram] = {}
+        self._counters: Dict[Tuple[str, str, str], int] = {}
+
+    @staticmethod
+    def _name(model: Hashable) -> str:
+        return getattr(model, "value", str(model))
+
+    def histogram(self, model: Hashable, operation: str, metric: str) -> LogHistogram:
+        key = (self._name(model), operation, metric)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = LogHistogram(self.relative_accuracy)
+        return histogram
+
+    def record(self, model: Hashable, operation: str, metric: str, value: float):
+        self.histogram(model, operation, metric).record(value)
+
+    def record_call(self, model: Hashable, operation: str, latency: float,
+                    tokens_in: int, tokens_out: int):
+        """Record one completed upstream call"""
+        self.record(model, operation, "latency_ms", latency * 1000)
+        self.record(model, operation, "tokens_in", tokens_in)
+        self.record(model, operation, "tokens_out", tokens_out)
+
+    def increment(self, model: Hashable, operation: str, counter: str, count: int = 1):
+        key = (self._name(model), operation, counter)
+        self._counters[key] = self._counters.get(key, 0) + count
+
+    def merged(self, model: Hashable, metric: str,
+               operations: Optional[Iterable[str]] = None) -> LogHistogram:
+        """One histogram of a metric across a model's operations"""
+        name = self._name(model)
+        wanted = set(operations) if operations is not None else None
+        merged = LogHistogram(self.relative_accuracy)
+        for (model_name, operation, metric_name), histogram in self._histograms.items():
+            if model_name == name and metric_name == metric and (wanted is None or operation in wanted):
+                merged.merge(histogram)
+        return merged
+
+    def summary(self, model: Optional[Hashable] = None) -> Dict[str, Any]:
+        """Quantile summaries and counters, nested as model -> operation -> metric"""
+        name = self._name(model) if model is not None else None
+        result: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for (model_name, operation, metric), histogram in self._histograms.items():
+            if name is None or model_name == name:
+                result.setdefault(model_name, {}).setdefault(operation, {})[metric] = histogram.summary()
+        for (model_name, operation, counter), count in self._counters.items():
+            if name is None or model_name == name:
+                result.setdefault(model_name, {}).setdefault(operation, {})[counter] = count
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Serializable copy of every histogram and counter"""
+        return {
+            "histograms": [
+                {"model": m, "operation": o, "metric": k, **h.to_dict()}
+                for (m, o, k), h in self._histograms.items()
+            ],
+            "counters": [
+                {"model": m, "operation": o, "counter": k, "count": c}
+                for (m, o, k), c in self._counters.items()
+            ]
+        }
+
+    def merge_snapshot(self, snapshot: Dict[str, Any]):
+        """Add another worker's snapshot into these metrics"""
+        for item in snapshot.get("histograms", []):
+            self.histogram(item["model"], item["operation"], item["metric"]).merge(
+                LogHistogram.from_dict(item)
+            )
+        for item in snapshot.get("counters", []):
+            self.increment(item["model"], item["operation"], item["counter"], item["count"])
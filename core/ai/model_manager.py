@@ -5,7 +5,9 @@ Centralized management of all OpenAI models with intelligent routing and optimiz
 
 import asyncio
 import time
-from typing import Dict, Any, List, Optional, Union
+from contextlib import AsyncExitStack, aclosing, asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import AsyncGenerator, AsyncIterator, Dict, Any, List, Optional, Union
 from dataclasses import dataclass
 from enum import Enum
 
@@ -14,15 +16,35 @@ import tiktoken
 
 from core.config import settings
 from core.logging import get_logger, performance_logger
+from core.ai.response_cache import ResponseCache
+from core.ai.semantic_cache import SemanticCache
+from core.ai.embedding_batcher import EmbeddingBatcher
+from core.ai.embedding_store import EmbeddingStore
+from core.ai.single_flight import SingleFlight
+from core.ai.rate_limiter import ModelRateLimiter, RateLimitPermit
+from core.ai.scheduler import RequestPriority, RequestScheduler
+from core.ai.model_router import ModelRouter, required_capabilities
+from core.ai.backend_pool import Backend, BackendPool
+from core.ai.hedging import RequestHedger
+from core.ai.token_counter import TokenCounter
+from core.ai.context_builder import ContextBuilder
+from core.ai.prompt_templates import prompt_registry
+from core.ai.streaming import StreamTiming
+from core.ai.metrics import ModelMetrics
+from core.ai.traffic_capture import TrafficRecorder
 from core.exceptions import (
     ModelInitializationError, 
     ModelInferenceError, 
     TokenLimitExceededError,
-    RateLimitExceededError
+    RateLimitExceededError,
+    CircuitOpenError
 )
 
 logger = get_logger(__name__)
 
+# Tenant of the request being served, for model calls made without an explicit tenant_id
+_current_tenant: ContextVar[Optional[str]] = ContextVar("model_tenant", default=None)
+
 
 class ModelType(Enum):
     """Available model types"""
@@ -46,6 +68,11 @@ class ModelConfig:
     context_window: int
     supports_functions: bool = True
     supports_streaming: bool = True
+    cache_ttl_seconds: Optional[int] = None
+    slow_call_seconds: Optional[float] = None
+    requests_per_minute: int = 300
+    tokens_per_minute: int = 50000
+    max_concurrency: int = 16
 
 
 @dataclass
@@ -55,8 +82,8 @@ class ModelUsage:
     total_tokens_input: int = 0
     total_tokens_output: int = 0
     total_cost: float = 0.0
-    average_latency_ms: float = 0.0
     error_count: int = 0
+    cache_hits: int = 0
 
 
 class ModelManager:
@@ -64,11 +91,92 @@ class ModelManager:
     
     def __init__(self):
         self.client: Optional[AsyncAzureOpenAI] = None
+        self.endpoint_clients: Dict[str, AsyncAzureOpenAI] = {}
+        self.fallback_handler = None
         self.encoding = tiktoken.get_encoding("cl100k_base")
+        self.token_counter = TokenCounter(
+            self.encoding,
+            max_entries=settings.TOKEN_COUNT_CACHE_SIZE,
+            max_sessions=settings.TOKEN_COUNT_MAX_SESSIONS
+        )
+        prompt_registry.set_token_counter(self.token_counter.count)
         self.models: Dict[ModelType, ModelConfig] = {}
         self.usage_stats: Dict[str, ModelUsage] = {}
         self.initialized = False
         
+        # Exact-match response cache
+        self.response_cache = ResponseCache(
+            max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+            default_ttl=settings.CACHE_TTL_SECONDS,
+            use_redis=settings.RESPONSE_CACHE_USE_REDIS,
+            enabled=settings.RESPONSE_CACHE_ENABLED
+        )
+        
+        # Embedding-similarity cache for near-duplicate questions
+        self.semantic_cache = SemanticCache(
+            max_entries=settings.SEMANTIC_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.SEMANTIC_CACHE_TTL_SECONDS,
+            similarity_threshold=settings.VECTOR_SIMILARITY_THRESHOLD,
+            allowed_states=settings.SEMANTIC_CACHE_STATES,
+            enabled=settings.SEMANTIC_CACHE_ENABLED
+        )
+        
+        # Micro-batching of concurrent embedding requests
+        self.embedding_batcher = EmbeddingBatcher(
+            submit_func=self._create_embeddings,
+            count_tokens=self.count_tokens,
+            max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+            max_batch_tokens=settings.EMBEDDING_BATCH_MAX_TOKENS,
+            max_wait_ms=settings.EMBEDDING_BATCH_MAX_WAIT_MS
+        ) if settings.EMBEDDING_BATCH_ENABLED else None
+        
+        # Persistent content-addressed embedding cache
+        self.embedding_store = EmbeddingStore(
+            path=settings.EMBEDDING_STORE_PATH,
+            dtype=settings.EMBEDDING_STORE_DTYPE,
+            hot_cache_size=settings.EMBEDDING_CACHE_SIZE,
+            enabled=settings.EMBEDDING_STORE_ENABLED
+        )
+        
+        # In-flight deduplication of identical requests
+        self.chat_flights = SingleFlight("chat_completion")
+        self.embedding_flights = SingleFlight("embeddings")
+        
+        # Backup calls for slow non-streaming chat completions
+        self.hedger = RequestHedger(
+            quantile=settings.CHAT_HEDGING_QUANTILE,
+            budget=settings.CHAT_HEDGING_BUDGET,
+            min_samples=settings.CHAT_HEDGING_MIN_SAMPLES
+        )
+        
+        # Model selection from live latency and error statistics
+        self.router = ModelRouter(
+            strategy=settings.MODEL_SELECTION_STRATEGY,
+            latency_slo=settings.MODEL_ROUTER_LATENCY_SLO_SECONDS,
+            latency_quantile=settings.MODEL_ROUTER_LATENCY_QUANTILE,
+            max_error_rate=settings.MODEL_ROUTER_MAX_ERROR_RATE,
+            horizon_seconds=settings.MODEL_ROUTER_WINDOW_SECONDS
+        )
+        
+        # Latency and token histograms per model and operation
+        self.metrics = ModelMetrics(settings.METRICS_HISTOGRAM_ACCURACY)
+        
+        # Token-budgeted history with a rolling summary of older turns
+        self.context_builder = ContextBuilder(
+            count_tokens=self.token_counter.count_content,
+            summarize=self._summarize_history,
+            max_history_tokens=settings.CONTEXT_MAX_HISTORY_TOKENS,
+            summary_min_messages=settings.CONTEXT_SUMMARY_MIN_MESSAGES,
+            max_conversations=settings.TOKEN_COUNT_MAX_SESSIONS
+        )
+        
+        # Sanitized request log for offline replay
+        self.traffic_recorder = TrafficRecorder(
+            path=settings.TRAFFIC_CAPTURE_PATH,
+            sample_rate=settings.TRAFFIC_CAPTURE_SAMPLE_RATE,
+            redact=settings.TRAFFIC_CAPTURE_REDACT
+        ) if settings.TRAFFIC_CAPTURE_ENABLED else None
+        
         # Model configurations
         self._setup_model_configs()
     
@@ -81,10 +189,13 @@ class ModelManager:
                 max_tokens=128000,
                 cost_per_1k_input=0.000150,
                 cost_per_1k_output=0.000600,
-                capabilities=["text", "vision"],
+                capabilities=["text", "chat", "vision"],
                 context_window=128000,
                 supports_functions=True,
-                supports_streaming=True
+                supports_streaming=True,
+                requests_per_minute=1500,
+                tokens_per_minute=250000,
+                max_concurrency=32
             ),
             ModelType.VISION: ModelConfig(
                 name="gpt-4o-mini-vision",
@@ -92,10 +203,13 @@ class ModelManager:
                 max_tokens=128000,
                 cost_per_1k_input=0.000150,
                 cost_per_1k_output=0.000600,
-                capabilities=["text", "vision", "image_analysis"],
+                capabilities=["text", "chat", "vision", "image_analysis"],
                 context_window=128000,
                 supports_functions=True,
-                supports_streaming=True
+                supports_streaming=True,
+                requests_per_minute=1500,
+                tokens_per_minute=250000,
+                max_concurrency=32
             ),
             ModelType.AUDIO: ModelConfig(
                 name="gpt-4o-mini-audio",
@@ -106,7 +220,11 @@ class ModelManager:
                 capabilities=["text", "audio", "speech_recognition"],
                 context_window=128000,
                 supports_functions=True,
-                supports_streaming=False
+                supports_streaming=False,
+                cache_ttl_seconds=0,
+                requests_per_minute=300,
+                tokens_per_minute=50000,
+                max_concurrency=8
             ),
             ModelType.REASONING: ModelConfig(
                 name="o1",
@@ -117,7 +235,12 @@ class ModelManager:
                 capabilities=["advanced_reasoning", "complex_analysis"],
                 context_window=200000,
                 supports_functions=False,
-                supports_streaming=False
+                supports_streaming=False,
+                cache_ttl_seconds=86400,
+                slow_call_seconds=120.0,
+                requests_per_minute=100,
+                tokens_per_minute=100000,
+                max_concurrency=4
             ),
             ModelType.FAST_REASONING: ModelConfig(
                 name="o3-mini",
@@ -128,7 +251,11 @@ class ModelManager:
                 capabilities=["reasoning", "analysis", "decision_making"],
                 context_window=128000,
                 supports_functions=True,
-                supports_streaming=True
+                supports_streaming=True,
+                slow_call_seconds=60.0,
+                requests_per_minute=500,
+                tokens_per_minute=200000,
+                max_concurrency=16
             ),
             ModelType.EMBEDDINGS: ModelConfig(
                 name="text-embedding-3-small",
@@ -139,13 +266,76 @@ class ModelManager:
                 capabilities=["embeddings", "semantic_search"],
                 context_window=8191,
                 supports_functions=False,
-                supports_streaming=False
+                supports_streaming=False,
+                requests_per_minute=2000,
+                tokens_per_minute=350000,
+                max_concurrency=16
             )
         }
         
         # Initialize usage stats
         for model_type in self.models:
             self.usage_stats[model_type.value] = ModelUsage()
+        
+        # Deployments serving each model, balanced with a circuit breaker per deployment
+        breaker_options = {
+            "failure_rate_threshold": settings.CIRCUIT_BREAKER_FAILURE_RATE,
+            "slow_call_rate_threshold": settings.CIRCUIT_BREAKER_SLOW_CALL_RATE,
+            "min_calls": settings.CIRCUIT_BREAKER_MIN_CALLS,
+            "consecutive_failures": settings.CIRCUIT_BREAKER_CONSECUTIVE_FAILURES,
+            "open_seconds": settings.CIRCUIT_BREAKER_OPEN_SECONDS,
+            "half_open_probes": settings.CIRCUIT_BREAKER_HALF_OPEN_PROBES
+        }
+        self.backend_pools: Dict[ModelType, BackendPool] = {
+            model_type: BackendPool(
+                name=config.name,
+                backends=self._configured_backends(model_type, config),
+                strategy=settings.MODEL_LOAD_BALANCING_STRATEGY,
+                breaker_options={**breaker_options, "slow_call_seconds": self._get_slow_call_seconds(config)}
+            )
+            for model_type, config in self.models.items()
+        }
+        
+        # Per-model request, token and concurrency limits; quotas add up across deployments
+        self.rate_limiters: Dict[ModelType, ModelRateLimiter] = {}
+        if settings.MODEL_RATE_LIMITER_ENABLED:
+            for model_type, config in self.models.items():
+                backends = len(self.backend_pools[model_type])
+                self.rate_limiters[model_type] = ModelRateLimiter(
+                    name=config.name,
+                    requests_per_minute=config.requests_per_minute * backends,
+                    tokens_per_minute=config.tokens_per_minute * backends,
+                    max_concurrency=config.max_concurrency * backends,
+                    queue_timeout=settings.MODEL_QUEUE_TIMEOUT_SECONDS
+                )
+        
+        # Priority and per-tenant fair ordering of calls waiting for a model
+        self.schedulers: Dict[ModelType, RequestScheduler] = {}
+        if settings.MODEL_SCHEDULER_ENABLED:
+            for model_type, config in self.models.items():
+                self.schedulers[model_type] = RequestScheduler(
+                    name=config.name,
+                    capacity=self._scheduler_capacity(model_type),
+                    latency_threshold=settings.RESPONSE_TIME_THRESHOLD,
+                    queue_timeout=settings.MODEL_QUEUE_TIMEOUT_SECONDS,
+                    tenant_weights=settings.MODEL_SCHEDULER_TENANT_WEIGHTS
+                )
+    
+    def _configured_backends(self, model_type: ModelType, config: ModelConfig) -> List[Backend]:
+        """Backends from AZURE_OPENAI_BACKENDS, defaulting to the primary deployment"""
+        entries = settings.AZURE_OPENAI_BACKENDS.get(model_type.value)
+        if not entries:
+            return [Backend(endpoint=settings.AZURE_OPENAI_ENDPOINT, deployment=config.deployment)]
+        
+        return [
+            Backend(
+                endpoint=entry.get("endpoint", settings.AZURE_OPENAI_ENDPOINT),
+                deployment=entry.get("deployment", config.deployment),
+                weight=float(entry.get("weight", 1.0)),
+                api_key=entry.get("api_key")
+            )
+            for entry in entries
+        ]
     
     async def initialize(self):
         """Initialize the model manager and test connections"""
@@ -157,10 +347,23 @@ class ModelManager:
                 azure_endpoint=settings.AZURE_OPENAI_ENDPOINT,
                 api_key=settings.AZURE_OPENAI_API_KEY,
                 api_version=settings.AZURE_OPENAI_VERSION,
-                timeout=30.0,
-                max_retries=3
+                timeout=settings.AZURE_OPENAI_TIMEOUT_SECONDS,
+                max_retries=settings.openai_max_retries
             )
             
+            # Additional endpoints used by deployment pools
+            for pool in self.backend_pools.values():
+                for backend in pool.backends:
+                    if backend.endpoint != settings.AZURE_OPENAI_ENDPOINT \
+                            and backend.endpoint not in self.endpoint_clients:
+                        self.endpoint_clients[backend.endpoint] = AsyncAzureOpenAI(
+                            azure_endpoint=backend.endpoint,
+                            api_key=backend.api_key or settings.AZURE_OPENAI_API_KEY,
+                            api_version=settings.AZURE_OPENAI_VERSION,
+                            timeout=settings.AZURE_OPENAI_TIMEOUT_SECONDS,
+                            max_retries=settings.openai_max_retries
+                        )
+            
             # Test basic connectivity
             await self._test_models()
             
@@ -217,7 +420,29 @@ class ModelManager:
     
     def select_optimal_model(self, task_type: str, complexity: str = "medium", 
                            speed_requirement: str = "normal") -> ModelType:
-        """Select optimal model based on task requirements"""
+        """Select optimal model based on task requirements and live statistics"""
+        
+        if task_type == "embedding":
+            return ModelType.EMBEDDINGS
+        
+        default = self._static_model_choice(task_type, complexity, speed_requirement)
+        
+        # The fixed mapping wins ties between equally cheap candidates
+        candidates = [(default, self.models[default])] + [
+            (model_type, config) for model_type, config in self.models.items()
+            if model_type not in (default, ModelType.EMBEDDINGS)
+        ]
+        
+        return self.router.select(
+            candidates,
+            required_capabilities(task_type, complexity, speed_requirement),
+            default
+        )
+    
+    @staticmethod
+    def _static_model_choice(task_type: str, complexity: str = "medium",
+                             speed_requirement: str = "normal") -> ModelType:
+        """Fixed task-to-model mapping"""
         
         if task_type == "embedding":
             return ModelType.EMBEDDINGS
@@ -242,25 +467,76 @@ class ModelManager:
     
     def count_tokens(self, text: str) -> int:
         """Count tokens in text"""
+        return self.token_counter.count(text)
+    
+    def count_message_tokens(self, messages: List[Dict], session_id: Optional[str] = None) -> int:
+        """Count tokens across a list of messages, incrementally when a session is given"""
+        if session_id is not None:
+            return self.token_counter.count_session(session_id, messages)
+        return self.token_counter.count_messages(messages)
+    
+    def forget_session(self, session_id: str):
+        """Drop the running token total and summary kept for a session"""
+        self.token_counter.forget_session(session_id)
+        self.context_builder.forget(session_id)
+    
+    def build_context(self, history: List[Dict], system_prompt: Optional[str] = None,
+                      model_type: ModelType = ModelType.CHAT, max_tokens: int = 1000,
+                      session_id: Optional[str] = None,
+                      system_prompt_tokens: Optional[int] = None) -> List[Dict]:
+        """Messages for a request: system prompt, summary of older turns, then recent history"""
+        return self.context_builder.build(
+            history,
+            system_prompt=system_prompt,
+            system_prompt_tokens=system_prompt_tokens,
+            context_window=self.models[model_type].context_window,
+            max_tokens=max_tokens,
+            conversation_id=session_id
+        )
+    
+    async def _summarize_history(self, previous_summary: Optional[str],
+                                 messages: List[Dict]) -> Optional[str]:
+        """Fold older turns into the running conversation summary"""
+        transcript = "\n".join(
+            f"{message['role']}: {message['content']}" for message in messages
+            if isinstance(message.get("content"), str)
+        )
+        if previous_summary:
+            transcript = f"Resumen previo:\n{previous_summary}\n\nNuevos mensajes:\n{transcript}"
+        
+        response = await self.chat_completion(
+            messages=[
+                prompt_registry.message("conversation_summary_request"),
+                {"role": "user", "content": transcript}
+            ],
+            model_type=ModelType(settings.CONTEXT_SUMMARY_MODEL),
+            temperature=0.2,
+            max_tokens=settings.CONTEXT_SUMMARY_MAX_TOKENS,
+            use_cache=False,
+            priority=RequestPriority.BACKGROUND
+        )
+        # A canned handler answer or a stale cached one is not a summary of these turns;
+        # another model's answer from the "model" step is
+        if response.get("fallback") in ("handler", "cache"):
+            return None
+        return response["content"]
+    
+    @contextmanager
+    def tenant(self, tenant_id: Optional[str]):
+        """Attribute model calls made inside the block to a tenant for fair queuing"""
+        token = _current_tenant.set(tenant_id)
         try:
-            return len(self.encoding.encode(text))
-        except Exception:
-            # Fallback estimation
-            return len(text.split()) * 1.3
+            yield
+        finally:
+            _current_tenant.reset(token)
     
-    def validate_input_length(self, messages: List[Dict], model_type: ModelType) -> bool:
+    def validate_input_length(self, messages: List[Dict], model_type: ModelType,
+                              session_id: Optional[str] = None) -> bool:
         """Validate input doesn't exceed model limits"""
-        total_tokens = 0
-        
-        for message in messages:
-            if isinstance(message.get("content"), str):
-                total_tokens += self.count_tokens(message["content"])
-            elif isinstance(message.get("content"), list):
-                # Handle multimodal content
-                for content_item in message["content"]:
-                    if content_item.get("type") == "text":
-                        total_tokens += self.count_tokens(content_item.get("text", ""))
-        
+        return self._validate_token_count(self.count_message_tokens(messages, session_id), model_type)
+    
+    def _validate_token_count(self, total_tokens: int, model_type: ModelType) -> bool:
+        """Validate a token count against the model context window"""
         max_tokens = self.models[model_type].context_window
         
         if total_tokens > max_tokens:
@@ -274,9 +550,47 @@ class ModelManager:
     
     async def chat_completion(self, messages: List[Dict], model_type: ModelType = None,
                              temperature: float = 0.7, max_tokens: int = None,
-                             functions: List[Dict] = None, stream: bool = False) -> Dict[str, Any]:
+                             functions: List[Dict] = None, stream: bool = False,
+                             use_cache: bool = True,
+                             conversation_state: Optional[str] = None,
+                             priority: RequestPriority = RequestPriority.INTERACTIVE,
+                             tenant_id: Optional[str] = None,
+                             hedge: Optional[bool] = None,
+                             session_id: Optional[str] = None) -> Dict[str, Any]:
         """Generate chat completion with automatic model selection"""
+        if tenant_id is None:
+            tenant_id = _current_tenant.get()
+        request = {
+            "messages": messages, "model_type": model_type, "temperature": temperature,
+            "max_tokens": max_tokens, "functions": functions, "stream": stream,
+            "use_cache": use_cache, "conversation_state": conversation_state,
+            "priority": priority, "tenant_id": tenant_id, "hedge": hedge,
+            "session_id": session_id
+        }
+        if self.traffic_recorder is None or not self.traffic_recorder.sample():
+            return await self._chat_completion(**request)
+        
+        started_at, started = time.time(), time.perf_counter()
+        try:
+            result = await self._chat_completion(**request)
+        except Exception as e:
+            self.traffic_recorder.record_chat(request, started_at, time.perf_counter() - started, error=e)
+            raise
         
+        if "stream" in result:
+            return {
+                **result,
+                "stream": self.traffic_recorder.capture_stream(request, result["stream"], started_at, started)
+            }
+        self.traffic_recorder.record_chat(request, started_at, time.perf_counter() - started, result=result)
+        return result
+    
+    async def _chat_completion(self, messages: List[Dict], model_type: Optional[ModelType],
+                               temperature: float, max_tokens: Optional[int],
+                               functions: Optional[List[Dict]], stream: bool, use_cache: bool,
+                               conversation_state: Optional[str], priority: RequestPriority,
+                               tenant_id: Optional[str], hedge: Optional[bool],
+                               session_id: Optional[str]) -> Dict[str, Any]:
         if not self.initialized:
             raise ModelInitializationError("ModelManager", "Manager not initialized")
         
@@ -287,69 +601,131 @@ class ModelManager:
         model_config = self.models[model_type]
         
         # Validate input length
-        self.validate_input_length(messages, model_type)
+        prompt_tokens = self.count_message_tokens(messages, session_id)
+        self._validate_token_count(prompt_tokens, model_type)
         
         start_time = time.time()
         
-        try:
-            # Prepare request parameters
-            request_params = {
-                "model": model_config.deployment,
-                "messages": messages,
-                "temperature": temperature,
-                "max_tokens": max_tokens or 1000
+        request_key = self.response_cache.make_key(
+            model_config.deployment, messages, temperature, max_tokens or 1000, functions
+        )
+        
+        # Serve repeated requests from the response cache
+        cache_key = None
+        if stream or not use_cache or not self.response_cache.enabled:
+            self.response_cache.record_bypass(model_config.name)
+        else:
+            cache_key = request_key
+            cached = await self.response_cache.get(cache_key, model_config.name)
+            if cached is not None:
+                self.usage_stats[model_type.value].cache_hits += 1
+                return {
+                    **cached,
+                    "processing_time": time.time() - start_time,
+                    "cached": True,
+                    "cache_type": "exact"
+                }
+        
+        # Near-duplicate questions can reuse a previous answer
+        question, question_embedding = None, None
+        if cache_key and not functions and self.semantic_cache.is_allowed(conversation_state):
+            question, question_embedding, cached = await self._lookup_semantic_cache(
+                model_config, conversation_state, messages, priority, tenant_id
+            )
+            if cached is not None:
+                self.usage_stats[model_type.value].cache_hits += 1
+                return {
+                    **cached,
+                    "processing_time": time.time() - start_time,
+                    "cached": True,
+                    "cache_type": "semantic"
+                }
+        
+        # Prepare request parameters
+        request_params = {
+            "model": model_config.deployment,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens or 1000
+        }
+        
+        # Add functions if supported and provided
+        if functions and model_config.supports_functions:
+            request_params["tools"] = [
+                {"type": "function", "function": func} for func in functions
+            ]
+        
+        # Reserve the prompt plus the maximum completion against the token budget
+        estimated_tokens = prompt_tokens + request_params["max_tokens"]
+        
+        # The upstream call starts once the caller iterates the stream
+        if stream:
+            return {
+                "stream": self._stream_chat(
+                    model_type, request_params, prompt_tokens, estimated_tokens, priority, tenant_id
+                ),
+                "processing_time": time.time() - start_time
             }
-            
-            # Add functions if supported and provided
-            if functions and model_config.supports_functions:
-                request_params["tools"] = [
-                    {"type": "function", "function": func} for func in functions
-                ]
-            
-            # Add streaming if supported
-            if stream and model_config.supports_streaming:
-                request_params["stream"] = True
-            
+        
+        try:
             # Make API call
-            response = await self.client.chat.completions.create(**request_params)
+            if hedge is None:
+                hedge = settings.CHAT_HEDGING_ENABLED
+            
+            # Identical concurrent requests share one upstream call
+            response, coalesced = await self.chat_flights.run(
+                request_key,
+                lambda: self._call_with_limits(
+                    model_type, estimated_tokens,
+                    lambda client, deployment: client.chat.completions.create(
+                        **{**request_params, "model": deployment}
+                    ),
+                    priority, tenant_id, hedge
+                )
+            )
             
             processing_time = time.time() - start_time
             
             # Extract response data
-            if stream:
-                return {"stream": response, "processing_time": processing_time}
-            else:
-                content = response.choices[0].message.content
-                usage = response.usage
-                
-                # Update usage statistics
-                await self._update_usage_stats(
-                    model_type.value,
-                    usage.prompt_tokens,
-                    usage.completion_tokens,
-                    processing_time
-                )
-                
-                # Log performance
-                performance_logger.log_model_inference(
-                    model_name=model_config.name,
-                    operation="chat_completion",
-                    input_tokens=usage.prompt_tokens,
-                    output_tokens=usage.completion_tokens,
-                    processing_time=processing_time,
-                    cost=self._calculate_cost(model_config, usage.prompt_tokens, usage.completion_tokens)
+            result = self._chat_result(response, model_config, processing_time)
+            content = result["content"]
+            usage = response.usage
+            
+            # The leader already accounted for and cached the shared call
+            if coalesced:
+                return {**result, "coalesced": True}
+            
+            # Update usage statistics
+            await self._update_usage_stats(
+                model_type,
+                "chat_completion",
+                usage.prompt_tokens,
+                usage.completion_tokens,
+                processing_time
+            )
+            
+            # Log performance
+            performance_logger.log_model_inference(
+                model_name=model_config.name,
+                operation="chat_completion",
+                input_tokens=usage.prompt_tokens,
+                output_tokens=usage.completion_tokens,
+                processing_time=processing_time,
+                cost=self._calculate_cost(model_config, usage.prompt_tokens, usage.completion_tokens)
+            )
+            
+            # Tool calls carry no content and are not safe to replay
+            if cache_key and content is not None:
+                await self.response_cache.set(
+                    cache_key, model_config.name, result, self._get_cache_ttl(model_config)
                 )
-                
-                return {
-                    "content": content,
-                    "usage": {
-                        "prompt_tokens": usage.prompt_tokens,
-                        "completion_tokens": usage.completion_tokens,
-                        "total_tokens": usage.total_tokens
-                    },
-                    "processing_time": processing_time,
-                    "model": model_config.name
-                }
+                if question_embedding is not None:
+                    self.semantic_cache.store(
+                        model_config.deployment, conversation_state, question,
+                        question_embedding, result, processing_time * 1000
+                    )
+            
+            return result
         
         except Exception as e:
             processing_time = time.time() - start_time
@@ -357,44 +733,675 @@ class ModelManager:
             # Update error statistics
             self.usage_stats[model_type.value].error_count += 1
             
+            # Keep answering while the deployments are unavailable or out of quota
+            if isinstance(e, CircuitOpenError) or BackendPool.is_backend_failure(e) \
+                    or BackendPool.is_throttled(e):
+                fallback = await self._run_fallback_chain(
+                    model_type, request_params, request_key, estimated_tokens,
+                    priority, tenant_id, start_time
+                )
+                if fallback is not None:
+                    return fallback
+            
             # Handle specific error types
-            if "rate limit" in str(e).lower():
+            if isinstance(e, CircuitOpenError):
+                raise
+            if self._is_rate_limit_error(e):
                 raise RateLimitExceededError("Azure OpenAI")
             
             logger.error(f"Chat completion failed: {e}")
             raise ModelInferenceError(model_config.name, str(e), {"messages": messages})
     
-    async def generate_embeddings(self, texts: Union[str, List[str]]) -> List[List[float]]:
+    async def stream_chat_completion(self, messages: List[Dict], model_type: ModelType = None,
+                                     temperature: float = 0.7, max_tokens: int = None,
+                                     functions: List[Dict] = None,
+                                     priority: RequestPriority = RequestPriority.INTERACTIVE,
+                                     tenant_id: Optional[str] = None,
+                                     session_id: Optional[str] = None) -> AsyncIterator[str]:
+        """Stream a chat completion as content deltas"""
+        result = await self.chat_completion(
+            messages, model_type=model_type, temperature=temperature, max_tokens=max_tokens,
+            functions=functions, stream=True, priority=priority, tenant_id=tenant_id,
+            session_id=session_id
+        )
+        async for delta in result["stream"]:
+            yield delta
+    
+    async def _stream_chat(self, model_type: ModelType, request_params: Dict[str, Any],
+                           prompt_tokens: int, estimated_tokens: int, priority: RequestPriority,
+                           tenant_id: Optional[str]) -> AsyncIterator[str]:
+        """Yield the content deltas of a completion, metering it when the stream ends
+        
+        The scheduler slot, the limiter permit and the deployment are held until
+        the stream ends, so open streams count against the model's limits.
+        Usage comes from the final stream_options chunk, or is counted from the
+        delivered text when the stream is cut short. Models without streaming
+        support are called normally and yield their content once.
+        """
+        model_config = self.models[model_type]
+        streaming = model_config.supports_streaming
+        params = dict(request_params)
+        if streaming:
+            params["stream"] = True
+            params["stream_options"] = {"include_usage": True}
+        
+        def call(client, deployment):
+            return client.chat.completions.create(**{**params, "model": deployment})
+        
+        timing = StreamTiming(time.perf_counter())
+        parts: List[str] = []
+        usage = None
+        outcome = "failed"
+        deadline = self._queue_deadline(model_type)
+        try:
+            while True:
+                try:
+                    # The slot, the permit and the backend stay claimed until the body has been read
+                    async with self._admission(model_type, estimated_tokens, priority, tenant_id,
+                                               deadline) as permit:
+                        try:
+                            if not streaming:
+                                response = await self._call_and_record(model_type, call)
+                                usage = response.usage
+                                content = response.choices[0].message.content
+                                if content:
+                                    timing.on_chunk(time.perf_counter())
+                                    parts.append(content)
+                                    yield content
+                            else:
+                                async with aclosing(self._pooled_stream(model_type, call)) as chunks:
+                                    async for chunk in chunks:
+                                        if chunk.usage is not None:
+                                            usage = chunk.usage
+                                        if chunk.choices:
+                                            content = chunk.choices[0].delta.content
+                                            if content:
+                                                timing.on_chunk(time.perf_counter())
+                                                parts.append(content)
+                                                yield content
+                        except Exception as e:
+                            if permit is not None and self._is_rate_limit_error(e):
+                                permit.throttled(self._retry_after(e))
+                            raise
+                        
+                        if permit is not None:
+                            permit.success(getattr(usage, "total_tokens", None))
+                    break
+                except Exception as e:
+                    # Only a stream that has not delivered anything yet can start over
+                    if parts or not self._should_requeue(model_type, e, deadline):
+                        raise
+            
+            outcome = "completed"
+        
+        except (asyncio.CancelledError, GeneratorExit):
+            outcome = "cancelled"
+            raise
+        
+        except Exception as e:
+            self.usage_stats[model_type.value].error_count += 1
+            if isinstance(e, CircuitOpenError):
+                raise
+            if self._is_rate_limit_error(e):
+                raise RateLimitExceededError("Azure OpenAI")
+            
+            logger.error(f"Streaming chat completion failed: {e}")
+            raise ModelInferenceError(model_config.name, str(e), {"messages": request_params["messages"]})
+        
+        finally:
+            await self._record_stream(model_type, prompt_tokens, usage, parts, timing, outcome)
+    
+    async def _pooled_stream(self, model_type: ModelType, call) -> AsyncIterator[Any]:
+        """Open a streamed call on a pooled deployment and yield its chunks
+        
+        The deployment stays claimed until the stream ends, so its breaker and
+        the router judge the whole stream: an error partway through counts
+        against the deployment, a consumer that stops early does not. The
+        breaker is given the time to the first chunk, since a long answer is
+        not a slow deployment. Only failures before the first byte fail over
+        to another deployment.
+        """
+        pool = self.backend_pools[model_type]
+        start_time = time.perf_counter()
+        backend, response = await self._with_failover(
+            model_type, lambda backend: self._open_on(pool, backend, call), start_time
+        )
+        
+        first_chunk_at = None
+        try:
+            try:
+                async for chunk in response:
+                    if first_chunk_at is None:
+                        first_chunk_at = time.perf_counter()
+                    yield chunk
+            finally:
+                # Releases the connection when the consumer stops early
+                close = getattr(response, "close", None)
+                if close is not None:
+                    await close()
+        except Exception as e:
+            pool.on_failure(backend, e)
+            self._record_route_failure(model_type, e, start_time)
+            raise
+        except BaseException:
+            pool.on_cancel(backend)
+            raise
+        
+        pool.on_success(backend, (first_chunk_at or time.perf_counter()) - start_time)
+        self.router.record(model_type, time.perf_counter() - start_time, True)
+    
+    async def _open_on(self, pool: BackendPool, backend: Backend, call):
+        """Start a call on one backend, keeping it claimed"""
+        return backend, await self._attempt(pool, backend, call, hold=True)
+    
+    async def _record_stream(self, model_type: ModelType, prompt_tokens: int, usage,
+                             parts: List[str], timing: StreamTiming, outcome: str):
+        """Account a finished stream, including one the caller abandoned"""
+        self.metrics.increment(model_type, "chat_completion_stream", outcome)
+        if timing.time_to_first_token is not None:
+            self.metrics.record(model_type, "chat_completion_stream", "ttft_ms",
+                                timing.time_to_first_token * 1000)
+        if timing.inter_token_latency is not None:
+            self.metrics.record(model_type, "chat_completion_stream", "inter_token_ms",
+                                timing.inter_token_latency * 1000)
+        if outcome == "failed" and not parts:
+            return
+        
+        if usage is not None:
+            input_tokens, output_tokens = usage.prompt_tokens, usage.completion_tokens
+        else:
+            input_tokens, output_tokens = prompt_tokens, self.count_tokens("".join(parts))
+        
+        processing_time = time.perf_counter() - timing.started_at
+        model_config = self.models[model_type]
+        await self._update_usage_stats(
+            model_type, "chat_completion_stream", input_tokens, output_tokens, processing_time
+        )
+        
+        performance_logger.log_model_inference(
+            model_name=model_config.name,
+            operation=f"chat_completion_stream_{outcome}",
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            processing_time=processing_time,
+            cost=self._calculate_cost(model_config, input_tokens, output_tokens)
+        )
+    
+    @staticmethod
+    def _chat_result(response, model_config: ModelConfig, processing_time: float) -> Dict[str, Any]:
+        """Shape a chat completion response"""
+        usage = response.usage
+        return {
+            "content": response.choices[0].message.content,
+            "usage": {
+                "prompt_tokens": usage.prompt_tokens,
+                "completion_tokens": usage.completion_tokens,
+                "total_tokens": usage.total_tokens
+            },
+            "processing_time": processing_time,
+            "model": model_config.name,
+            "cached": False
+        }
+    
+    def set_fallback_handler(self, handler):
+        """Register the last-resort responder: async handler(user_message) -> {"content": ...}"""
+        self.fallback_handler = handler
+    
+    async def _run_fallback_chain(self, model_type: ModelType, request_params: Dict[str, Any],
+                                  request_key: str, estimated_tokens: int,
+                                  priority: RequestPriority, tenant_id: Optional[str],
+                                  start_time: float) -> Optional[Dict[str, Any]]:
+        """Walk MODEL_FALLBACK_CHAIN after the primary model failed
+        
+        Steps: "model" tries another text model with an open circuit, "cache"
+        serves a stale exact-match answer, "handler" calls the registered
+        fallback handler. Failover between deployments of the same model
+        happens earlier, inside the backend pool.
+        """
+        for step in settings.MODEL_FALLBACK_CHAIN:
+            try:
+                if step == "model":
+                    result = await self._fallback_to_model(
+                        model_type, request_params, estimated_tokens, priority, tenant_id, start_time
+                    )
+                elif step == "cache":
+                    result = self.response_cache.get_stale(request_key)
+                    if result is not None:
+                        result = {**result, "cached": True, "cache_type": "stale"}
+                elif step == "handler" and self.fallback_handler is not None:
+                    result = await self._fallback_to_handler(request_params["messages"])
+                else:
+                    result = None
+            except Exception as e:
+                logger.warning(f"Fallback step {step} failed: {e}")
+                continue
+            
+            if result is not None:
+                logger.warning(f"Chat completion served by fallback step {step}")
+                return {**result, "processing_time": time.time() - start_time, "fallback": step}
+        
+        return None
+    
+    async def _fallback_to_model(self, model_type: ModelType, request_params: Dict[str, Any],
+                                 estimated_tokens: int, priority: RequestPriority,
+                                 tenant_id: Optional[str], start_time: float) -> Optional[Dict[str, Any]]:
+        """Retry on the cheapest other chat model that has a deployment available"""
+        alternates = sorted(
+            (
+                (alternate, config) for alternate, config in self.models.items()
+                if alternate not in (model_type, ModelType.EMBEDDINGS)
+                and "chat" in config.capabilities
+                and (config.supports_functions or "tools" not in request_params)
+                and self.backend_pools[alternate].has_available()
+            ),
+            key=lambda item: item[1].cost_per_1k_input + item[1].cost_per_1k_output
+        )
+        if not alternates:
+            return None
+        
+        alternate, config = alternates[0]
+        response = await self._call_with_limits(
+            alternate, estimated_tokens,
+            lambda client, deployment: client.chat.completions.create(
+                **{**request_params, "model": deployment}
+            ),
+            priority, tenant_id
+        )
+        return self._chat_result(response, config, time.time() - start_time)
+    
+    async def _fallback_to_handler(self, messages: List[Dict]) -> Dict[str, Any]:
+        """Ask the registered handler for a canned answer to the last user turn"""
+        user_message = next(
+            (m["content"] for m in reversed(messages)
+             if m.get("role") == "user" and isinstance(m.get("content"), str)),
+            ""
+        )
+        response = await self.fallback_handler(user_message)
+        return {
+            "content": response["content"],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            "model": response.get("model_used", "fallback"),
+            "cached": False
+        }
+    
+    def _scheduler_capacity(self, model_type: ModelType):
+        """Dispatch slots follow the limiter's adaptive concurrency cap"""
+        def capacity() -> int:
+            limiter = self.rate_limiters.get(model_type)
+            if limiter is not None:
+                return limiter.concurrency.current
+            return self.models[model_type].max_concurrency
+        return capacity
+    
+    @asynccontextmanager
+    async def _admission(self, model_type: ModelType, estimated_tokens: int,
+                         priority: RequestPriority = RequestPriority.STANDARD,
+                         tenant_id: Optional[str] = None,
+                         deadline: Optional[float] = None) -> AsyncGenerator[Optional[RateLimitPermit], None]:
+        """Hold a scheduler slot and a limiter permit for the duration of the block
+        
+        Yields the limiter permit, or None when the rate limiter is disabled.
+        The limiter queue gives up at deadline (time.monotonic()) when one is given.
+        """
+        # Fail fast instead of queueing for deployments that are all known to be down
+        if not self.backend_pools[model_type].has_available():
+            raise CircuitOpenError(self.models[model_type].name)
+        
+        async with AsyncExitStack() as stack:
+            scheduler = self.schedulers.get(model_type)
+            if scheduler is not None:
+                await stack.enter_async_context(scheduler.slot(priority, tenant_id, estimated_tokens))
+            
+            permit = None
+            limiter = self.rate_limiters.get(model_type)
+            if limiter is not None:
+                timeout = None if deadline is None else deadline - time.monotonic()
+                permit = await stack.enter_async_context(limiter.acquire(estimated_tokens, timeout))
+            
+            yield permit
+    
+    def _queue_deadline(self, model_type: ModelType) -> Optional[float]:
+        """When a call stops queueing, including requeues after a 429"""
+        limiter = self.rate_limiters.get(model_type)
+        if limiter is None:
+            return None
+        return time.monotonic() + limiter.queue_timeout
+    
+    def _should_requeue(self, model_type: ModelType, error: Exception, deadline: Optional[float]) -> bool:
+        """Whether a throttled call goes back to the limiter queue
+        
+        SDK retries are off while the limiter is on, so a 429 waits in the
+        queue, behind the upstream Retry-After, until the caller's deadline.
+        """
+        if deadline is None or isinstance(error, RateLimitExceededError):
+            return False
+        if not self._is_rate_limit_error(error):
+            return False
+        if time.monotonic() + (self._retry_after(error) or 0.0) >= deadline:
+            return False
+        logger.info(f"{self.models[model_type].name} throttled, queueing again: {error}")
+        return True
+    
+    async def _call_with_limits(self, model_type: ModelType, estimated_tokens: int, call,
+                                priority: RequestPriority = RequestPriority.STANDARD,
+                                tenant_id: Optional[str] = None, hedge: bool = False):
+        """Run an API call once the scheduler and the model's limits admit it"""
+        deadline = self._queue_deadline(model_type)
+        while True:
+            try:
+                async with self._admission(model_type, estimated_tokens, priority, tenant_id,
+                                           deadline) as permit:
+                    try:
+                        response = await self._call_and_record(model_type, call, hedge, estimated_tokens)
+                    except Exception as e:
+                        if permit is not None and self._is_rate_limit_error(e):
+                            permit.throttled(self._retry_after(e))
+                        raise
+                    
+                    if permit is not None:
+                        usage = getattr(response, "usage", None)
+                        permit.success(getattr(usage, "total_tokens", None))
+                    return response
+            except Exception as e:
+                if not self._should_requeue(model_type, e, deadline):
+                    raise
+    
+    async def _call_and_record(self, model_type: ModelType, call, hedge: bool = False,
+                               estimated_tokens: int = 0):
+        """Run an API call on a pooled deployment and feed its outcome to the router
+        
+        call receives (client, deployment). Backend failures fail over to another
+        deployment in the pool, up to MODEL_BACKEND_MAX_ATTEMPTS attempts. With
+        hedge set, a slow attempt is raced against a duplicate on the least
+        loaded other deployment (or the same one in a single-deployment pool).
+        """
+        pool = self.backend_pools[model_type]
+        start_time = time.perf_counter()
+        
+        async def attempt(backend: Backend):
+            if hedge:
+                return await self.hedger.run(
+                    model_type,
+                    lambda: self._attempt(pool, backend, call),
+                    lambda: self._start_hedge(model_type, estimated_tokens, backend, call)
+                )
+            return await self._attempt(pool, backend, call)
+        
+        response = await self._with_failover(model_type, attempt, start_time)
+        self.router.record(model_type, time.perf_counter() - start_time, True)
+        return response
+    
+    def _start_hedge(self, model_type: ModelType, estimated_tokens: int, primary: Backend, call):
+        """Backup attempt for a slow call, or None when the limiter has no room for it now
+        
+        The hedge takes its own limiter permit so it stays within the model's
+        request, token and concurrency budget.
+        """
+        pool = self.backend_pools[model_type]
+        backend = pool.pick(exclude=[primary]) or primary
+        
+        limiter = self.rate_limiters.get(model_type)
+        if limiter is None:
+            return self._attempt(pool, backend, call)
+        
+        permit = limiter.try_acquire(estimated_tokens)
+        if permit is None:
+            return None
+        
+        # Released by the task, even if it is cancelled before it starts running
+        task = asyncio.ensure_future(self._hedged_attempt(pool, backend, call, permit))
+        task.add_done_callback(lambda _: permit.release())
+        return task
+    
+    async def _hedged_attempt(self, pool: BackendPool, backend: Backend, call,
+                              permit: RateLimitPermit):
+        """A hedge attempt that reports its outcome to its own permit"""
+        try:
+            response = await self._attempt(pool, backend, call)
+        except Exception as e:
+            if self._is_rate_limit_error(e):
+                permit.throttled(self._retry_after(e))
+            raise
+        
+        usage = getattr(response, "usage", None)
+        permit.success(getattr(usage, "total_tokens", None))
+        return response
+    
+    async def _with_failover(self, model_type: ModelType, attempt, start_time: float):
+        """Run attempt(backend) on pooled deployments until one succeeds
+        
+        Records the failure with the router when every attempt failed; a
+        success is left to the caller, which may still be reading the body.
+        """
+        pool = self.backend_pools[model_type]
+        max_attempts = min(len(pool), settings.MODEL_BACKEND_MAX_ATTEMPTS)
+        tried: List[Backend] = []
+        
+        while True:
+            backend = pool.pick(exclude=tried)
+            if backend is None:
+                error = CircuitOpenError(self.models[model_type].name)
+                self._record_route_failure(model_type, error, start_time)
+                raise error
+            tried.append(backend)
+            
+            try:
+                return await attempt(backend)
+            except Exception as e:
+                # A circuit that rejected its claim is as unavailable as a failed or throttled backend
+                unavailable = isinstance(e, CircuitOpenError) or pool.is_backend_failure(e) \
+                    or pool.is_throttled(e)
+                if unavailable and len(tried) < max_attempts:
+                    logger.warning(f"Backend {backend.name} failed, failing over: {e}")
+                    continue
+                self._record_route_failure(model_type, e, start_time)
+                raise
+    
+    def _record_route_failure(self, model_type: ModelType, error: Exception, start_time: float):
+        """Count a failed call against the model, unless the request itself was at fault
+        
+        Bad requests, content filter refusals and throttling say nothing about
+        whether the model is a good routing target.
+        """
+        if isinstance(error, CircuitOpenError) or BackendPool.is_backend_failure(error):
+            self.router.record(model_type, time.perf_counter() - start_time, False)
+    
+    async def _attempt(self, pool: BackendPool, backend: Backend, call, hold: bool = False):
+        """One call against one backend, tracked by its pool
+        
+        With hold set, a successful call leaves the backend claimed; the caller
+        settles it with the pool once the response body has been read.
+        """
+        if not pool.on_start(backend):
+            raise CircuitOpenError(backend.name)
+        start_time = time.perf_counter()
+        try:
+            response = await call(self._client_for(backend), backend.deployment)
+        except asyncio.CancelledError:
+            pool.on_cancel(backend)
+            raise
+        except Exception as e:
+            pool.on_failure(backend, e)
+            raise
+        
+        if not hold:
+            pool.on_success(backend, time.perf_counter() - start_time)
+        return response
+    
+    def _client_for(self, backend: Backend) -> AsyncAzureOpenAI:
+        """Client for a backend's endpoint"""
+        if backend.endpoint == settings.AZURE_OPENAI_ENDPOINT:
+            return self.client
+        return self.endpoint_clients[backend.endpoint]
+    
+    @staticmethod
+    def _is_rate_limit_error(error: Exception) -> bool:
+        """Detect upstream 429 responses"""
+        return getattr(error, "status_code", None) == 429 or "rate limit" in str(error).lower()
+    
+    @staticmethod
+    def _retry_after(error: Exception) -> Optional[float]:
+        """Seconds from the Retry-After headers of a throttled response, if any"""
+        headers = getattr(getattr(error, "response", None), "headers", None) or {}
+        try:
+            if headers.get("retry-after-ms"):
+                return float(headers["retry-after-ms"]) / 1000
+            if headers.get("retry-after"):
+                return float(headers["retry-after"])
+        except (TypeError, ValueError):
+            pass
+        return None
+    
+    async def _lookup_semantic_cache(self, model_config: ModelConfig, conversation_state: str,
+                                     messages: List[Dict], priority: RequestPriority,
+                                     tenant_id: Optional[str]):
+        """Embed the last user turn and search the semantic cache"""
+        question = self.semantic_cache.get_question(messages)
+        if not question:
+            return None, None, None
+        
+        start_time = time.perf_counter()
+        try:
+            embedding = (await self.generate_embeddings(question, priority, tenant_id))[0]
+        except Exception as e:
+            logger.warning(f"Semantic cache lookup skipped: {e}")
+            return None, None, None
+        
+        overhead_ms = (time.perf_counter() - start_time) * 1000
+        cached = self.semantic_cache.lookup(
+            model_config.deployment, conversation_state, embedding, overhead_ms
+        )
+        return question, embedding, cached
+    
+    async def generate_embeddings(self, texts: Union[str, List[str]],
+                                  priority: RequestPriority = RequestPriority.STANDARD,
+                                  tenant_id: Optional[str] = None) -> List[List[float]]:
         """Generate embeddings for text(s)"""
+        if tenant_id is None:
+            tenant_id = _current_tenant.get()
+        if self.traffic_recorder is None or not self.traffic_recorder.sample():
+            return await self._generate_embeddings(texts, priority, tenant_id)
         
+        request = {"texts": texts, "priority": priority, "tenant_id": tenant_id}
+        started_at, started = time.time(), time.perf_counter()
+        try:
+            embeddings = await self._generate_embeddings(texts, priority, tenant_id)
+        except Exception as e:
+            self.traffic_recorder.record_embeddings(request, started_at, time.perf_counter() - started, error=e)
+            raise
+        self.traffic_recorder.record_embeddings(
+            request, started_at, time.perf_counter() - started, result=embeddings
+        )
+        return embeddings
+    
+    async def _generate_embeddings(self, texts: Union[str, List[str]], priority: RequestPriority,
+                                   tenant_id: Optional[str]) -> List[List[float]]:
         if not self.initialized:
             raise ModelInitializationError("ModelManager", "Manager not initialized")
         
-        model_config = self.models[ModelType.EMBEDDINGS]
-        
         # Ensure input is a list
         if isinstance(texts, str):
             texts = [texts]
         
+        deployment = self.models[ModelType.EMBEDDINGS].deployment
+        
+        # Reuse embeddings persisted by earlier runs or other workers
+        embeddings = await self._read_embedding_store(deployment, texts)
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if not missing:
+            return embeddings
+        
+        missing_texts = [texts[i] for i in missing]
+        fresh = await self._embed_uncached(missing_texts, priority, tenant_id)
+        await self._write_embedding_store(deployment, missing_texts, fresh)
+        
+        for i, embedding in zip(missing, fresh):
+            embeddings[i] = embedding
+        
+        return embeddings
+    
+    async def _read_embedding_store(self, deployment: str,
+                                    texts: List[str]) -> List[Optional[List[float]]]:
+        """Stored embeddings, or None per text; the store is best-effort and turned off on errors"""
+        if not self.embedding_store.enabled:
+            return [None] * len(texts)
+        try:
+            # A miss refreshes the index and reads the memory map
+            return await asyncio.to_thread(self.embedding_store.get_many, deployment, texts)
+        except Exception as e:
+            self.embedding_store.disable(f"read failed: {e}")
+            return [None] * len(texts)
+    
+    async def _write_embedding_store(self, deployment: str, texts: List[str],
+                                     embeddings: List[List[float]]):
+        """Persist fresh embeddings without failing the call that produced them"""
+        if not self.embedding_store.enabled:
+            return
+        try:
+            # Appends wait on a lock shared with other workers and compaction
+            await asyncio.to_thread(self.embedding_store.put_many, deployment, texts, embeddings)
+        except ValueError as e:
+            logger.warning(f"Embeddings not persisted: {e}")
+        except Exception as e:
+            self.embedding_store.disable(f"write failed: {e}")
+    
+    async def _embed_uncached(self, texts: List[str], priority: RequestPriority,
+                              tenant_id: Optional[str]) -> List[List[float]]:
+        """Embed texts through the micro-batcher when enabled"""
+        deployment = self.models[ModelType.EMBEDDINGS].deployment
+        
+        if self.embedding_batcher is None:
+            key = EmbeddingStore.make_key(deployment, "\0".join(texts))
+            embeddings, _ = await self.embedding_flights.run(
+                key, lambda: self._create_embeddings(texts, priority, tenant_id)
+            )
+            return embeddings
+        
+        # Concurrent callers share batched upstream calls; identical texts share one slot.
+        # Batches mix tenants, so they are scheduled as one shared flow.
+        results = await asyncio.gather(*(
+            self.embedding_flights.run(
+                EmbeddingStore.make_key(deployment, text),
+                lambda text=text: self.embedding_batcher.embed(text, priority)
+            )
+            for text in texts
+        ))
+        return [embedding for embedding, _ in results]
+    
+    async def _create_embeddings(self, texts: List[str],
+                                 priority: RequestPriority = RequestPriority.STANDARD,
+                                 tenant_id: Optional[str] = None) -> List[List[float]]:
+        """Call the embeddings API for a batch of texts"""
+        model_config = self.models[ModelType.EMBEDDINGS]
+        
         start_time = time.time()
         
         try:
-            response = await self.client.embeddings.create(
-                model=model_config.deployment,
-                input=texts
+            response = await self._call_with_limits(
+                ModelType.EMBEDDINGS,
+                sum(self.count_tokens(text) for text in texts),
+                lambda client, deployment: client.embeddings.create(
+                    model=deployment,
+                    input=texts
+                ),
+                RequestPriority(priority), tenant_id
             )
             
             processing_time = time.time() - start_time
             
-            # Extract embeddings
-            embeddings = [item.embedding for item in response.data]
+            # Extract embeddings in input order
+            embeddings = [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
             
             # Calculate token usage
-            total_tokens = sum(self.count_tokens(text) for text in texts)
+            if getattr(response, "usage", None) is not None:
+                total_tokens = response.usage.prompt_tokens
+            else:
+                total_tokens = sum(self.count_tokens(text) for text in texts)
             
             # Update usage statistics
             await self._update_usage_stats(
-                ModelType.EMBEDDINGS.value,
+                ModelType.EMBEDDINGS,
+                "embeddings",
                 total_tokens,
                 0,
                 processing_time
@@ -418,7 +1425,9 @@ class ModelManager:
             logger.error(f"Embeddings generation failed: {e}")
             raise ModelInferenceError(model_config.name, str(e), {"texts": texts})
     
-    async def analyze_image(self, image_data: str, prompt: str = None) -> str:
+    async def analyze_image(self, image_data: str, prompt: str = None,
+                            priority: RequestPriority = RequestPriority.BACKGROUND,
+                            tenant_id: Optional[str] = None) -> str:
         """Analyze image using vision model"""
         
         if not self.initialized:
@@ -446,30 +1455,36 @@ class ModelManager:
         response = await self.chat_completion(
             messages=messages,
             model_type=ModelType.VISION,
-            max_tokens=1000
+            max_tokens=1000,
+            priority=priority,
+            tenant_id=tenant_id
         )
         
         return response["content"]
     
-    async def _update_usage_stats(self, model_name: str, input_tokens: int, 
+    async def _update_usage_stats(self, model_type: ModelType, operation: str, input_tokens: int,
                                  output_tokens: int, processing_time: float):
-        """Update usage statistics for a model"""
-        stats = self.usage_stats[model_name]
+        """Update usage statistics and histograms for a model"""
+        stats = self.usage_stats[model_type.value]
         
         stats.total_requests += 1
         stats.total_tokens_input += input_tokens
         stats.total_tokens_output += output_tokens
+        stats.total_cost += self._calculate_cost(self.models[model_type], input_tokens, output_tokens)
         
-        # Update average latency
-        total_time = stats.average_latency_ms * (stats.total_requests - 1) + (processing_time * 1000)
-        stats.average_latency_ms = total_time / stats.total_requests
-        
-        # Update cost
-        model_config = next(
-            config for config in self.models.values() 
-            if config.name.replace("-", "_") in model_name
-        )
-        stats.total_cost += self._calculate_cost(model_config, input_tokens, output_tokens)
+        self.metrics.record_call(model_type, operation, processing_time, input_tokens, output_tokens)
+    
+    def _get_slow_call_seconds(self, model_config: ModelConfig) -> float:
+        """Get the latency past which a call counts as slow for a model's breakers"""
+        if model_config.slow_call_seconds is not None:
+            return model_config.slow_call_seconds
+        return settings.CIRCUIT_BREAKER_SLOW_CALL_SECONDS
+    
+    def _get_cache_ttl(self, model_config: ModelConfig) -> int:
+        """Get response cache TTL for a model"""
+        if model_config.cache_ttl_seconds is not None:
+            return model_config.cache_ttl_seconds
+        return settings.CACHE_TTL_SECONDS
     
     def _calculate_cost(self, model_config: ModelConfig, input_tokens: int, output_tokens: int) -> float:
         """Calculate cost for model usage"""
@@ -486,28 +1501,132 @@ class ModelManager:
         
         for model_type, config in self.models.items():
             stats = self.usage_stats[model_type.value]
+            latency = self.metrics.merged(model_type, "latency_ms").summary()
             
             model_status[config.name] = {
                 "status": "ready",
                 "deployment": config.deployment,
                 "capabilities": config.capabilities,
+                "backends": self.backend_pools[model_type].get_stats(),
                 "usage": {
                     "total_requests": stats.total_requests,
                     "total_cost": round(stats.total_cost, 4),
-                    "average_latency_ms": round(stats.average_latency_ms, 2),
+                    "average_latency_ms": latency["mean"] or 0.0,
+                    "p50_latency_ms": latency["p50"],
+                    "p90_latency_ms": latency["p90"],
+                    "p99_latency_ms": latency["p99"],
                     "error_rate": round(
                         stats.error_count / max(stats.total_requests, 1) * 100, 2
-                    )
+                    ),
+                    "cache_hits": stats.cache_hits
                 }
             }
         
         return model_status
     
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get response cache hit/miss counters"""
+        return {
+            "response_cache": self.response_cache.get_stats(),
+            "semantic_cache": self.semantic_cache.get_stats()
+        }
+    
+    def get_embedding_store_stats(self) -> Dict[str, Any]:
+        """Get persistent embedding store figures"""
+        return self.embedding_store.get_stats()
+    
+    async def compact_embedding_store(self) -> Dict[str, int]:
+        """Compact the embedding store, dropping rows from retired deployments"""
+        return await asyncio.to_thread(
+            self.embedding_store.compact,
+            keep_deployments=[self.models[ModelType.EMBEDDINGS].deployment]
+        )
+    
+    def get_rate_limit_stats(self) -> Dict[str, Any]:
+        """Get queue depth, wait time and limits per model"""
+        return {
+            model_type.value: limiter.get_stats()
+            for model_type, limiter in self.rate_limiters.items()
+        }
+    
+    def get_prompt_stats(self) -> Dict[str, Any]:
+        """Get prompt template versions and their token counts"""
+        return prompt_registry.get_stats()
+    
+    def get_traffic_capture_stats(self) -> Dict[str, Any]:
+        """Get traffic capture settings and counters"""
+        if self.traffic_recorder is None:
+            return {"enabled": False}
+        return self.traffic_recorder.get_stats()
+    
+    def get_streaming_stats(self) -> Dict[str, Any]:
+        """Get time-to-first-token and inter-token latency of streamed completions"""
+        return {
+            model: operations["chat_completion_stream"]
+            for model, operations in self.metrics.summary().items()
+            if "chat_completion_stream" in operations
+        }
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get latency and token quantiles per model and operation"""
+        return self.metrics.summary()
+    
+    def get_metrics_snapshot(self) -> Dict[str, Any]:
+        """Get raw histograms, for merging with other workers"""
+        return self.metrics.snapshot()
+    
+    def get_context_stats(self) -> Dict[str, Any]:
+        """Get context packing and summarization figures"""
+        return self.context_builder.get_stats()
+    
+    def get_token_count_stats(self) -> Dict[str, Any]:
+        """Get token count cache hits and tracked sessions"""
+        return self.token_counter.get_stats()
+    
+    def get_hedging_stats(self) -> Dict[str, Any]:
+        """Get hedges fired and won"""
+        return {"enabled": settings.CHAT_HEDGING_ENABLED, **self.hedger.get_stats()}
+    
+    def get_routing_stats(self) -> Dict[str, Any]:
+        """Get rolling latency quantiles, error rates and routing decisions"""
+        return self.router.get_stats()
+    
+    def get_scheduler_stats(self) -> Dict[str, Any]:
+        """Get queue depth and wait time per priority class and model"""
+        return {
+            model_type.value: scheduler.get_stats()
+            for model_type, scheduler in self.schedulers.items()
+        }
+    
+    def get_coalescing_stats(self) -> Dict[str, Any]:
+        """Get in-flight request coalescing counters"""
+        return {
+            "chat_completion": self.chat_flights.get_stats(),
+            "embeddings": self.embedding_flights.get_stats()
+        }
+    
+    def get_batching_stats(self) -> Dict[str, Any]:
+        """Get embedding micro-batching figures"""
+        if self.embedding_batcher is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.embedding_batcher.get_stats()}
+    
     async def cleanup(self):
         """Cleanup resources"""
+        await self.context_builder.close()
+        
+        if self.traffic_recorder is not None:
+            await self.traffic_recorder.close()
+        
+        if self.embedding_batcher is not None:
+            await self.embedding_batcher.close()
+        
         if self.client:
             await self.client.close()
         
+        for client in self.endpoint_clients.values():
+            await client.close()
+        
         logger.info("Model Manager cleanup completed")
 
 
@@ -0,0 +1,206 @@
+"""
+Model Router
+Latency- and cost-aware model selection from rolling per-model statistics
+"""
+
+import time
+from collections import deque
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+ROUTING_STRATEGIES = ("cost_optimized", "latency_optimized", "balanced", "static")
+
+
+class RollingStats:
+    """Latency samples and outcomes over a bounded, time-limited window"""
+
+    def __init__(self, window_size: int = 256, horizon_seconds: float = 300.0):
+        self.horizon_seconds = horizon_seconds
+        self._samples: deque = deque(maxlen=window_size)
+        self._sorted: Optional[List[float]] = None
+
+    def record(self, latency: float, success: bool):
+        self._samples.append((time.monotonic(), latency, success))
+        self._sorted = None
+
+    def _prune(self):
+        cutoff = time.monotonic() - self.horizon_seconds
+        while self._samples and self._samples[0][0] < cutoff:
+            self._samples.popleft()
+            self._sorted = None
+
+    @property
+    def count(self) -> int:
+        self._prune()
+        return len(self._samples)
+
+    def error_rate(self) -> float:
+        self._prune()
+        if not self._samples:
+            return 0.0
+        return sum(1 for _, _, success in self._samples if not success) / len(self._samples)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Nearest-rank quantile of successful call latencies"""
+        self._prune()
+        if self._sorted is None:
+            self._sorted = sorted(latency for _, latency, success in self._samples if success)
+        if not self._sorted:
+            return None
+        return self._sorted[min(len(self._sorted) - 1, int(q * len(self._sorted)))]
+
+
+def required_capabilities(task_type: str, complexity: str = "medium",
+                          speed_requirement: str = "normal") -> List[Tuple[str, ...]]:
+    """Capability tiers for a task, most suitable first; a model matches a tier if it has any"""
+    task = task_type.lower()
+
+    if task == "vision" or "image" in task:
+        return [("vision",)]
+    if task == "audio" or "speech" in task:
+        return [("audio",)]
+    if task == "reasoning" or complexity == "high":
+        if speed_requirement == "fast":
+            return [("reasoning",), ("advanced_reasoning",)]
+        return [("advanced_reasoning",), ("reasoning",)]
+    return [("chat",)]
+
+
+class ModelRouter:
+    """Picks the cheapest healthy model that meets the latency SLO
+
+    Strategies:
+      cost_optimized    - cheapest model within the SLO
+      latency_optimized - fastest model at the SLO quantile
+      balanced          - lowest cost x latency product
+      static            - the fixed task mapping, ignoring live statistics
+
+    A model counts as within the SLO only once it has min_samples recent
+    calls; until then it gets traffic as the preferred candidate or through
+    failover. A model whose recent error rate exceeds max_error_rate is
+    skipped until its failures age out of the window, which fails traffic
+    over to the next candidate and lets it back in automatically.
+    """
+
+    def __init__(self, strategy: str = "cost_optimized", latency_slo: float = 2.0,
+                 latency_quantile: float = 0.9, max_error_rate: float = 0.2,
+                 min_samples: int = 5, window_size: int = 256,
+                 horizon_seconds: float = 300.0):
+        if strategy not in ROUTING_STRATEGIES:
+            raise ValueError(f"Unknown model selection strategy: {strategy}")
+
+        self.strategy = strategy
+        self.latency_slo = latency_slo
+        self.latency_quantile = latency_quantile
+        self.max_error_rate = max_error_rate
+        self.min_samples = min_samples
+        self.window_size = window_size
+        self.horizon_seconds = horizon_seconds
+
+        self.stats: Dict[Hashable, RollingStats] = {}
+        self.decisions: Dict[str, int] = {}
+        self.failovers = 0
+
+    def _stats(self, key: Hashable) -> RollingStats:
+        stats = self.stats.get(key)
+        if stats is None:
+            stats = self.stats[key] = RollingStats(self.window_size, self.horizon_seconds)
+        return stats
+
+    def record(self, key: Hashable, latency: float, success: bool):
+        """Record the outcome of one upstream call"""
+        self._stats(key).record(latency, success)
+
+    def is_healthy(self, key: Hashable) -> bool:
+        stats = self._stats(key)
+        return stats.count < self.min_samples or stats.error_rate() <= self.max_error_rate
+
+    def _latency(self, key: Hashable) -> Optional[float]:
+        stats = self._stats(key)
+        if stats.count < self.min_samples:
+            return None
+        return stats.quantile(self.latency_quantile)
+
+    def _latency_or_inf(self, key: Hashable) -> float:
+        latency = self._latency(key)
+        return latency if latency is not None else float("inf")
+
+    def select(self, candidates: Sequence[Tuple[Hashable, Any]],
+               tiers: List[Tuple[str, ...]], default: Hashable) -> Hashable:
+        """Choose among (key, ModelConfig) candidates for the capability tiers
+
+        Candidates should be listed in preference order; ties keep that order.
+        """
+        if self.strategy == "static":
+            return self._decide(default)
+
+        for tier in tiers:
+            matching = [
+                (key, config) for key, config in candidates
+                if any(capability in config.capabilities for capability in tier)
+            ]
+            healthy = [(key, config) for key, config in matching if self.is_healthy(key)]
+            if not healthy:
+                continue
+
+            # A model has to show it meets the SLO over min_samples calls first
+            within_slo = [
+                (key, config) for key, config in healthy
+                if self._latency(key) is not None and self._latency(key) <= self.latency_slo
+            ]
+            if within_slo:
+                choice = min(
+                    enumerate(within_slo), key=lambda item: (self._score(*item[1]), item[0])
+                )[1][0]
+            else:
+                # Fastest measured model, else the first in preference order
+                choice = min(
+                    enumerate(healthy), key=lambda item: (self._latency_or_inf(item[1][0]), item[0])
+                )[1][0]
+
+            if len(healthy) < len(matching) or tier is not tiers[0]:
+                self.failovers += 1
+                logger.debug(f"Routing around degraded models to {choice}")
+            return self._decide(choice)
+
+        # Nothing healthy: the fixed mapping is as good a bet as any
+        return self._decide(default)
+
+    def _score(self, key: Hashable, config) -> float:
+        cost = config.cost_per_1k_input + config.cost_per_1k_output
+        if self.strategy == "cost_optimized":
+            return cost
+        latency = self._latency(key) or 0.0
+        if self.strategy == "latency_optimized":
+            return latency
+        return cost * (latency or self.latency_slo)
+
+    def _decide(self, key: Hashable) -> Hashable:
+        name = getattr(key, "value", str(key))
+        self.decisions[name] = self.decisions.get(name, 0) + 1
+        return key
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get rolling latency quantiles, error rates and routing decisions"""
+        models = {}
+        for key, stats in self.stats.items():
+            p50, p90, p99 = (stats.quantile(q) for q in (0.5, 0.9, 0.99))
+            models[getattr(key, "value", str(key))] = {
+                "samples": stats.count,
+                "error_rate": round(stats.error_rate(), 4),
+                "healthy": self.is_healthy(key),
+                "p50_ms": round(p50 * 1000, 2) if p50 is not None else None,
+                "p90_ms": round(p90 * 1000, 2) if p90 is not None else None,
+                "p99_ms": round(p99 * 1000, 2) if p99 is not None else None
+            }
+        return {
+            "strategy": self.strategy,
+            "latency_slo_ms": self.latency_slo * 1000,
+            "decisions": dict(self.decisions),
+            "failovers": self.failovers,
+            "models": models
+        }
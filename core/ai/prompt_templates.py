@@ -0,0 +1,174 @@
+"""
+Prompt Templates
+Versioned prompt registry with precompiled templates and cached token counts
+"""
+
+from dataclasses import dataclass, field
+from string import Formatter
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+# Keyword arguments of PromptRegistry.render and message
+RESERVED_VARIABLES = ("version", "role")
+
+
+@dataclass
+class PromptTemplate:
+    """A prompt compiled into literal parts and {variable} slots
+
+    Everything before the first variable is the prefix, which is identical
+    byte for byte on every render so upstream prompt caching can reuse it.
+    Put variables at the end of a template to keep that prefix long.
+    """
+    name: str
+    version: str
+    text: str
+    parts: Tuple[Tuple[str, Optional[str]], ...]
+    variables: Tuple[str, ...]
+    prefix: str
+    prefix_tokens: Optional[int] = None
+    renders: int = field(default=0, compare=False)
+
+    @classmethod
+    def compile(cls, name: str, text: str, version: str = "1") -> "PromptTemplate":
+        """Parse a str.format-style template; only bare {name} fields are allowed"""
+        parts = []
+        for literal, field_name, format_spec, conversion in Formatter().parse(text):
+            if field_name is not None and (not field_name.isidentifier() or format_spec or conversion):
+                raise ValueError(f"Prompt {name}: unsupported field {{{field_name}}}")
+            if field_name in RESERVED_VARIABLES:
+                raise ValueError(f"Prompt {name}: {{{field_name}}} is a reserved name")
+            parts.append((literal, field_name))
+
+        # Literal text up to the first variable, with {{ }} escapes resolved
+        prefix = ""
+        for literal, field_name in parts:
+            prefix += literal
+            if field_name is not None:
+                break
+
+        variables = tuple(dict.fromkeys(f for _, f in parts if f is not None))
+
+        return cls(
+            name=name, version=version, text=text, parts=tuple(parts),
+            variables=variables, prefix=prefix
+        )
+
+    def render(self, **values: Any) -> str:
+        self.renders += 1
+        return self.fill(**values)
+
+    def fill(self, **values: Any) -> str:
+        """Interpolate variables without counting a render"""
+        if not self.variables:
+            return self.prefix
+
+        missing = [name for name in self.variables if name not in values]
+        if missing:
+            raise ValueError(f"Prompt {self.name} missing variables: {missing}")
+
+        return "".join(
+            literal + (str(values[field_name]) if field_name is not None else "")
+            for literal, field_name in self.parts
+        )
+
+
+class PromptRegistry:
+    """Named, versioned prompt templates compiled once at startup
+
+    Token counts for the fixed part of each template are computed when a
+    token counter is attached, so a render only has to count its variables.
+    """
+
+    def __init__(self, count_tokens: Optional[Callable[[str], int]] = None):
+        self._count_tokens = count_tokens
+        self._templates: Dict[str, Dict[str, PromptTemplate]] = {}
+        self._default_versions: Dict[str, str] = {}
+
+    def register(self, name: str, text: str, version: str = "1",
+                 default: bool = True) -> PromptTemplate:
+        """Compile and store a template version, by default making it the one served"""
+        template = PromptTemplate.compile(name, text, version)
+        if self._count_tokens is not None:
+            template.prefix_tokens = self._count_tokens(template.prefix)
+
+        versions = self._templates.setdefault(name, {})
+        if version in versions and versions[version].text != text:
+            logger.warning(f"Prompt {name} version {version} re-registered with different text")
+        versions[version] = template
+        if default or name not in self._default_versions:
+            self._default_versions[name] = version
+        return template
+
+    def set_token_counter(self, count_tokens: Callable[[str], int]):
+        """Attach a token counter and count every registered template"""
+        self._count_tokens = count_tokens
+        for versions in self._templates.values():
+            for template in versions.values():
+                template.prefix_tokens = count_tokens(template.prefix)
+
+    def get(self, name: str, version: Optional[str] = None) -> PromptTemplate:
+        versions = self._templates.get(name)
+        if not versions:
+            raise KeyError(f"Unknown prompt template: {name}")
+        version = version or self._default_versions[name]
+        if version not in versions:
+            raise KeyError(f"Unknown version {version} of prompt template {name}")
+        return versions[version]
+
+    def render(self, name: str, /, version: Optional[str] = None, **values: Any) -> str:
+        """Render a template with its variables"""
+        return self.get(name, version).render(**values)
+
+    def message(self, name: str, /, role: str = "system", version: Optional[str] = None,
+                **values: Any) -> Dict[str, str]:
+        """Render a template as a chat message"""
+        return {"role": role, "content": self.render(name, version, **values)}
+
+    def count_tokens(self, name: str, /, version: Optional[str] = None,
+                     **values: Any) -> Optional[int]:
+        """Approximate token count of a render: the cached prefix plus the rest"""
+        template = self.get(name, version)
+        if template.prefix_tokens is None or self._count_tokens is None:
+            return None
+        if not template.variables:
+            return template.prefix_tokens
+
+        rendered = template.fill(**values)
+        return template.prefix_tokens + self._count_tokens(rendered[len(template.prefix):])
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get versions, variables, prefix token counts and renders per template"""
+        return {
+            name: {
+                "default_version": self._default_versions[name],
+                "versions": {
+                    version: {
+                        "variables": list(template.variables),
+                        "prefix_tokens": template.prefix_tokens,
+                        "prefix_chars": len(template.prefix),
+                        "renders": template.renders
+                    }
+                    for version, template in versions.items()
+                }
+            }
+            for name, versions in self._templates.items()
+        }
+
+
+# Global registry
+prompt_registry = PromptRegistry()
+
+prompt_registry.register(
+    "conversation_summary_request",
+    "Resume la conversación en pocas frases, conservando datos del cliente, "
+    "requisitos, decisiones y preguntas pendientes. Responde solo con el resumen."
+)
+prompt_registry.register(
+    "conversation_summary",
+    "Resumen de la conversación anterior:\n{summary}"
+)
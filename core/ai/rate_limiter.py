@@ -0,0 +1,276 @@
+"""
+Model Rate Limiter
+Per-model request/token buckets with an adaptive (AIMD) concurrency cap
+"""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncGenerator, Dict, Optional
+
+from core.exceptions import RateLimitExceededError
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class TokenBucket:
+    """Continuously refilled bucket sized for a per-minute quota"""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.refill_rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_rate)
+        self.updated_at = now
+
+    def delay(self, amount: float) -> float:
+        """Seconds until amount can be consumed"""
+        self._refill()
+        # Requests larger than the bucket wait for a full bucket instead of forever
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.refill_rate
+
+    def consume(self, amount: float):
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+    def adjust(self, amount: float):
+        """Correct an estimate once the real usage is known (negative refunds)"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+
+class AIMDConcurrencyLimit:
+    """Additive-increase / multiplicative-decrease cap on in-flight requests
+
+    Latency is compared against a baseline averaged over roughly the last
+    baseline_window calls rather than the lowest latency ever seen: completion
+    times vary with output length, so only a sustained rise of the recent
+    average over that baseline is taken as load. 429s always back off.
+    """
+
+    def __init__(self, initial: int, min_limit: int = 1, max_limit: int = 64,
+                 backoff_ratio: float = 0.5, latency_tolerance: float = 2.0,
+                 decrease_interval: float = 1.0, baseline_window: int = 500,
+                 min_samples: int = 50):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.latency_tolerance = latency_tolerance
+        self.decrease_interval = decrease_interval
+        self.baseline_weight = 2.0 / (baseline_window + 1)
+        self.min_samples = min_samples
+        self.samples = 0
+        self.last_decrease_at = 0.0
+        self.baseline_latency: Optional[float] = None
+        self.smoothed_latency: Optional[float] = None
+
+    @property
+    def current(self) -> int:
+        return max(self.min_limit, int(self.limit))
+
+    def on_success(self, latency: float):
+        self.samples += 1
+        if self.baseline_latency is None:
+            self.baseline_latency = self.smoothed_latency = latency
+        else:
+            self.baseline_latency += self.baseline_weight * (latency - self.baseline_latency)
+            self.smoothed_latency += 0.1 * (latency - self.smoothed_latency)
+
+        # Too few samples for a baseline yet
+        if self.samples >= self.min_samples and \
+                self.smoothed_latency > self.baseline_latency * self.latency_tolerance:
+            self._decrease()
+        else:
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+
+    def on_throttled(self):
+        self._decrease()
+
+    def _decrease(self):
+        # Back off at most once per interval so one slow burst does not collapse the limit
+        now = time.monotonic()
+        if now - self.last_decrease_at < self.decrease_interval:
+            return
+        self.last_decrease_at = now
+        self.limit = max(float(self.min_limit), self.limit * self.backoff_ratio)
+
+
+@dataclass
+class RateLimiterStats:
+    """Rate limiter counters"""
+    acquired: int = 0
+    timeouts: int = 0
+    throttled: int = 0
+    total_wait_ms: float = 0.0
+    max_wait_ms: float = 0.0
+
+
+class ModelRateLimiter:
+    """Queues callers until request, token and concurrency budgets allow"""
+
+    def __init__(self, name: str, requests_per_minute: int, tokens_per_minute: int,
+                 max_concurrency: int, queue_timeout: float = 30.0):
+        self.name = name
+        self.queue_timeout = queue_timeout
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.concurrency = AIMDConcurrencyLimit(
+            initial=max(1, max_concurrency // 2), max_limit=max_concurrency
+        )
+        self.in_flight = 0
+        self.queue_depth = 0
+        self.stats = RateLimiterStats()
+        # Nothing is admitted before this time after an upstream Retry-After
+        self.resume_at = 0.0
+
+        # Callers waiting for a concurrency slot, woken in FIFO order
+        self._slot_waiters: deque = deque()
+
+    def _wake_next(self):
+        while self._slot_waiters:
+            waiter = self._slot_waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+    async def _wait_for_slot(self, deadline: float):
+        waiter = asyncio.get_running_loop().create_future()
+        self._slot_waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, deadline - time.monotonic())
+        except asyncio.TimeoutError:
+            # Pass on a wake-up that raced with the timeout
+            if waiter.done() and not waiter.cancelled():
+                self._wake_next()
+            raise
+        finally:
+            if waiter in self._slot_waiters:
+                self._slot_waiters.remove(waiter)
+
+    async def _wait_for_budget(self, estimated_tokens: int, deadline: float):
+        while True:
+            now = time.monotonic()
+            if now >= deadline:
+                raise asyncio.TimeoutError()
+
+            if self.in_flight >= self.concurrency.current:
+                await self._wait_for_slot(deadline)
+                continue
+
+            delay = max(self.requests.delay(1), self.tokens.delay(estimated_tokens),
+                        self.resume_at - now)
+            if delay > 0:
+                await asyncio.sleep(min(delay, deadline - now))
+                continue
+
+            self.requests.consume(1)
+            self.tokens.consume(estimated_tokens)
+            self.in_flight += 1
+            return
+
+    @asynccontextmanager
+    async def acquire(self, estimated_tokens: int,
+                      timeout: float = None) -> AsyncGenerator["RateLimitPermit", None]:
+        """Wait for capacity, raising RateLimitExceededError once the deadline passes"""
+        start_time = time.monotonic()
+        deadline = start_time + (timeout if timeout is not None else self.queue_timeout)
+
+        self.queue_depth += 1
+        try:
+            await self._wait_for_budget(estimated_tokens, deadline)
+        except asyncio.TimeoutError:
+            self.stats.timeouts += 1
+            logger.warning(f"Rate limiter queue timeout for {self.name}")
+            raise RateLimitExceededError(f"Azure OpenAI ({self.name})")
+        finally:
+            self.queue_depth -= 1
+
+        wait_ms = (time.monotonic() - start_time) * 1000
+        self.stats.acquired += 1
+        self.stats.total_wait_ms += wait_ms
+        self.stats.max_wait_ms = max(self.stats.max_wait_ms, wait_ms)
+
+        permit = RateLimitPermit(self, estimated_tokens)
+        try:
+            yield permit
+        finally:
+            permit.release()
+
+    def try_acquire(self, estimated_tokens: int) -> Optional["RateLimitPermit"]:
+        """Admit a request only if the budget allows it right now; the caller must release it
+
+        Returns None instead of waiting, and never overtakes queued callers.
+        """
+        if self.queue_depth or self.in_flight >= self.concurrency.current:
+            return None
+        if self.requests.delay(1) > 0 or self.tokens.delay(estimated_tokens) > 0 \
+                or time.monotonic() < self.resume_at:
+            return None
+
+        self.requests.consume(1)
+        self.tokens.consume(estimated_tokens)
+        self.in_flight += 1
+        self.stats.acquired += 1
+        return RateLimitPermit(self, estimated_tokens)
+
+    def hold_off(self, seconds: float):
+        """Admit nothing for the given number of seconds"""
+        self.resume_at = max(self.resume_at, time.monotonic() + seconds)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth, wait time and current limits"""
+        stats = self.stats
+        return {
+            "queue_depth": self.queue_depth,
+            "in_flight": self.in_flight,
+            "concurrency_limit": self.concurrency.current,
+            "requests_available": int(self.requests.tokens),
+            "tokens_available": int(self.tokens.tokens),
+            "acquired": stats.acquired,
+            "timeouts": stats.timeouts,
+            "throttled": stats.throttled,
+            "average_wait_ms": round(stats.total_wait_ms / max(stats.acquired, 1), 2),
+            "max_wait_ms": round(stats.max_wait_ms, 2)
+        }
+
+
+class RateLimitPermit:
+    """Feedback handle for one admitted request"""
+
+    def __init__(self, limiter: ModelRateLimiter, estimated_tokens: int):
+        self.limiter = limiter
+        self.estimated_tokens = estimated_tokens
+        self.started_at = time.monotonic()
+        self.released = False
+
+    def success(self, actual_tokens: Optional[int] = None):
+        """Report a completed request and its real token usage"""
+        self.limiter.concurrency.on_success(time.monotonic() - self.started_at)
+        if actual_tokens is not None:
+            self.limiter.tokens.adjust(actual_tokens - self.estimated_tokens)
+
+    def throttled(self, retry_after: Optional[float] = None):
+        """Report an upstream 429 and the Retry-After it carried, if any"""
+        self.limiter.stats.throttled += 1
+        self.limiter.concurrency.on_throttled()
+        if retry_after:
+            self.limiter.hold_off(retry_after)
+
+    def release(self):
+        """Give the concurrency slot back; safe to call more than once"""
+        if self.released:
+            return
+        self.released = True
+        self.limiter.in_flight -= 1
+        self.limiter._wake_next()
@@ -0,0 +1,188 @@
+"""
+Response Cache
+Exact-match caching of chat completion responses with in-process and Redis tiers
+"""
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple
+
+from core.database import cache_manager
+
+
+@dataclass
+class ResponseCacheStats:
+    """Response cache counters"""
+    memory_hits: int = 0
+    redis_hits: int = 0
+    misses: int = 0
+    bypassed: int = 0
+    stores: int = 0
+    evictions: int = 0
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.redis_hits
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class LRUCache:
+    """Bounded in-process LRU cache with per-entry expiry"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.evictions = 0
+
+    def get(self, key: str, allow_stale: bool = False) -> Optional[Any]:
+        """Get value if present and not expired (or expired, with allow_stale)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        # Expired entries stay until evicted so they can be served during outages
+        expires_at, value = entry
+        if expires_at <= time.monotonic() and not allow_stale:
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float):
+        """Store value, evicting the least recently used entries"""
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: str) -> bool:
+        """Remove a key"""
+        return self._entries.pop(key, None) is not None
+
+    def clear(self):
+        """Remove all entries"""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ResponseCache:
+    """Two-tier exact-match cache for chat completions"""
+
+    key_prefix = "ai:response:"
+
+    def __init__(self, max_entries: int = 1000, default_ttl: int = 3600,
+                 use_redis: bool = True, enabled: bool = True):
+        self.enabled = enabled
+        self.use_redis = use_redis
+        self.default_ttl = default_ttl
+        self.memory = LRUCache(max_entries)
+        self.stats: Dict[str, ResponseCacheStats] = {}
+
+    @staticmethod
+    def make_key(deployment: str, messages: List[Dict], temperature: float,
+                 max_tokens: int, tools: Optional[List[Dict]] = None) -> str:
+        """Build a canonical hash for a chat completion request"""
+        canonical = json.dumps(
+            {
+                "deployment": deployment,
+                "messages": messages,
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+                "tools": tools or [],
+            },
+            sort_keys=True,
+            separators=(",", ":"),
+            ensure_ascii=False,
+            default=str,
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def _stats_for(self, model_name: str) -> ResponseCacheStats:
+        if model_name not in self.stats:
+            self.stats[model_name] = ResponseCacheStats()
+        return self.stats[model_name]
+
+    def record_bypass(self, model_name: str):
+        """Count a request that skipped the cache"""
+        self._stats_for(model_name).bypassed += 1
+
+    async def get(self, key: str, model_name: str) -> Optional[Dict[str, Any]]:
+        """Look up a cached response, promoting Redis hits to memory"""
+        stats = self._stats_for(model_name)
+
+        entry = self.memory.get(key)
+        if entry is not None:
+            stats.memory_hits += 1
+            return entry["response"]
+
+        if self.use_redis:
+            entry = await cache_manager.get_json(f"{self.key_prefix}{key}", near_cache=False)
+            if entry is not None:
+                stats.redis_hits += 1
+                remaining = entry.get("expires_at", 0) - time.time()
+                if remaining > 0:
+                    self.memory.set(key, entry, remaining)
+                return entry["response"]
+
+        stats.misses += 1
+        return None
+
+    def get_stale(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get a response from memory even if it has expired, for serving during outages"""
+        entry = self.memory.get(key, allow_stale=True)
+        return entry["response"] if entry is not None else None
+
+    async def set(self, key: str, model_name: str, response: Dict[str, Any], ttl: int = None):
+        """Store a response in both tiers"""
+        ttl = ttl if ttl is not None else self.default_ttl
+        if ttl <= 0:
+            return
+
+        entry = {"response": response, "expires_at": time.time() + ttl}
+        evictions_before = self.memory.evictions
+        self.memory.set(key, entry, ttl)
+
+        stats = self._stats_for(model_name)
+        stats.stores += 1
+        stats.evictions += self.memory.evictions - evictions_before
+
+        if self.use_redis:
+            await cache_manager.set_json(f"{self.key_prefix}{key}", entry, ttl, near_cache=False)
+
+    async def invalidate(self, key: str):
+        """Remove a cached response from both tiers"""
+        self.memory.delete(key)
+        if self.use_redis:
+            await cache_manager.delete(f"{self.key_prefix}{key}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters per model"""
+        return {
+            "enabled": self.enabled,
+            "redis_enabled": self.use_redis,
+            "memory_entries": len(self.memory),
+            "models": {
+                model_name: {
+                    "hits": stats.hits,
+                    "memory_hits": stats.memory_hits,
+                    "redis_hits": stats.redis_hits,
+                    "misses": stats.misses,
+                    "bypassed": stats.bypassed,
+                    "stores": stats.stores,
+                    "evictions": stats.evictions,
+                    "hit_rate": round(stats.hit_rate * 100, 2),
+                }
+                for model_name, stats in self.stats.items()
+            }
+        }
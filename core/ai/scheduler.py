@@ -0,0 +1,214 @@
+"""
+Request Scheduler
+Priority classes with weighted fair queuing across tenants for model calls
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, AsyncGenerator, Callable, Dict, List, Optional, Tuple
+
+from core.exceptions import RateLimitExceededError
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class RequestPriority(IntEnum):
+    """Scheduling classes, lower values are served first"""
+    INTERACTIVE = 0
+    STANDARD = 1
+    BACKGROUND = 2
+
+
+@dataclass(order=True)
+class _QueuedRequest:
+    """Heap entry ordered by virtual finish time"""
+    finish_tag: float
+    seq: int
+    priority: RequestPriority = field(compare=False)
+    tenant_id: str = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+
+@dataclass
+class SchedulerClassStats:
+    """Per-priority counters"""
+    dispatched: int = 0
+    timeouts: int = 0
+    preemptions: int = 0
+    total_wait_ms: float = 0.0
+    max_wait_ms: float = 0.0
+
+
+class RequestScheduler:
+    """Admits model calls by priority class, fair-sharing each class across tenants
+
+    Classes are served in strict priority order. Inside a class every tenant is a
+    flow in a self-clocked fair queue weighted by tenant weight, with the request's
+    estimated tokens as its cost, so one chatty tenant cannot starve the others.
+    While the smoothed time interactive requests spend queued exceeds the
+    threshold, queued background work is held back to leave quota for
+    interactive traffic. Queue wait rather than call latency is the signal:
+    a long completion says nothing about contention for the model.
+    """
+
+    def __init__(self, name: str, capacity: Callable[[], int], latency_threshold: float,
+                 queue_timeout: float = 30.0, tenant_weights: Optional[Dict[str, float]] = None,
+                 preemptible: Tuple[RequestPriority, ...] = (RequestPriority.BACKGROUND,),
+                 pressure_window: float = 10.0):
+        self.name = name
+        self.capacity = capacity
+        self.latency_threshold = latency_threshold
+        self.queue_timeout = queue_timeout
+        self.tenant_weights = tenant_weights or {}
+        self.preemptible = preemptible
+        self.pressure_window = pressure_window
+
+        self.in_flight = 0
+        self.interactive_wait: Optional[float] = None
+        self._last_interactive_at = 0.0
+        self._retry_handle: Optional[asyncio.TimerHandle] = None
+
+        self._queues: Dict[RequestPriority, List[_QueuedRequest]] = {p: [] for p in RequestPriority}
+        self._virtual_time: Dict[RequestPriority, float] = {p: 0.0 for p in RequestPriority}
+        self._flow_finish: Dict[Tuple[RequestPriority, str], float] = {}
+        self._seq = itertools.count()
+        self.stats: Dict[RequestPriority, SchedulerClassStats] = {
+            p: SchedulerClassStats() for p in RequestPriority
+        }
+
+    @property
+    def under_pressure(self) -> bool:
+        """Whether interactive requests recently waited longer than the threshold"""
+        if self.interactive_wait is None:
+            return False
+        recent = time.monotonic() - self._last_interactive_at < self.pressure_window
+        return recent and self.interactive_wait > self.latency_threshold
+
+    def _enqueue(self, priority: RequestPriority, tenant_id: str, cost: int) -> _QueuedRequest:
+        flow = (priority, tenant_id)
+        weight = self.tenant_weights.get(tenant_id, 1.0)
+        start_tag = max(self._virtual_time[priority], self._flow_finish.get(flow, 0.0))
+        finish_tag = start_tag + max(cost, 1) / weight
+        self._flow_finish[flow] = finish_tag
+
+        request = _QueuedRequest(
+            finish_tag, next(self._seq), priority, tenant_id,
+            asyncio.get_running_loop().create_future()
+        )
+        heapq.heappush(self._queues[priority], request)
+
+        # Flows that fell behind the virtual clock no longer affect ordering
+        if len(self._flow_finish) > 10000:
+            self._flow_finish = {
+                key: tag for key, tag in self._flow_finish.items()
+                if tag > self._virtual_time[key[0]]
+            }
+        return request
+
+    def _next_request(self) -> Optional[_QueuedRequest]:
+        pressure = self.under_pressure
+        for priority, queue in self._queues.items():
+            # Drop requests whose callers gave up
+            while queue and queue[0].future.done():
+                heapq.heappop(queue)
+            if not queue:
+                continue
+
+            if pressure and priority in self.preemptible:
+                self.stats[priority].preemptions += 1
+                self._schedule_retry()
+                continue
+
+            return heapq.heappop(queue)
+        return None
+
+    def _schedule_retry(self):
+        """Re-run dispatch once the pressure window lapses without new interactive data"""
+        if self._retry_handle is not None:
+            return
+        delay = max(0.0, self._last_interactive_at + self.pressure_window - time.monotonic())
+        self._retry_handle = asyncio.get_running_loop().call_later(delay, self._on_retry)
+
+    def _on_retry(self):
+        self._retry_handle = None
+        self._dispatch()
+
+    def _dispatch(self):
+        while self.in_flight < max(1, self.capacity()):
+            request = self._next_request()
+            if request is None:
+                return
+            self.in_flight += 1
+            self._virtual_time[request.priority] = request.finish_tag
+            request.future.set_result(None)
+
+    def _release(self):
+        self.in_flight -= 1
+        self._dispatch()
+
+    def _record_interactive(self, wait: float):
+        self.interactive_wait = wait if self.interactive_wait is None else \
+            0.8 * self.interactive_wait + 0.2 * wait
+        self._last_interactive_at = time.monotonic()
+
+    @asynccontextmanager
+    async def slot(self, priority: RequestPriority = RequestPriority.STANDARD,
+                   tenant_id: Optional[str] = None, cost: int = 1,
+                   timeout: float = None) -> AsyncGenerator[None, None]:
+        """Wait for a dispatch slot, raising RateLimitExceededError once the deadline passes"""
+        start_time = time.monotonic()
+        request = self._enqueue(priority, tenant_id or "anonymous", cost)
+        self._dispatch()
+
+        try:
+            await asyncio.wait_for(
+                request.future, timeout if timeout is not None else self.queue_timeout
+            )
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            # A slot granted in the same tick as the timeout must be handed back
+            if request.future.done() and not request.future.cancelled():
+                self._release()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.stats[priority].timeouts += 1
+            logger.warning(f"Scheduler queue timeout for {self.name} ({priority.name.lower()})")
+            raise RateLimitExceededError(f"Azure OpenAI ({self.name})")
+
+        wait = time.monotonic() - start_time
+        stats = self.stats[priority]
+        stats.dispatched += 1
+        stats.total_wait_ms += wait * 1000
+        stats.max_wait_ms = max(stats.max_wait_ms, wait * 1000)
+        if priority == RequestPriority.INTERACTIVE:
+            self._record_interactive(wait)
+
+        try:
+            yield
+        finally:
+            self._release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth and wait time per priority class"""
+        return {
+            "in_flight": self.in_flight,
+            "capacity": self.capacity(),
+            "under_pressure": self.under_pressure,
+            "interactive_wait_ms": round((self.interactive_wait or 0.0) * 1000, 2),
+            "classes": {
+                priority.name.lower(): {
+                    "queued": sum(1 for r in self._queues[priority] if not r.future.done()),
+                    "dispatched": stats.dispatched,
+                    "timeouts": stats.timeouts,
+                    "preemptions": stats.preemptions,
+                    "average_wait_ms": round(stats.total_wait_ms / max(stats.dispatched, 1), 2),
+                    "max_wait_ms": round(stats.max_wait_ms, 2)
+                }
+                for priority, stats in self.stats.items()
+            }
+        }
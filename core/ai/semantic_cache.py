@@ -0,0 +1,238 @@
+"""
+Semantic Response Cache
+Embedding-similarity lookup of previous answers for near-duplicate user questions
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Iterable
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+from core.config import business_config
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class SemanticCacheEntry:
+    """Cached answer with the question it was produced for"""
+    question: str
+    response: Dict[str, Any]
+    latency_ms: float
+    expires_at: float
+    hits: int = 0
+
+
+@dataclass
+class SemanticCacheStats:
+    """Semantic cache counters"""
+    lookups: int = 0
+    hits: int = 0
+    misses: int = 0
+    skipped: int = 0
+    stores: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    lookup_time_ms: float = 0.0
+    latency_saved_ms: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+
+@dataclass
+class _Partition:
+    """Vector index for one (deployment, conversation state) pair, bounded by max_entries"""
+    vectors: Any = None
+    entries: List[SemanticCacheEntry] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @property
+    def matrix(self):
+        return self.vectors[:len(self.entries)]
+
+    def append(self, vector, entry: SemanticCacheEntry):
+        """Append a row, growing the preallocated matrix geometrically"""
+        size = len(self.entries)
+        if self.vectors is None:
+            self.vectors = np.empty((16, vector.shape[0]), dtype=np.float32)
+        elif size == self.vectors.shape[0]:
+            grown = np.empty((size * 2, self.vectors.shape[1]), dtype=np.float32)
+            grown[:size] = self.vectors
+            self.vectors = grown
+
+        self.vectors[size] = vector
+        self.entries.append(entry)
+
+    def compact(self, keep: List[int]):
+        """Keep only the given rows, preserving insertion order"""
+        if keep:
+            self.vectors[:len(keep)] = self.vectors[keep]
+        self.entries = [self.entries[i] for i in keep]
+
+
+class SemanticCache:
+    """Local vector index of answered questions"""
+
+    def __init__(self, max_entries: int = 5000, ttl_seconds: int = 3600,
+                 similarity_threshold: float = 0.8, allowed_states: Iterable[str] = (),
+                 enabled: bool = True):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.allowed_states = self._validate_states(allowed_states)
+        self.enabled = enabled and NUMPY_AVAILABLE
+        self.stats = SemanticCacheStats()
+        self._partitions: Dict[str, _Partition] = {}
+
+        if enabled and not NUMPY_AVAILABLE:
+            logger.warning("numpy not available - semantic cache disabled")
+
+    @staticmethod
+    def _validate_states(states: Iterable[str]) -> set:
+        """Keep only states defined in the conversation flow"""
+        known_states = business_config.CONVERSATION_STATES
+        valid = set()
+        for state in states:
+            if state in known_states:
+                valid.add(state)
+            else:
+                logger.warning(f"Ignoring unknown conversation state in semantic cache allowlist: {state}")
+        return valid
+
+    def is_allowed(self, conversation_state: Optional[str]) -> bool:
+        """Check whether a conversation state may use the cache
+
+        Only calls that name a state outside the allowlist count as skipped;
+        calls without a state never take part in semantic caching.
+        """
+        if not self.enabled or conversation_state is None:
+            return False
+        allowed = conversation_state in self.allowed_states
+        if not allowed:
+            self.stats.skipped += 1
+        return allowed
+
+    @staticmethod
+    def get_question(messages: List[Dict]) -> Optional[str]:
+        """Extract the text of the last user turn"""
+        for message in reversed(messages):
+            if message.get("role") != "user":
+                continue
+
+            content = message.get("content")
+            if isinstance(content, str):
+                return content.strip() or None
+            return None
+        return None
+
+    @staticmethod
+    def _normalize(embedding: List[float]):
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _purge_expired(self, partition: _Partition, now: float):
+        """Drop expired entries from a partition"""
+        # Entries share one TTL and are kept in insertion order, so the oldest expires first
+        if not partition.entries or partition.entries[0].expires_at > now:
+            return
+
+        keep = [i for i, entry in enumerate(partition.entries) if entry.expires_at > now]
+        self.stats.expirations += len(partition.entries) - len(keep)
+        partition.compact(keep)
+
+    def lookup(self, deployment: str, conversation_state: str, embedding: List[float],
+               overhead_ms: float = 0.0) -> Optional[Dict[str, Any]]:
+        """Find the closest cached answer above the similarity threshold"""
+        start_time = time.perf_counter()
+        self.stats.lookups += 1
+
+        partition = self._partitions.get(f"{deployment}:{conversation_state}")
+        if partition is not None:
+            self._purge_expired(partition, time.time())
+
+        if partition is None or not len(partition):
+            self.stats.misses += 1
+            self.stats.lookup_time_ms += (time.perf_counter() - start_time) * 1000
+            return None
+
+        similarities = partition.matrix @ self._normalize(embedding)
+        best = int(np.argmax(similarities))
+        similarity = float(similarities[best])
+
+        lookup_ms = (time.perf_counter() - start_time) * 1000
+        self.stats.lookup_time_ms += lookup_ms
+
+        if similarity < self.similarity_threshold:
+            self.stats.misses += 1
+            return None
+
+        entry = partition.entries[best]
+        entry.hits += 1
+        self.stats.hits += 1
+        self.stats.latency_saved_ms += max(entry.latency_ms - lookup_ms - overhead_ms, 0.0)
+
+        return {
+            **entry.response,
+            "similarity": round(similarity, 4),
+            "matched_question": entry.question
+        }
+
+    def store(self, deployment: str, conversation_state: str, question: str,
+              embedding: List[float], response: Dict[str, Any], latency_ms: float):
+        """Add an answered question to the index"""
+        key = f"{deployment}:{conversation_state}"
+        partition = self._partitions.setdefault(key, _Partition())
+        now = time.time()
+
+        self._purge_expired(partition, now)
+
+        # Evict the least used entries when full
+        if len(partition) >= self.max_entries:
+            overflow = len(partition) - self.max_entries + 1
+            ranked = sorted(range(len(partition)), key=lambda i: partition.entries[i].hits)
+            drop = set(ranked[:overflow])
+            partition.compact([i for i in range(len(partition)) if i not in drop])
+            self.stats.evictions += overflow
+
+        partition.append(self._normalize(embedding), SemanticCacheEntry(
+            question=question,
+            response=response,
+            latency_ms=latency_ms,
+            expires_at=now + self.ttl_seconds
+        ))
+        self.stats.stores += 1
+
+    def clear(self):
+        """Remove all cached answers"""
+        self._partitions.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit rate and latency saved"""
+        stats = self.stats
+        return {
+            "enabled": self.enabled,
+            "allowed_states": sorted(self.allowed_states),
+            "similarity_threshold": self.similarity_threshold,
+            "entries": sum(len(partition) for partition in self._partitions.values()),
+            "lookups": stats.lookups,
+            "hits": stats.hits,
+            "misses": stats.misses,
+            "skipped": stats.skipped,
+            "stores": stats.stores,
+            "evictions": stats.evictions,
+            "expirations": stats.expirations,
+            "hit_rate": round(stats.hit_rate * 100, 2),
+            "average_lookup_ms": round(stats.lookup_time_ms / max(stats.lookups, 1), 3),
+            "latency_saved_ms": round(stats.latency_saved_ms, 2)
+        }
@@ -0,0 +1,36 @@
+"""
+Streaming Metrics
+Time-to-first-token and inter-token latency for streamed completions
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class StreamTiming:
+    """Chunk timestamps of one stream, from perf_counter"""
+    started_at: float
+    first_chunk_at: Optional[float] = None
+    last_chunk_at: Optional[float] = None
+    chunks: int = 0
+
+    def on_chunk(self, now: float):
+        if self.first_chunk_at is None:
+            self.first_chunk_at = now
+        self.last_chunk_at = now
+        self.chunks += 1
+
+    @property
+    def time_to_first_token(self) -> Optional[float]:
+        if self.first_chunk_at is None:
+            return None
+        return self.first_chunk_at - self.started_at
+
+    @property
+    def inter_token_latency(self) -> Optional[float]:
+        """Mean gap between content chunks"""
+        if self.chunks < 2:
+            return None
+        return (self.last_chunk_at - self.first_chunk_at) / (self.chunks - 1)
+
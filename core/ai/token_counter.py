@@ -0,0 +1,164 @@
+"""
+Token Counter
+Cached tiktoken counts for texts, messages and running conversation totals
+"""
+
+import hashlib
+import json
+import math
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+# Image inputs are billed by tile: 85 tokens at low detail, and 85 plus 170 per
+# 512px tile otherwise. Without the image size, assume a 1024x1024 picture.
+IMAGE_TOKENS_LOW_DETAIL = 85
+IMAGE_TOKENS_DEFAULT = 765
+
+
+def _digest(data: str) -> bytes:
+    return hashlib.blake2b(data.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+def message_digest(message: Dict[str, Any]) -> bytes:
+    """Content hash identifying a message"""
+    content = message.get("content")
+    if not isinstance(content, str):
+        content = json.dumps(content, sort_keys=True, default=str)
+    return _digest(f"{message.get('role', '')}\x00{content}")
+
+
+@dataclass
+class SessionTokens:
+    """Running token total of the messages already counted for a session"""
+    message_count: int = 0
+    total_tokens: int = 0
+    first_digest: Optional[bytes] = None
+    last_digest: Optional[bytes] = None
+
+
+class TokenCounter:
+    """Counts tokens, encoding each distinct text only once
+
+    Text counts are kept in an LRU keyed by content hash. Conversations that
+    grow by appending can be counted per session, which only tokenizes the
+    messages added since the previous call.
+    """
+
+    def __init__(self, encoding=None, max_entries: int = 10000, max_sessions: int = 10000):
+        self.encoding = encoding
+        self.max_entries = max_entries
+        self.max_sessions = max_sessions
+
+        self._counts: "OrderedDict[bytes, int]" = OrderedDict()
+        self._sessions: "OrderedDict[str, SessionTokens]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "session_hits": 0, "session_resets": 0}
+
+    def count(self, text: str) -> int:
+        """Count tokens in text"""
+        if not text:
+            return 0
+
+        key = _digest(text)
+        tokens = self._counts.get(key)
+        if tokens is not None:
+            self._counts.move_to_end(key)
+            self.stats["hits"] += 1
+            return tokens
+
+        self.stats["misses"] += 1
+        tokens = self._encode(text)
+        self._counts[key] = tokens
+        if len(self._counts) > self.max_entries:
+            self._counts.popitem(last=False)
+        return tokens
+
+    def _encode(self, text: str) -> int:
+        if self.encoding is not None:
+            try:
+                return len(self.encoding.encode(text))
+            except Exception as e:
+                logger.debug(f"Token encoding failed, estimating: {e}")
+        # Fallback estimation
+        return math.ceil(len(text.split()) * 1.3)
+
+    def count_content(self, content: Any) -> int:
+        """Count tokens in message content, plain or multimodal"""
+        if isinstance(content, str):
+            return self.count(content)
+        if not isinstance(content, list):
+            return 0
+
+        total_tokens = 0
+        for item in content:
+            if not isinstance(item, dict):
+                continue
+            if item.get("type") == "text":
+                total_tokens += self.count(item.get("text", ""))
+            elif item.get("type") == "image_url":
+                image = item.get("image_url")
+                detail = image.get("detail") if isinstance(image, dict) else None
+                total_tokens += IMAGE_TOKENS_LOW_DETAIL if detail == "low" else IMAGE_TOKENS_DEFAULT
+        return total_tokens
+
+    def count_messages(self, messages: List[Dict[str, Any]]) -> int:
+        """Count tokens across a list of messages"""
+        return sum(self.count_content(message.get("content")) for message in messages)
+
+    def count_session(self, session_id: str, messages: List[Dict[str, Any]]) -> int:
+        """Count a session's messages, tokenizing only those added since the last call
+
+        The previous total is reused when the first message and the last one
+        counted before are still in place; histories are assumed to be
+        append-only, anything else recounts the session.
+        """
+        session = self._sessions.get(session_id)
+        if session is not None and self._extends(session, messages):
+            self._sessions.move_to_end(session_id)
+            self.stats["session_hits"] += 1
+            new_messages = messages[session.message_count:]
+            session.total_tokens += self.count_messages(new_messages)
+        else:
+            if session is not None:
+                self.stats["session_resets"] += 1
+            session = SessionTokens(total_tokens=self.count_messages(messages))
+            self._sessions[session_id] = session
+            if len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+        session.message_count = len(messages)
+        if messages:
+            if session.first_digest is None:
+                session.first_digest = message_digest(messages[0])
+            session.last_digest = message_digest(messages[-1])
+        return session.total_tokens
+
+    @staticmethod
+    def _extends(session: SessionTokens, messages: List[Dict[str, Any]]) -> bool:
+        if session.message_count == 0:
+            return True
+        if len(messages) < session.message_count:
+            return False
+        return (
+            message_digest(messages[0]) == session.first_digest
+            and message_digest(messages[session.message_count - 1]) == session.last_digest
+        )
+
+    def forget_session(self, session_id: str):
+        """Drop a session's running total"""
+        self._sessions.pop(session_id, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache occupancy and hit counters"""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "entries": len(self._counts),
+            "sessions": len(self._sessions),
+            "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0
+        }
@@ -0,0 +1,305 @@
+"""
+Traffic Capture
+Sanitized JSONL recording of chat and embedding calls for offline replay
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Set
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+FORMAT_VERSION = 1
+
+PSEUDO_WORDS = (
+    "alfa bravo charlie delta eco foxtrot golf hotel india julieta kilo lima "
+    "mike noviembre oscar papa quebec romeo sierra tango uniforme victor whisky "
+    "xray yankee zulu"
+).split()
+
+
+def pseudonymize(text: str) -> str:
+    """Stand-in text with the same word count, derived from a hash of the original
+
+    Identical inputs map to identical stand-ins, so cache hits and request
+    coalescing behave the same on replay without keeping any user text.
+    """
+    if not text:
+        return text
+    seed = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+    rng = random.Random(seed)
+    return " ".join(rng.choice(PSEUDO_WORDS) for _ in range(len(text.split()) or 1))
+
+
+def pseudonymous_id(value: Optional[str]) -> Optional[str]:
+    """Stable short digest of a session or tenant identifier"""
+    if value is None:
+        return None
+    return hashlib.blake2b(value.encode("utf-8"), digest_size=6).hexdigest()
+
+
+class TrafficRecorder:
+    """Appends one JSON line per sampled call to a capture file
+
+    Records hold the call's arguments, outcome, start time and latency. With
+    redact on (the default) message and completion text is pseudonymized and
+    identifiers are hashed; token counts are kept so replays load the
+    backend like the original traffic. Lines are buffered and appended under
+    an advisory lock, so several workers can share one file; on the event
+    loop the append runs in a worker thread.
+    """
+
+    def __init__(self, path: str, sample_rate: float = 1.0, redact: bool = True,
+                 flush_every: int = 50, enabled: bool = True):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.redact = redact
+        self.flush_every = flush_every
+        self.enabled = enabled
+
+        self._buffer: List[str] = []
+        self._pending: Set[asyncio.Future] = set()
+        self.stats = {"recorded": 0, "skipped": 0, "flushes": 0, "write_errors": 0}
+
+    def sample(self) -> bool:
+        """Whether to capture the next call"""
+        if not self.enabled:
+            return False
+        if self.sample_rate >= 1 or random.random() < self.sample_rate:
+            return True
+        self.stats["skipped"] += 1
+        return False
+
+    def _text(self, text: Optional[str]) -> Optional[str]:
+        if text is None or not self.redact:
+            return text
+        return pseudonymize(text)
+
+    def _id(self, value: Optional[str]) -> Optional[str]:
+        return pseudonymous_id(value) if self.redact else value
+
+    def _content(self, content: Any) -> Any:
+        """Message content, including multimodal parts"""
+        if isinstance(content, str) or content is None:
+            return self._text(content)
+        parts = []
+        for part in content:
+            if part.get("type") == "text":
+                parts.append({**part, "text": self._text(part.get("text"))})
+            elif part.get("type") == "image_url" and self.redact:
+                detail = (part.get("image_url") or {}).get("detail", "auto")
+                parts.append({"type": "image_url", "image_url": {"url": "redacted", "detail": detail}})
+            else:
+                parts.append(part)
+        return parts
+
+    def _message(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """A chat message; redacted ones are rebuilt from an allow-list of keys
+
+        Function names come from our own tool schemas and are kept so replays
+        stay well-formed; arguments, participant names and anything else a
+        message may carry are not copied.
+        """
+        if not self.redact:
+            return {**message, "content": self._content(message.get("content"))}
+
+        redacted = {"role": message.get("role"), "content": self._content(message.get("content"))}
+        if message.get("tool_calls"):
+            redacted["tool_calls"] = [
+                {
+                    "id": self._id(call.get("id")),
+                    "type": call.get("type", "function"),
+                    "function": {
+                        "name": (call.get("function") or {}).get("name"),
+                        "arguments": self._text((call.get("function") or {}).get("arguments"))
+                    }
+                }
+                for call in message["tool_calls"]
+            ]
+        if message.get("function_call"):
+            redacted["function_call"] = {
+                "name": message["function_call"].get("name"),
+                "arguments": self._text(message["function_call"].get("arguments"))
+            }
+        if message.get("tool_call_id"):
+            redacted["tool_call_id"] = self._id(message["tool_call_id"])
+        return redacted
+
+    def record_chat(self, request: Dict[str, Any], started_at: float, latency: float,
+                    result: Optional[Dict[str, Any]] = None, error: Optional[BaseException] = None,
+                    stream: Optional[Dict[str, Any]] = None):
+        """Capture a chat_completion call; stream holds the consumed stream's totals"""
+        model_type = request.get("model_type")
+        priority = request.get("priority")
+        record = {
+            "kind": "chat",
+            "started_at": round(started_at, 6),
+            "latency_ms": round(latency * 1000, 3),
+            "request": {
+                "messages": [self._message(message) for message in request["messages"]],
+                "model_type": getattr(model_type, "value", model_type),
+                "temperature": request.get("temperature"),
+                "max_tokens": request.get("max_tokens"),
+                "functions": request.get("functions"),
+                "stream": request.get("stream", False),
+                "use_cache": request.get("use_cache", True),
+                "conversation_state": request.get("conversation_state"),
+                "priority": getattr(priority, "name", priority),
+                "tenant_id": self._id(request.get("tenant_id")),
+                "hedge": request.get("hedge"),
+                "session_id": self._id(request.get("session_id"))
+            }
+        }
+
+        if error is not None:
+            record["error"] = type(error).__name__
+        elif stream is not None:
+            record["response"] = {**stream, "content": self._text(stream.get("content"))}
+        elif result is not None:
+            record["response"] = {
+                "content": self._text(result.get("content")),
+                "usage": result.get("usage"),
+                "model": result.get("model"),
+                "cached": result.get("cached", False),
+                "cache_type": result.get("cache_type"),
+                "coalesced": result.get("coalesced", False),
+                "fallback": result.get("fallback")
+            }
+        self._append(record)
+
+    def record_embeddings(self, request: Dict[str, Any], started_at: float, latency: float,
+                          result: Optional[List[List[float]]] = None,
+                          error: Optional[BaseException] = None):
+        """Capture a generate_embeddings call; vectors are not stored"""
+        texts = request["texts"]
+        if isinstance(texts, str):
+            texts = [texts]
+        priority = request.get("priority")
+        record = {
+            "kind": "embeddings",
+            "started_at": round(started_at, 6),
+            "latency_ms": round(latency * 1000, 3),
+            "request": {
+                "texts": [self._text(text) for text in texts],
+                "priority": getattr(priority, "name", priority),
+                "tenant_id": self._id(request.get("tenant_id"))
+            }
+        }
+        if error is not None:
+            record["error"] = type(error).__name__
+        elif result is not None:
+            record["response"] = {"count": len(result), "dimensions": len(result[0]) if result else 0}
+        self._append(record)
+
+    async def capture_stream(self, request: Dict[str, Any], stream: AsyncIterator[str],
+                             started_at: float, started: float) -> AsyncIterator[str]:
+        """Pass a chat stream through, recording it once it ends"""
+        pieces: List[str] = []
+        first_chunk: Optional[float] = None
+        error: Optional[BaseException] = None
+        try:
+            async for content in stream:
+                if first_chunk is None:
+                    first_chunk = time.perf_counter()
+                pieces.append(content)
+                yield content
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            summary = {
+                "content": "".join(pieces),
+                "chunks": len(pieces),
+                "ttft_ms": round((first_chunk - started) * 1000, 3) if first_chunk is not None else None,
+                "completed": error is None
+            }
+            self.record_chat(
+                request, started_at, time.perf_counter() - started,
+                error=error if isinstance(error, Exception) else None, stream=summary
+            )
+
+    def _append(self, record: Dict[str, Any]):
+        record["v"] = FORMAT_VERSION
+        self._buffer.append(json.dumps(record, ensure_ascii=False, default=str))
+        self.stats["recorded"] += 1
+        if len(self._buffer) >= self.flush_every:
+            self._flush_soon()
+
+    def _flush_soon(self):
+        """Write the buffer without blocking the event loop on the file lock"""
+        lines, self._buffer = self._buffer, []
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            self._write(lines)
+            return
+        task = asyncio.ensure_future(asyncio.to_thread(self._write, lines))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def flush(self):
+        """Append buffered records to the capture file and wait for pending writes"""
+        lines, self._buffer = self._buffer, []
+        if lines:
+            await asyncio.to_thread(self._write, lines)
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+
+    def _write(self, lines: List[str]):
+        """Append lines under the advisory lock; blocks, so runs in a worker thread from async code"""
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as handle:
+                if FCNTL_AVAILABLE:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+                try:
+                    handle.write("\n".join(lines) + "\n")
+                    handle.flush()
+                finally:
+                    if FCNTL_AVAILABLE:
+                        fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+            self.stats["flushes"] += 1
+        except OSError as e:
+            self.stats["write_errors"] += 1
+            logger.warning(f"Traffic capture write to {self.path} failed: {e}")
+
+    async def close(self):
+        await self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get capture settings and counters"""
+        return {
+            "enabled": self.enabled,
+            "path": self.path,
+            "sample_rate": self.sample_rate,
+            "redact": self.redact,
+            "buffered": len(self._buffer),
+            **self.stats
+        }
+
+
+def read_capture(path: str) -> Iterator[Dict[str, Any]]:
+    """Records of a capture file in file order, skipping unreadable lines"""
+    with open(path, encoding="utf-8") as handle:
+        for number, line in enumerate(handle, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"Skipping malformed capture line {number} in {path}")
@@ -0,0 +1,172 @@
+"""
+Cache Codec
+Binary serialization with optional compression for cache and session payloads
+"""
+
+import json
+from typing import Any, Dict, Union
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+try:
+    import lz4.frame
+    LZ4_AVAILABLE = True
+except ImportError:
+    LZ4_AVAILABLE = False
+
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Payload header: magic, header version, serializer id, compression id. Legacy
+# values are JSON text, which never starts with a NUL byte.
+MAGIC = b"\x00c"
+HEADER_VERSION = 1
+HEADER_SIZE = len(MAGIC) + 3
+
+SERIALIZERS = {"json": 1, "msgpack": 2}
+COMPRESSIONS = {"none": 0, "zstd": 1, "lz4": 2}
+
+
+class CodecError(ValueError):
+    """Payload that cannot be decoded by this worker"""
+
+
+class CacheCodec:
+    """Encodes cache values to bytes and decodes any format it has written
+
+    The "legacy" serializer writes bare JSON without a header, which is what
+    workers without a codec read; "json" and "msgpack" write a versioned
+    header and may compress bodies of at least compression_min_bytes. Reads
+    accept every format whatever the write setting, so a rollout first ships
+    the reader with "legacy" writes and then switches the serializer. JSON is
+    produced by orjson when it is installed.
+    """
+
+    def __init__(self, serializer: str = "legacy", compression: str = "none",
+                 compression_min_bytes: int = 1024, compression_level: int = 3):
+        if serializer == "msgpack" and not MSGPACK_AVAILABLE:
+            logger.warning("msgpack not available - cache codec falls back to json")
+            serializer = "json"
+        if (compression == "zstd" and not ZSTD_AVAILABLE) or (compression == "lz4" and not LZ4_AVAILABLE):
+            logger.warning(f"{compression} not available - cache values are stored uncompressed")
+            compression = "none"
+        if serializer == "legacy" and compression != "none":
+            logger.warning("Legacy cache format has no header - compression disabled")
+            compression = "none"
+
+        self.serializer = serializer
+        self.compression = compression
+        self.compression_min_bytes = compression_min_bytes
+
+        self._zstd_compressor = zstandard.ZstdCompressor(level=compression_level) if compression == "zstd" else None
+        self._zstd_decompressor = zstandard.ZstdDecompressor() if ZSTD_AVAILABLE else None
+        self._compression_level = compression_level
+
+        self.stats = {"encoded": 0, "decoded": 0, "legacy_decoded": 0, "compressed": 0,
+                      "bytes_before_compression": 0, "bytes_after_compression": 0}
+
+    def encode(self, data: Any) -> bytes:
+        """Serialize data; raises TypeError for values the serializer cannot represent"""
+        self.stats["encoded"] += 1
+        if self.serializer == "legacy":
+            return self._dump_json(data)
+
+        body = self._dump_json(data) if self.serializer == "json" else msgpack.packb(data, use_bin_type=True)
+        compression = "none"
+        if self.compression != "none" and len(body) >= self.compression_min_bytes:
+            compressed = self._compress(body)
+            # Incompressible bodies are kept as they are
+            if len(compressed) < len(body):
+                self.stats["compressed"] += 1
+                self.stats["bytes_before_compression"] += len(body)
+                self.stats["bytes_after_compression"] += len(compressed)
+                body, compression = compressed, self.compression
+
+        header = MAGIC + bytes((HEADER_VERSION, SERIALIZERS[self.serializer], COMPRESSIONS[compression]))
+        return header + body
+
+    def decode(self, payload: Union[bytes, str]) -> Any:
+        """Deserialize a headered or legacy JSON payload"""
+        if isinstance(payload, str):
+            payload = payload.encode("utf-8")
+        self.stats["decoded"] += 1
+
+        if not payload.startswith(MAGIC):
+            self.stats["legacy_decoded"] += 1
+            return self._load_json(payload)
+        if len(payload) < HEADER_SIZE:
+            raise CodecError("Truncated cache payload header")
+
+        version, serializer, compression = payload[len(MAGIC):HEADER_SIZE]
+        if version != HEADER_VERSION:
+            raise CodecError(f"Unsupported cache payload version {version}")
+        body = self._decompress(payload[HEADER_SIZE:], compression)
+
+        if serializer == SERIALIZERS["json"]:
+            return self._load_json(body)
+        if serializer == SERIALIZERS["msgpack"]:
+            if not MSGPACK_AVAILABLE:
+                raise CodecError("Cache payload is msgpack but msgpack is not installed")
+            return msgpack.unpackb(body, raw=False)
+        raise CodecError(f"Unknown cache serializer id {serializer}")
+
+    @staticmethod
+    def _dump_json(data: Any) -> bytes:
+        if ORJSON_AVAILABLE:
+            try:
+                return orjson.dumps(data)
+            except TypeError:
+                # orjson rejects some values json accepts, such as non-string keys
+                pass
+        return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+    @staticmethod
+    def _load_json(body: bytes) -> Any:
+        try:
+            return orjson.loads(body) if ORJSON_AVAILABLE else json.loads(body)
+        except ValueError as e:
+            raise CodecError(f"Invalid JSON cache payload: {e}")
+
+    def _compress(self, body: bytes) -> bytes:
+        if self.compression == "zstd":
+            return self._zstd_compressor.compress(body)
+        return lz4.frame.compress(body, compression_level=self._compression_level)
+
+    def _decompress(self, body: bytes, compression: int) -> bytes:
+        if compression == COMPRESSIONS["none"]:
+            return body
+        if compression == COMPRESSIONS["zstd"]:
+            if self._zstd_decompressor is None:
+                raise CodecError("Cache payload is zstd-compressed but zstandard is not installed")
+            return self._zstd_decompressor.decompress(body)
+        if compression == COMPRESSIONS["lz4"]:
+            if not LZ4_AVAILABLE:
+                raise CodecError("Cache payload is lz4-compressed but lz4 is not installed")
+            return lz4.frame.decompress(body)
+        raise CodecError(f"Unknown cache compression id {compression}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get codec settings and counters"""
+        return {
+            "serializer": self.serializer,
+            "compression": self.compression,
+            "compression_min_bytes": self.compression_min_bytes,
+            **self.stats
+        }
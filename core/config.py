@@ -34,6 +34,8 @@ class Settings(PydanticBaseSettings):
     AZURE_OPENAI_ENDPOINT: str = Field(env="AZURE_OPENAI_ENDPOINT")
     AZURE_OPENAI_API_KEY: str = Field(env="AZURE_OPENAI_API_KEY")
     AZURE_OPENAI_VERSION: str = Field(default="2024-10-21", env="AZURE_OPENAI_VERSION")
+    AZURE_OPENAI_TIMEOUT_SECONDS: float = Field(default=30.0, env="AZURE_OPENAI_TIMEOUT_SECONDS")
+    AZURE_OPENAI_MAX_RETRIES: int = Field(default=3, env="AZURE_OPENAI_MAX_RETRIES")
     
     # Model Deployments
     AZURE_CHAT_DEPLOYMENT: str = Field(default="gpt-4o-mini", env="AZURE_CHAT_DEPLOYMENT")
@@ -43,6 +45,25 @@ class Settings(PydanticBaseSettings):
     AZURE_FAST_REASONING_DEPLOYMENT: str = Field(default="o3-mini", env="AZURE_FAST_REASONING_DEPLOYMENT")
     AZURE_EMBEDDINGS_DEPLOYMENT: str = Field(default="text-embedding-3-small", env="AZURE_EMBEDDINGS_DEPLOYMENT")
     
+    # Deployment Pools
+    # JSON mapping model type to [{"endpoint", "deployment", "weight", "api_key"}],
+    # e.g. {"chat": [{"endpoint": "https://eastus...", "weight": 2}, {"endpoint": "https://westus..."}]}
+    AZURE_OPENAI_BACKENDS: Dict[str, List[Dict[str, Any]]] = Field(default={}, env="AZURE_OPENAI_BACKENDS")
+    MODEL_LOAD_BALANCING_STRATEGY: str = Field(default="least_outstanding", env="MODEL_LOAD_BALANCING_STRATEGY")
+    MODEL_BACKEND_MAX_ATTEMPTS: int = Field(default=2, env="MODEL_BACKEND_MAX_ATTEMPTS")
+    
+    # Circuit Breakers (per deployment)
+    CIRCUIT_BREAKER_FAILURE_RATE: float = Field(default=0.5, env="CIRCUIT_BREAKER_FAILURE_RATE")
+    CIRCUIT_BREAKER_SLOW_CALL_RATE: float = Field(default=0.8, env="CIRCUIT_BREAKER_SLOW_CALL_RATE")
+    # For models without their own ModelConfig.slow_call_seconds; streams are timed to the first chunk
+    CIRCUIT_BREAKER_SLOW_CALL_SECONDS: float = Field(default=15.0, env="CIRCUIT_BREAKER_SLOW_CALL_SECONDS")
+    CIRCUIT_BREAKER_MIN_CALLS: int = Field(default=10, env="CIRCUIT_BREAKER_MIN_CALLS")
+    CIRCUIT_BREAKER_CONSECUTIVE_FAILURES: int = Field(default=5, env="CIRCUIT_BREAKER_CONSECUTIVE_FAILURES")
+    CIRCUIT_BREAKER_OPEN_SECONDS: float = Field(default=30.0, env="CIRCUIT_BREAKER_OPEN_SECONDS")
+    CIRCUIT_BREAKER_HALF_OPEN_PROBES: int = Field(default=1, env="CIRCUIT_BREAKER_HALF_OPEN_PROBES")
+    # Tried in order once a chat completion fails: "model", "cache", "handler"
+    MODEL_FALLBACK_CHAIN: List[str] = Field(default=["model", "cache", "handler"], env="MODEL_FALLBACK_CHAIN")
+    
     # =============================================================================
     # VECTOR DATABASE
     # =============================================================================
@@ -131,11 +152,41 @@ class Settings(PydanticBaseSettings):
     
     # Model Selection Strategy
     MODEL_SELECTION_STRATEGY: str = Field(default="cost_optimized", env="MODEL_SELECTION_STRATEGY")
+    # Compared with the full-completion latency quantile below, so set well above RESPONSE_TIME_THRESHOLD
+    MODEL_ROUTER_LATENCY_SLO_SECONDS: float = Field(default=10.0, env="MODEL_ROUTER_LATENCY_SLO_SECONDS")
+    MODEL_ROUTER_LATENCY_QUANTILE: float = Field(default=0.9, env="MODEL_ROUTER_LATENCY_QUANTILE")
+    MODEL_ROUTER_MAX_ERROR_RATE: float = Field(default=0.2, env="MODEL_ROUTER_MAX_ERROR_RATE")
+    MODEL_ROUTER_WINDOW_SECONDS: float = Field(default=300.0, env="MODEL_ROUTER_WINDOW_SECONDS")
     
     # Performance Thresholds
     RESPONSE_TIME_THRESHOLD: float = Field(default=2.0, env="RESPONSE_TIME_THRESHOLD")
     CONFIDENCE_THRESHOLD: float = Field(default=0.7, env="CONFIDENCE_THRESHOLD")
     
+    # Metrics
+    METRICS_HISTOGRAM_ACCURACY: float = Field(default=0.01, env="METRICS_HISTOGRAM_ACCURACY")
+    
+    # Hedged Chat Completions
+    CHAT_HEDGING_ENABLED: bool = Field(default=False, env="CHAT_HEDGING_ENABLED")
+    CHAT_HEDGING_QUANTILE: float = Field(default=0.95, env="CHAT_HEDGING_QUANTILE")
+    CHAT_HEDGING_BUDGET: float = Field(default=0.05, env="CHAT_HEDGING_BUDGET")
+    CHAT_HEDGING_MIN_SAMPLES: int = Field(default=20, env="CHAT_HEDGING_MIN_SAMPLES")
+    
+    # Model Rate Limiting
+    MODEL_RATE_LIMITER_ENABLED: bool = Field(default=True, env="MODEL_RATE_LIMITER_ENABLED")
+    MODEL_QUEUE_TIMEOUT_SECONDS: float = Field(default=30.0, env="MODEL_QUEUE_TIMEOUT_SECONDS")
+    MODEL_SCHEDULER_ENABLED: bool = Field(default=True, env="MODEL_SCHEDULER_ENABLED")
+    MODEL_SCHEDULER_TENANT_WEIGHTS: Dict[str, float] = Field(default={}, env="MODEL_SCHEDULER_TENANT_WEIGHTS")
+    
+    # Token Counting
+    TOKEN_COUNT_CACHE_SIZE: int = Field(default=10000, env="TOKEN_COUNT_CACHE_SIZE")
+    TOKEN_COUNT_MAX_SESSIONS: int = Field(default=10000, env="TOKEN_COUNT_MAX_SESSIONS")
+    
+    # Conversation Context
+    CONTEXT_MAX_HISTORY_TOKENS: int = Field(default=3000, env="CONTEXT_MAX_HISTORY_TOKENS")
+    CONTEXT_SUMMARY_MIN_MESSAGES: int = Field(default=4, env="CONTEXT_SUMMARY_MIN_MESSAGES")
+    CONTEXT_SUMMARY_MAX_TOKENS: int = Field(default=300, env="CONTEXT_SUMMARY_MAX_TOKENS")
+    CONTEXT_SUMMARY_MODEL: str = Field(default="chat", env="CONTEXT_SUMMARY_MODEL")
+    
     # Conversation Memory
     MAX_CONVERSATION_HISTORY: int = Field(default=20, env="MAX_CONVERSATION_HISTORY")
     CONVERSATION_TIMEOUT_MINUTES: int = Field(default=30, env="CONVERSATION_TIMEOUT_MINUTES")
@@ -146,11 +197,51 @@ class Settings(PydanticBaseSettings):
     
     # Cache Configuration
     CACHE_TTL_SECONDS: int = Field(default=3600, env="CACHE_TTL_SECONDS")
+    CACHE_LEASE_SECONDS: float = Field(default=10.0, env="CACHE_LEASE_SECONDS")
+    CACHE_EARLY_REFRESH_BETA: float = Field(default=1.0, env="CACHE_EARLY_REFRESH_BETA")
+    CACHE_SERIALIZER: str = Field(default="legacy", env="CACHE_SERIALIZER")
+    CACHE_COMPRESSION: str = Field(default="none", env="CACHE_COMPRESSION")
+    CACHE_COMPRESSION_MIN_BYTES: int = Field(default=1024, env="CACHE_COMPRESSION_MIN_BYTES")
+    REDIS_SCAN_COUNT: int = Field(default=500, env="REDIS_SCAN_COUNT")
+    SESSION_CLEANUP_MAX_KEYS_PER_RUN: int = Field(default=10000, env="SESSION_CLEANUP_MAX_KEYS_PER_RUN")
+    SESSION_CLEANUP_KEYS_PER_SECOND: float = Field(default=2000.0, env="SESSION_CLEANUP_KEYS_PER_SECOND")
     EMBEDDING_CACHE_SIZE: int = Field(default=10000, env="EMBEDDING_CACHE_SIZE")
-    
-    @validator("ALLOWED_HOSTS", pre=True)
+    EMBEDDING_STORE_ENABLED: bool = Field(default=True, env="EMBEDDING_STORE_ENABLED")
+    EMBEDDING_STORE_PATH: str = Field(default="data/embedding_store", env="EMBEDDING_STORE_PATH")
+    EMBEDDING_STORE_DTYPE: str = Field(default="float16", env="EMBEDDING_STORE_DTYPE")
+    
+    # Near Cache (in-process tier in front of Redis, kept coherent over pub/sub)
+    NEAR_CACHE_ENABLED: bool = Field(default=True, env="NEAR_CACHE_ENABLED")
+    NEAR_CACHE_MAX_ENTRIES: int = Field(default=2000, env="NEAR_CACHE_MAX_ENTRIES")
+    NEAR_CACHE_TTL_SECONDS: float = Field(default=30.0, env="NEAR_CACHE_TTL_SECONDS")
+    NEAR_CACHE_INVALIDATION_CHANNEL: str = Field(default="cache:invalidate", env="NEAR_CACHE_INVALIDATION_CHANNEL")
+    
+    # Traffic Capture (sanitized request log for offline replay)
+    TRAFFIC_CAPTURE_ENABLED: bool = Field(default=False, env="TRAFFIC_CAPTURE_ENABLED")
+    TRAFFIC_CAPTURE_PATH: str = Field(default="data/traffic_capture.jsonl", env="TRAFFIC_CAPTURE_PATH")
+    TRAFFIC_CAPTURE_SAMPLE_RATE: float = Field(default=1.0, env="TRAFFIC_CAPTURE_SAMPLE_RATE")
+    TRAFFIC_CAPTURE_REDACT: bool = Field(default=True, env="TRAFFIC_CAPTURE_REDACT")
+    
+    # Embedding Batching
+    EMBEDDING_BATCH_ENABLED: bool = Field(default=True, env="EMBEDDING_BATCH_ENABLED")
+    EMBEDDING_BATCH_MAX_SIZE: int = Field(default=256, env="EMBEDDING_BATCH_MAX_SIZE")
+    EMBEDDING_BATCH_MAX_TOKENS: int = Field(default=8000, env="EMBEDDING_BATCH_MAX_TOKENS")
+    EMBEDDING_BATCH_MAX_WAIT_MS: float = Field(default=5.0, env="EMBEDDING_BATCH_MAX_WAIT_MS")
+    
+    # Response Cache
+    RESPONSE_CACHE_ENABLED: bool = Field(default=True, env="RESPONSE_CACHE_ENABLED")
+    RESPONSE_CACHE_MAX_ENTRIES: int = Field(default=1000, env="RESPONSE_CACHE_MAX_ENTRIES")
+    RESPONSE_CACHE_USE_REDIS: bool = Field(default=True, env="RESPONSE_CACHE_USE_REDIS")
+    
+    # Semantic Cache
+    SEMANTIC_CACHE_ENABLED: bool = Field(default=True, env="SEMANTIC_CACHE_ENABLED")
+    SEMANTIC_CACHE_MAX_ENTRIES: int = Field(default=5000, env="SEMANTIC_CACHE_MAX_ENTRIES")
+    SEMANTIC_CACHE_TTL_SECONDS: int = Field(default=3600, env="SEMANTIC_CACHE_TTL_SECONDS")
+    SEMANTIC_CACHE_STATES: List[str] = Field(default=["greeting", "discovery"], env="SEMANTIC_CACHE_STATES")
+    
+    @validator("ALLOWED_HOSTS", "SEMANTIC_CACHE_STATES", "MODEL_FALLBACK_CHAIN", pre=True)
     def parse_allowed_hosts(cls, v):
-        """Parse ALLOWED_HOSTS from string or list"""
+        """Parse comma-separated lists from string or list"""
         if isinstance(v, str):
             return [host.strip() for host in v.split(",")]
         return v
@@ -163,6 +254,88 @@ class Settings(PydanticBaseSettings):
             raise ValueError(f"Environment must be one of: {valid_environments}")
         return v
     
+    @validator("MODEL_SELECTION_STRATEGY")
+    def validate_model_selection_strategy(cls, v):
+        """Validate model selection strategy"""
+        valid_strategies = ["cost_optimized", "latency_optimized", "balanced", "static"]
+        if v not in valid_strategies:
+            raise ValueError(f"MODEL_SELECTION_STRATEGY must be one of: {valid_strategies}")
+        return v
+    
+    @validator("MODEL_LOAD_BALANCING_STRATEGY")
+    def validate_load_balancing_strategy(cls, v):
+        """Validate load balancing strategy"""
+        valid_strategies = ["least_outstanding", "power_of_two"]
+        if v not in valid_strategies:
+            raise ValueError(f"MODEL_LOAD_BALANCING_STRATEGY must be one of: {valid_strategies}")
+        return v
+    
+    @validator("CONTEXT_SUMMARY_MODEL")
+    def validate_context_summary_model(cls, v):
+        """Validate context summary model"""
+        valid_models = ["chat", "fast_reasoning", "reasoning"]
+        if v not in valid_models:
+            raise ValueError(f"CONTEXT_SUMMARY_MODEL must be one of: {valid_models}")
+        return v
+    
+    @validator("EMBEDDING_STORE_DTYPE")
+    def validate_embedding_store_dtype(cls, v):
+        """Validate embedding store dtype"""
+        if v not in ("float16", "float32"):
+            raise ValueError("EMBEDDING_STORE_DTYPE must be float16 or float32")
+        return v
+    
+    @validator("CACHE_LEASE_SECONDS")
+    def validate_cache_lease_seconds(cls, v):
+        """Validate cache lease duration"""
+        if v <= 0:
+            raise ValueError("CACHE_LEASE_SECONDS must be positive")
+        return v
+    
+    @validator("CACHE_EARLY_REFRESH_BETA")
+    def validate_cache_early_refresh_beta(cls, v):
+        """Validate early refresh factor"""
+        if v < 0:
+            raise ValueError("CACHE_EARLY_REFRESH_BETA must be zero or positive")
+        return v
+    
+    @validator("CACHE_SERIALIZER")
+    def validate_cache_serializer(cls, v):
+        """Validate cache serializer"""
+        valid_serializers = ["legacy", "json", "msgpack"]
+        if v not in valid_serializers:
+            raise ValueError(f"CACHE_SERIALIZER must be one of: {valid_serializers}")
+        return v
+    
+    @validator("CACHE_COMPRESSION")
+    def validate_cache_compression(cls, v):
+        """Validate cache compression"""
+        valid_compressions = ["none", "zstd", "lz4"]
+        if v not in valid_compressions:
+            raise ValueError(f"CACHE_COMPRESSION must be one of: {valid_compressions}")
+        return v
+    
+    @validator("REDIS_SCAN_COUNT")
+    def validate_redis_scan_count(cls, v):
+        """Validate SCAN batch size"""
+        if v < 1:
+            raise ValueError("REDIS_SCAN_COUNT must be at least 1")
+        return v
+    
+    @validator("SESSION_CLEANUP_MAX_KEYS_PER_RUN", "SESSION_CLEANUP_KEYS_PER_SECOND")
+    def validate_session_cleanup_limits(cls, v):
+        """Validate session cleanup limits (0 means unlimited)"""
+        if v < 0:
+            raise ValueError("Session cleanup limits must be zero or positive")
+        return v
+    
+    @validator("TRAFFIC_CAPTURE_SAMPLE_RATE")
+    def validate_traffic_capture_sample_rate(cls, v):
+        """Validate traffic capture sample rate"""
+        if not 0 <= v <= 1:
+            raise ValueError("TRAFFIC_CAPTURE_SAMPLE_RATE must be between 0 and 1")
+        return v
+    
     @property
     def is_production(self) -> bool:
         """Check if running in production"""
@@ -173,6 +346,13 @@ class Settings(PydanticBaseSettings):
         """Check if running in development"""
         return self.ENVIRONMENT == "development"
     
+    @property
+    def openai_max_retries(self) -> int:
+        """SDK retries; with the client-side limiter on, the limiter and the backend pool retry instead"""
+        if self.MODEL_RATE_LIMITER_ENABLED:
+            return 0
+        return self.AZURE_OPENAI_MAX_RETRIES
+    
     @property
     def database_config(self) -> Dict[str, Any]:
         """Get database configuration"""
@@ -188,10 +368,12 @@ class Settings(PydanticBaseSettings):
         """Get Redis configuration"""
         return {
             "url": self.REDIS_URL,
-            "decode_responses": True,
+            # Binary cache payloads must survive; matches the client init_db creates
+            "decode_responses": False,
             "socket_timeout": 5,
             "socket_connect_timeout": 5,
             "retry_on_timeout": True,
+            "health_check_interval": 30,
         }
     
     @property
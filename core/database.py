@@ -4,8 +4,15 @@ Advanced PostgreSQL setup with async support and connection pooling
 """
 
 import asyncio
+import fnmatch
+import inspect
+import math
+import random
+import time
+import uuid
+from collections import OrderedDict
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator, Optional
+from typing import Any, AsyncGenerator, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple, Union
 
 import asyncpg
 from sqlalchemy import create_engine, MetaData
@@ -14,8 +21,10 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.pool import NullPool
 import redis.asyncio as redis
 
+from core.ai.single_flight import SingleFlight
+from core.codec import CacheCodec
 from core.config import settings
-from core.logging import get_logger
+from core.logging import get_logger, performance_logger
 from core.exceptions import DatabaseConnectionError
 
 logger = get_logger(__name__)
@@ -67,7 +76,8 @@ async def init_db() -> None:
         # Initialize Redis
         redis_client = redis.from_url(
             settings.REDIS_URL,
-            decode_responses=True,
+            # Values are bytes so binary cache payloads survive; CacheManager decodes text
+            decode_responses=False,
             socket_timeout=5,
             socket_connect_timeout=5,
             retry_on_timeout=True,
@@ -166,7 +176,6 @@ class DatabaseManager:
         
         # PostgreSQL health check
         try:
-            import time
             start_time = time.time()
             async with get_db_session() as session:
                 await session.execute("SELECT 1")
@@ -187,7 +196,8 @@ class DatabaseManager:
                 await redis_conn.ping()
             health_status["redis"] = {
                 "status": "healthy",
-                "latency_ms": round((time.time() - start_time) * 1000, 2)
+                "latency_ms": round((time.time() - start_time) * 1000, 2),
+                "cache": cache_manager.get_stats()
             }
         except Exception as e:
             health_status["redis"] = {
@@ -213,38 +223,299 @@ class DatabaseManager:
             return {}
 
 
+def _raw(value: Any) -> bytes:
+    """Bytes as stored by Redis for a value passed to a write"""
+    if isinstance(value, bytes):
+        return value
+    return str(value).encode("utf-8")
+
+
+def _text(value: Union[str, bytes]) -> str:
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+# get_or_set entry format, stored through the codec alongside the recompute cost and expiry
+CACHE_ENTRY_VERSION = 1
+
+# Delete a lease only while it still holds our token, so an expired lease taken over by another worker survives
+RELEASE_LEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class NearCache:
+    """Bounded in-process LRU of Redis values with per-entry expiry
+
+    Entries live at most their TTL, which bounds staleness when an
+    invalidation message is lost. Values are the raw strings stored in
+    Redis, so callers never share mutable objects.
+    """
+    
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self.evictions = 0
+    
+    def get(self, key: str) -> Optional[bytes]:
+        """Get a value if present and not expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        
+        self._entries.move_to_end(key)
+        return value
+    
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        """Store a value for at most the near-cache TTL"""
+        ttl = min(ttl, self.ttl_seconds) if ttl else self.ttl_seconds
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def delete(self, key: str) -> bool:
+        return self._entries.pop(key, None) is not None
+    
+    def delete_pattern(self, pattern: str) -> int:
+        """Remove keys matching a Redis glob pattern"""
+        matched = [key for key in self._entries if fnmatch.fnmatchcase(key, pattern)]
+        for key in matched:
+            del self._entries[key]
+        return len(matched)
+    
+    def clear(self):
+        self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
 class CacheManager:
-    """Redis cache manager with advanced features"""
+    """Redis cache manager with advanced features
+    
+    Reads go through a near cache in each worker process. Writes update
+    Redis and publish the changed keys on an invalidation channel; every
+    worker subscribes to it and drops those keys from its near cache. The
+    near cache is bypassed while the subscription is down, so a worker
+    never serves values it cannot hear invalidations for.
+    """
+    
+    STATS_LOG_INTERVAL = 1000
+    LEASE_POLL_SECONDS = 0.05
     
     def __init__(self):
         self.logger = get_logger("cache")
         self.default_ttl = settings.CACHE_TTL_SECONDS
+        
+        self.near = NearCache(
+            max_entries=settings.NEAR_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.NEAR_CACHE_TTL_SECONDS
+        ) if settings.NEAR_CACHE_ENABLED else None
+        self.invalidation_channel = settings.NEAR_CACHE_INVALIDATION_CHANNEL
+        self.codec = CacheCodec(
+            serializer=settings.CACHE_SERIALIZER,
+            compression=settings.CACHE_COMPRESSION,
+            compression_min_bytes=settings.CACHE_COMPRESSION_MIN_BYTES
+        )
+        self.instance_id = uuid.uuid4().hex
+        
+        self._listener: Optional[asyncio.Task] = None
+        self._listening = False
+        # Keys being read from Redis; an invalidation during the read cancels the fill
+        self._fills: Dict[str, object] = {}
+        self.stats = {
+            "near_hits": 0, "redis_hits": 0, "misses": 0,
+            "invalidations_sent": 0, "invalidations_received": 0, "listener_errors": 0,
+            "fetches": 0, "early_refreshes": 0, "lease_waits": 0, "stale_served": 0
+        }
+        self.fetch_flights = SingleFlight("cache")
+    
+    @property
+    def near_active(self) -> bool:
+        """Whether the near cache is coherent and can be used"""
+        if self.near is None:
+            return False
+        self._ensure_listener()
+        return self._listening
+    
+    def _ensure_listener(self):
+        if self._listener is None or self._listener.done():
+            if redis_client is not None and hasattr(redis_client, "pubsub"):
+                self._listener = asyncio.create_task(self._listen_for_invalidations())
+    
+    async def _listen_for_invalidations(self):
+        """Apply other workers' invalidations, resubscribing after failures"""
+        backoff = 1.0
+        while True:
+            pubsub = redis_client.pubsub()
+            try:
+                await pubsub.subscribe(self.invalidation_channel)
+                # Anything cached before the subscription may have missed invalidations
+                self.near.clear()
+                self._listening = True
+                backoff = 1.0
+                
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message is not None:
+                        self._apply_invalidation(message["data"])
+            
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["listener_errors"] += 1
+                self.logger.warning(f"Cache invalidation listener failed, near cache bypassed: {e}")
+            finally:
+                self._listening = False
+                self.near.clear()
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+            
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+    
+    def _apply_invalidation(self, data: str):
+        import json
+        try:
+            message = json.loads(data)
+        except (TypeError, ValueError):
+            return
+        if message.get("origin") == self.instance_id:
+            return
+        
+        self.stats["invalidations_received"] += 1
+        for key in message.get("keys", []):
+            self.near.delete(key)
+            self._fills.pop(key, None)
+        for pattern in message.get("patterns", []):
+            self.near.delete_pattern(pattern)
+            self._fills.clear()
+    
+    def _invalidation_message(self, keys: Iterable[str] = (), patterns: Iterable[str] = ()) -> str:
+        import json
+        self.stats["invalidations_sent"] += 1
+        return json.dumps({"origin": self.instance_id, "keys": list(keys), "patterns": list(patterns)})
+    
+    def _count_lookup(self, tier: Optional[str]):
+        self.stats[f"{tier}_hits" if tier else "misses"] += 1
+        lookups = self.stats["near_hits"] + self.stats["redis_hits"] + self.stats["misses"]
+        if lookups % self.STATS_LOG_INTERVAL == 0:
+            performance_logger.log_cache_operation("redis", "get", lookups, self.get_hit_ratios())
+    
+    def get_hit_ratios(self) -> Dict[str, float]:
+        """Share of lookups answered by each tier that they reached"""
+        near_hits, redis_hits, misses = self.stats["near_hits"], self.stats["redis_hits"], self.stats["misses"]
+        lookups = near_hits + redis_hits + misses
+        return {
+            "near": near_hits / lookups if lookups else 0.0,
+            "redis": redis_hits / (redis_hits + misses) if redis_hits + misses else 0.0,
+            "overall": (near_hits + redis_hits) / lookups if lookups else 0.0
+        }
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-tier hit ratios, near cache size and invalidation counters"""
+        return {
+            "near_cache_enabled": self.near is not None,
+            "near_cache_active": self._listening,
+            "near_cache_entries": len(self.near) if self.near is not None else 0,
+            "near_cache_evictions": self.near.evictions if self.near is not None else 0,
+            "hit_ratios": {tier: round(ratio, 4) for tier, ratio in self.get_hit_ratios().items()},
+            "fetch_coalescing": self.fetch_flights.get_stats(),
+            "codec": self.codec.get_stats(),
+            **self.stats
+        }
     
-    async def get(self, key: str, default=None):
+    async def get(self, key: str, default=None, near_cache: bool = True):
         """Get value from cache"""
+        value = await self._get_raw(key, near_cache)
+        return _text(value) if value is not None else default
+    
+    async def _get_raw(self, key: str, near_cache: bool = True) -> Optional[bytes]:
+        """Stored bytes of a key, or None on a miss or error"""
+        fill = None
+        if near_cache and self.near_active:
+            value = self.near.get(key)
+            if value is not None:
+                self._count_lookup("near")
+                return value
+            fill = self._fills[key] = object()
+        
         try:
             async with get_redis() as redis_conn:
                 value = await redis_conn.get(key)
-                return value if value is not None else default
         except Exception as e:
             self.logger.error(f"Cache get failed for key {key}: {e}")
-            return default
+            return None
+        finally:
+            if fill is not None:
+                if self._fills.get(key) is fill:
+                    del self._fills[key]
+                else:
+                    fill = None
+        
+        self._count_lookup("redis" if value is not None else None)
+        if value is not None and fill is not None:
+            self.near.set(key, value)
+        return value
     
-    async def set(self, key: str, value: str, ttl: int = None) -> bool:
+    async def set(self, key: str, value: Union[str, bytes], ttl: int = None, near_cache: bool = True) -> bool:
         """Set value in cache with TTL"""
+        ttl = ttl or self.default_ttl
+        value = _raw(value)
+        fill = None
         try:
             async with get_redis() as redis_conn:
-                await redis_conn.setex(key, ttl or self.default_ttl, value)
-                return True
+                if self.near is None:
+                    await redis_conn.setex(key, ttl, value)
+                    return True
+                
+                # One round trip for the write and its invalidation
+                fill = self._fills[key] = object()
+                async with redis_conn.pipeline(transaction=False) as pipe:
+                    pipe.setex(key, ttl, value)
+                    pipe.publish(self.invalidation_channel, self._invalidation_message(keys=[key]))
+                    await pipe.execute()
+            
+            # Another worker's write during ours leaves the newest value unknown
+            if near_cache and self.near_active and self._fills.get(key) is fill:
+                self.near.set(key, value, ttl)
+            else:
+                self.near.delete(key)
+            return True
         except Exception as e:
+            if self.near is not None:
+                self.near.delete(key)
             self.logger.error(f"Cache set failed for key {key}: {e}")
             return False
+        finally:
+            if fill is not None and self._fills.get(key) is fill:
+                del self._fills[key]
     
     async def delete(self, key: str) -> bool:
         """Delete value from cache"""
+        self._forget_local([key])
         try:
             async with get_redis() as redis_conn:
-                result = await redis_conn.delete(key)
+                if self.near is None:
+                    result = await redis_conn.delete(key)
+                else:
+                    async with redis_conn.pipeline(transaction=False) as pipe:
+                        pipe.delete(key)
+                        pipe.publish(self.invalidation_channel, self._invalidation_message(keys=[key]))
+                        result, _ = await pipe.execute()
                 return bool(result)
         except Exception as e:
             self.logger.error(f"Cache delete failed for key {key}: {e}")
@@ -252,6 +523,8 @@ class CacheManager:
     
     async def exists(self, key: str) -> bool:
         """Check if key exists in cache"""
+        if self.near_active and self.near.get(key) is not None:
+            return True
         try:
             async with get_redis() as redis_conn:
                 result = await redis_conn.exists(key)
@@ -262,77 +535,430 @@ class CacheManager:
     
     async def increment(self, key: str, amount: int = 1) -> int:
         """Increment counter in cache"""
+        self._forget_local([key])
         try:
             async with get_redis() as redis_conn:
-                return await redis_conn.incr(key, amount)
+                if self.near is None:
+                    return await redis_conn.incr(key, amount)
+                async with redis_conn.pipeline(transaction=False) as pipe:
+                    pipe.incr(key, amount)
+                    pipe.publish(self.invalidation_channel, self._invalidation_message(keys=[key]))
+                    value, _ = await pipe.execute()
+                return value
         except Exception as e:
             self.logger.error(f"Cache increment failed for key {key}: {e}")
             return 0
     
-    async def set_json(self, key: str, data: dict, ttl: int = None) -> bool:
-        """Store JSON data in cache"""
-        import json
+    async def set_json(self, key: str, data: dict, ttl: int = None, near_cache: bool = True) -> bool:
+        """Store structured data in cache with the configured codec"""
         try:
-            json_data = json.dumps(data)
-            return await self.set(key, json_data, ttl)
+            payload = self.codec.encode(data)
+            return await self.set(key, payload, ttl, near_cache=near_cache)
         except Exception as e:
             self.logger.error(f"Cache set_json failed for key {key}: {e}")
             return False
     
-    async def get_json(self, key: str, default=None) -> dict:
-        """Get JSON data from cache"""
-        import json
+    async def get_json(self, key: str, default=None, near_cache: bool = True) -> dict:
+        """Get structured data from cache, in any codec format or legacy JSON"""
         try:
-            value = await self.get(key)
+            value = await self._get_raw(key, near_cache)
             if value:
-                return json.loads(value)
+                return self.codec.decode(value)
             return default
         except Exception as e:
             self.logger.error(f"Cache get_json failed for key {key}: {e}")
             return default
     
-    async def get_or_set(self, key: str, fetch_func, ttl: int = None):
-        """Get from cache or fetch and set if not exists"""
-        value = await self.get(key)
-        if value is not None:
-            return value
+    def _forget_local(self, keys: Iterable[str]):
+        """Drop keys from the near cache and cancel their pending fills"""
+        if self.near is None:
+            return
+        for key in keys:
+            self.near.delete(key)
+            self._fills.pop(key, None)
+    
+    async def get_many(self, keys: List[str], default=None, near_cache: bool = True) -> List[Any]:
+        """Get several values in one round trip, in the order of keys"""
+        values = await self._get_many_raw(keys, near_cache)
+        return [_text(value) if value is not None else default for value in values]
+    
+    async def _get_many_raw(self, keys: List[str], near_cache: bool = True) -> List[Optional[bytes]]:
+        """Stored bytes of several keys, None for misses; all None on error"""
+        if not keys:
+            return []
         
-        # Fetch new value
-        if asyncio.iscoroutinefunction(fetch_func):
-            new_value = await fetch_func()
-        else:
-            new_value = fetch_func()
+        values: List[Any] = [None] * len(keys)
+        fills: Dict[str, object] = {}
+        use_near = near_cache and self.near_active
+        if use_near:
+            for index, key in enumerate(keys):
+                values[index] = self.near.get(key)
+                if values[index] is not None:
+                    self._count_lookup("near")
+                elif key not in fills:
+                    fills[key] = self._fills[key] = object()
         
-        # Set in cache
-        if new_value is not None:
-            if isinstance(new_value, dict):
-                await self.set_json(key, new_value, ttl)
-            else:
-                await self.set(key, str(new_value), ttl)
+        missing = [index for index, value in enumerate(values) if value is None]
+        if missing:
+            fetched = None
+            try:
+                async with get_redis() as redis_conn:
+                    fetched = await redis_conn.mget([keys[index] for index in missing])
+            except Exception as e:
+                self.logger.error(f"Cache get_many failed for {len(missing)} keys: {e}")
+            finally:
+                for key, fill in fills.items():
+                    if self._fills.get(key) is fill:
+                        del self._fills[key]
+                    else:
+                        fills[key] = None
+            
+            for index, value in zip(missing, fetched or ()):
+                values[index] = value
+                self._count_lookup("redis" if value is not None else None)
+                if value is not None and fills.get(keys[index]) is not None:
+                    self.near.set(keys[index], value)
         
-        return new_value
+        return values
     
-    async def clear_pattern(self, pattern: str) -> int:
-        """Clear all keys matching pattern"""
+    async def set_many(self, items: Dict[str, str], ttl: Union[int, Dict[str, int], None] = None,
+                       near_cache: bool = True) -> bool:
+        """Set several values in one round trip; ttl is one value or a per-key mapping"""
+        if not items:
+            return True
+        try:
+            async with self.pipeline() as pipe:
+                for key, value in items.items():
+                    key_ttl = ttl.get(key) if isinstance(ttl, dict) else ttl
+                    pipe.set(key, value, key_ttl, near_cache=near_cache)
+            return True
+        except Exception as e:
+            self.logger.error(f"Cache set_many failed for {len(items)} keys: {e}")
+            return False
+    
+    async def delete_many(self, keys: List[str]) -> int:
+        """Unlink several keys in one round trip, returning how many existed"""
+        if not keys:
+            return 0
+        try:
+            async with self.pipeline() as pipe:
+                pipe.unlink(*keys)
+            return pipe.results[0]
+        except Exception as e:
+            self.logger.error(f"Cache delete_many failed for {len(keys)} keys: {e}")
+            return 0
+    
+    async def get_many_json(self, keys: List[str], default=None, near_cache: bool = True) -> List[Any]:
+        """Get several structured values in one round trip"""
+        results = []
+        for key, value in zip(keys, await self._get_many_raw(keys, near_cache)):
+            try:
+                results.append(self.codec.decode(value) if value else default)
+            except Exception as e:
+                self.logger.error(f"Cache get_many_json failed for key {key}: {e}")
+                results.append(default)
+        return results
+    
+    async def set_many_json(self, items: Dict[str, Any], ttl: Union[int, Dict[str, int], None] = None,
+                            near_cache: bool = True) -> bool:
+        """Store several structured values in one round trip"""
+        try:
+            encoded = {key: self.codec.encode(data) for key, data in items.items()}
+        except (TypeError, ValueError) as e:
+            self.logger.error(f"Cache set_many_json failed: {e}")
+            return False
+        return await self.set_many(encoded, ttl, near_cache=near_cache)
+    
+    @asynccontextmanager
+    async def pipeline(self, transaction: bool = False) -> AsyncGenerator["CachePipeline", None]:
+        """Queue cache commands and send them in one round trip on exit
+        
+        With transaction=True they run atomically in MULTI/EXEC. Results are
+        available as pipe.results after the block; errors propagate.
+        """
+        async with get_redis() as redis_conn:
+            async with redis_conn.pipeline(transaction=transaction) as redis_pipe:
+                pipe = CachePipeline(self, redis_pipe)
+                yield pipe
+                await pipe.execute()
+    
+    async def get_or_set(self, key: str, fetch_func, ttl: int = None, beta: float = None):
+        """Get from cache or fetch and set if not exists
+        
+        Concurrent misses in this process share one fetch, and a Redis lease
+        lets one worker fetch while the others wait for its result. Hits are
+        refreshed early with a probability that grows as expiry nears and with
+        the cost of the last fetch (XFetch; beta scales it, 0 disables), so a
+        hot key is rarely recomputed by many callers at once. Values go through
+        the cache codec and come back with the type they were stored with;
+        entries this method did not write are fetched again.
+        """
+        ttl = ttl or self.default_ttl
+        beta = settings.CACHE_EARLY_REFRESH_BETA if beta is None else beta
+        
+        entry = self._decode_entry(await self._get_raw(key))
+        if entry is not None:
+            if not self._refresh_early(entry, beta):
+                return entry["value"]
+            self.stats["early_refreshes"] += 1
+        
+        value, _ = await self.fetch_flights.run(
+            key, lambda: self._fetch_and_set(key, fetch_func, ttl, entry)
+        )
+        return value
+    
+    def _decode_entry(self, raw: Optional[bytes]) -> Optional[Dict[str, Any]]:
+        """A get_or_set entry, or None for misses and values written by other methods"""
+        if raw is None:
+            return None
+        try:
+            entry = self.codec.decode(raw)
+        except Exception:
+            return None
+        if isinstance(entry, dict) and entry.get("entry") == CACHE_ENTRY_VERSION:
+            return entry
+        return None
+    
+    @staticmethod
+    def _refresh_early(entry: Dict[str, Any], beta: float) -> bool:
+        if beta <= 0:
+            return False
+        # -log(u) is exponentially distributed, so early refreshes are rare until expiry is close
+        jitter = -math.log(1.0 - random.random())
+        return time.time() + entry["delta"] * beta * jitter >= entry["expires_at"]
+    
+    async def _fetch_and_set(self, key: str, fetch_func, ttl: int, stale: Optional[Dict[str, Any]]):
+        """Fetch under the key's Redis lease; without it, serve stale or wait for the holder"""
+        lease_key = f"lease:{key}"
+        token = uuid.uuid4().hex
+        leased = False
         try:
             async with get_redis() as redis_conn:
-                keys = await redis_conn.keys(pattern)
+                leased = bool(await redis_conn.set(
+                    lease_key, token, nx=True, px=int(settings.CACHE_LEASE_SECONDS * 1000)
+                ))
+            contended = not leased
+        except Exception as e:
+            # Without Redis there is nothing to coordinate on
+            self.logger.error(f"Cache lease failed for key {key}: {e}")
+            contended = False
+        
+        if contended:
+            if stale is not None:
+                self.stats["stale_served"] += 1
+                return stale["value"]
+            self.stats["lease_waits"] += 1
+            entry = await self._wait_for_entry(key, lease_key)
+            if entry is not None:
+                return entry["value"]
+        
+        try:
+            self.stats["fetches"] += 1
+            started = time.monotonic()
+            value = fetch_func()
+            if inspect.isawaitable(value):
+                value = await value
+            if value is not None:
+                await self._store_entry(key, value, time.monotonic() - started, ttl)
+            return value
+        finally:
+            if leased:
+                try:
+                    async with get_redis() as redis_conn:
+                        await redis_conn.eval(RELEASE_LEASE_SCRIPT, 1, lease_key, token)
+                except Exception as e:
+                    self.logger.warning(f"Cache lease release failed for key {key}: {e}")
+    
+    async def _wait_for_entry(self, key: str, lease_key: str) -> Optional[Dict[str, Any]]:
+        """Poll until the lease holder stores the entry; None once the lease is gone without one"""
+        deadline = time.monotonic() + settings.CACHE_LEASE_SECONDS
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.LEASE_POLL_SECONDS)
+            raw, holder = await self._get_many_raw([key, lease_key], near_cache=False)
+            entry = self._decode_entry(raw)
+            if entry is not None or holder is None:
+                return entry
+        return None
+    
+    async def _store_entry(self, key: str, value: Any, delta: float, ttl: int):
+        try:
+            encoded = self.codec.encode({
+                "entry": CACHE_ENTRY_VERSION,
+                "value": value,
+                "delta": round(delta, 6),
+                "expires_at": time.time() + ttl
+            })
+        except (TypeError, ValueError) as e:
+            self.logger.error(f"Cache get_or_set cannot store key {key}, value is not serializable: {e}")
+            return
+        await self.set(key, encoded, ttl)
+    
+    async def scan(self, pattern: str, cursor: int = 0,
+                   count: int = None) -> AsyncIterator[Tuple[int, List[str]]]:
+        """Keys matching pattern in batches, each with the cursor to resume after it
+        
+        Uses SCAN, so Redis is never blocked for the whole keyspace as with
+        KEYS. A batch may be empty and a key may appear more than once; the
+        last cursor is 0.
+        """
+        count = count or settings.REDIS_SCAN_COUNT
+        while True:
+            async with get_redis() as redis_conn:
+                cursor, keys = await redis_conn.scan(cursor=cursor, match=pattern, count=count)
+            cursor = int(cursor)
+            yield cursor, [_text(key) for key in keys]
+            if cursor == 0:
+                return
+    
+    async def clear_pattern(self, pattern: str) -> int:
+        """Clear all keys matching pattern, a SCAN batch at a time"""
+        if self.near is not None:
+            self.near.delete_pattern(pattern)
+            self._fills.clear()
+        deleted = 0
+        try:
+            async for _, keys in self.scan(pattern):
                 if keys:
-                    return await redis_conn.delete(*keys)
-                return 0
+                    async with get_redis() as redis_conn:
+                        # UNLINK frees values in the background instead of blocking Redis
+                        deleted += await redis_conn.unlink(*keys)
+            return deleted
         except Exception as e:
-            self.logger.error(f"Cache clear_pattern failed for pattern {pattern}: {e}")
-            return 0
+            self.logger.error(f"Cache clear_pattern failed for pattern {pattern} after {deleted} keys: {e}")
+            return deleted
+        finally:
+            if self.near is not None:
+                try:
+                    async with get_redis() as redis_conn:
+                        await redis_conn.publish(
+                            self.invalidation_channel, self._invalidation_message(patterns=[pattern])
+                        )
+                except Exception as e:
+                    self.logger.error(f"Cache invalidation for pattern {pattern} failed: {e}")
+    
+    async def close(self):
+        """Stop listening for invalidations"""
+        listener, self._listener = self._listener, None
+        # A cancellation racing a delivered message can be swallowed by the
+        # read timeout, so keep cancelling until the task has stopped
+        while listener is not None and not listener.done():
+            listener.cancel()
+            await asyncio.wait({listener}, timeout=1.0)
+
+
+class CachePipeline:
+    """Cache commands queued on a redis-py pipeline
+    
+    Writes are tracked so a single invalidation message for all of them is
+    appended to the batch, keeping other workers' near caches coherent.
+    """
+    
+    def __init__(self, cache: CacheManager, redis_pipe):
+        self.cache = cache
+        self._pipe = redis_pipe
+        self._decoders: List[Optional[Callable[[Any], Any]]] = []
+        self._written: Dict[str, Optional[Tuple[str, int]]] = {}
+        self.results: Optional[List[Any]] = None
+    
+    def _queue(self, decoder: Optional[Callable[[Any], Any]] = None) -> "CachePipeline":
+        self._decoders.append(decoder)
+        return self
+    
+    def get(self, key: str) -> "CachePipeline":
+        self._pipe.get(key)
+        return self._queue(lambda value: _text(value) if value is not None else None)
+    
+    def get_json(self, key: str) -> "CachePipeline":
+        self._pipe.get(key)
+        return self._queue(lambda value: self.cache.codec.decode(value) if value else None)
+    
+    def set(self, key: str, value: Union[str, bytes], ttl: int = None, near_cache: bool = True) -> "CachePipeline":
+        ttl = ttl or self.cache.default_ttl
+        value = _raw(value)
+        self._pipe.setex(key, ttl, value)
+        self._written[key] = (value, ttl) if near_cache else None
+        return self._queue(bool)
+    
+    def set_json(self, key: str, data: Any, ttl: int = None, near_cache: bool = True) -> "CachePipeline":
+        return self.set(key, self.cache.codec.encode(data), ttl, near_cache)
+    
+    def delete(self, *keys: str) -> "CachePipeline":
+        self._pipe.delete(*keys)
+        for key in keys:
+            self._written[key] = None
+        return self._queue()
+    
+    def unlink(self, *keys: str) -> "CachePipeline":
+        """Delete without blocking Redis on large values"""
+        self._pipe.unlink(*keys)
+        for key in keys:
+            self._written[key] = None
+        return self._queue()
+    
+    def exists(self, key: str) -> "CachePipeline":
+        self._pipe.exists(key)
+        return self._queue(bool)
+    
+    def increment(self, key: str, amount: int = 1) -> "CachePipeline":
+        self._pipe.incr(key, amount)
+        self._written[key] = None
+        return self._queue()
+    
+    def expire(self, key: str, ttl: int) -> "CachePipeline":
+        self._pipe.expire(key, ttl)
+        self._written[key] = None
+        return self._queue(bool)
+    
+    async def execute(self) -> List[Any]:
+        """Send the queued commands; a no-op when called again"""
+        if self.results is not None:
+            return self.results
+        
+        cache = self.cache
+        fills = {}
+        if cache.near is not None and self._written:
+            cache._forget_local(self._written)
+            fills = {key: object() for key in self._written}
+            cache._fills.update(fills)
+            self._pipe.publish(cache.invalidation_channel, cache._invalidation_message(keys=list(self._written)))
+        
+        try:
+            raw = await self._pipe.execute() if self._decoders else []
+        finally:
+            # Writes overlapped by another worker's invalidation are not cached locally
+            for key, fill in fills.items():
+                if cache._fills.get(key) is fill:
+                    del cache._fills[key]
+                else:
+                    self._written[key] = None
+        
+        if fills and cache.near_active:
+            for key, written in self._written.items():
+                if written is not None:
+                    cache.near.set(key, written[0], written[1])
+        
+        self.results = [
+            decoder(value) if decoder is not None else value
+            for decoder, value in zip(self._decoders, raw)
+        ]
+        return self.results
 
 
 class SessionManager:
     """Conversation session manager with Redis backend"""
     
-    def __init__(self):
-        self.cache = CacheManager()
+    def __init__(self, cache: CacheManager):
+        # Shared with the rest of the app: one near cache and one invalidation listener per process
+        self.cache = cache
         self.session_prefix = "session:"
         self.session_ttl = settings.CONVERSATION_TIMEOUT_MINUTES * 60
         self.logger = get_logger("session")
+        # Outside the session prefix so cleanup never scans it
+        self.cleanup_cursor_key = "cleanup:sessions:cursor"
+        self.cleanup_stats = {
+            "runs": 0, "passes_completed": 0, "scanned": 0, "expired": 0, "errors": 0,
+            "cursor": 0, "last_run_scanned": 0, "last_run_expired": 0, "last_run_seconds": None
+        }
     
     async def create_session(self, session_id: str, user_data: dict = None) -> bool:
         """Create new conversation session"""
@@ -390,36 +1016,89 @@ class SessionManager:
         
         return success
     
-    async def cleanup_expired_sessions(self) -> int:
-        """Clean up expired sessions"""
+    async def cleanup_expired_sessions(self, max_keys: int = None) -> int:
+        """Clean up expired sessions
+        
+        Session keys are walked with SCAN; each batch is read with one MGET and
+        its expired sessions are removed with one UNLINK. The walk is paced to
+        SESSION_CLEANUP_KEYS_PER_SECOND and stops after max_keys keys
+        (SESSION_CLEANUP_MAX_KEYS_PER_RUN by default, 0 for a full pass). The
+        cursor is stored in Redis, so the next run on any worker resumes where
+        this one stopped.
+        """
+        max_keys = settings.SESSION_CLEANUP_MAX_KEYS_PER_RUN if max_keys is None else max_keys
+        keys_per_second = settings.SESSION_CLEANUP_KEYS_PER_SECOND
+        started = time.monotonic()
+        scanned = expired_count = 0
+        cursor = 0
+        completed = False
+        
         try:
             async with get_redis() as redis_conn:
-                # Get all session keys
-                keys = await redis_conn.keys(f"{self.session_prefix}*")
-                expired_count = 0
-                current_time = asyncio.get_event_loop().time()
-                
-                for key in keys:
-                    session_data = await self.cache.get_json(key.decode())
+                cursor = int(await redis_conn.get(self.cleanup_cursor_key) or 0)
+            current_time = asyncio.get_event_loop().time()
+            
+            async for next_cursor, keys in self.cache.scan(f"{self.session_prefix}*", cursor=cursor):
+                expired = []
+                for key, session_data in zip(keys, await self.cache.get_many_json(keys, near_cache=False)):
                     if session_data:
                         last_activity = session_data.get("last_activity", 0)
                         if current_time - last_activity > self.session_ttl:
-                            await self.cache.delete(key.decode())
-                            expired_count += 1
+                            expired.append(key)
+                if expired:
+                    expired_count += await self.cache.delete_many(expired)
+                scanned += len(keys)
+                await self._save_cleanup_cursor(next_cursor)
+                cursor, completed = next_cursor, next_cursor == 0
                 
-                if expired_count > 0:
-                    self.logger.info(f"Cleaned up {expired_count} expired sessions")
-                
-                return expired_count
+                if max_keys and scanned >= max_keys:
+                    break
+                if keys_per_second > 0:
+                    delay = scanned / keys_per_second - (time.monotonic() - started)
+                    if delay > 0:
+                        await asyncio.sleep(delay)
         except Exception as e:
-            self.logger.error(f"Session cleanup failed: {e}")
-            return 0
+            self.cleanup_stats["errors"] += 1
+            self.logger.error(f"Session cleanup failed at cursor {cursor}: {e}")
+        finally:
+            self._record_cleanup(cursor, completed, scanned, expired_count, time.monotonic() - started)
+        
+        return expired_count
+    
+    async def _save_cleanup_cursor(self, cursor: int):
+        async with get_redis() as redis_conn:
+            if cursor:
+                await redis_conn.set(self.cleanup_cursor_key, cursor, ex=self.session_ttl)
+            else:
+                await redis_conn.delete(self.cleanup_cursor_key)
+    
+    def _record_cleanup(self, cursor: int, completed: bool, scanned: int, expired: int, elapsed: float):
+        stats = self.cleanup_stats
+        stats["runs"] += 1
+        stats["scanned"] += scanned
+        stats["expired"] += expired
+        stats["cursor"] = cursor
+        stats["last_run_scanned"] = scanned
+        stats["last_run_expired"] = expired
+        stats["last_run_seconds"] = round(elapsed, 3)
+        if completed:
+            stats["passes_completed"] += 1
+        
+        progress = "pass complete" if completed else f"resumes at cursor {cursor}"
+        self.logger.info(
+            f"Session cleanup scanned {scanned} keys, removed {expired} expired sessions "
+            f"in {elapsed:.2f}s ({progress})"
+        )
+    
+    def get_cleanup_stats(self) -> Dict[str, Any]:
+        """Get session cleanup progress counters"""
+        return dict(self.cleanup_stats)
 
 
 # Initialize managers
 db_manager = DatabaseManager()
 cache_manager = CacheManager()
-session_manager = SessionManager()
+session_manager = SessionManager(cache_manager)
 
 
 async def close_db_connections():
@@ -427,6 +1106,8 @@ async def close_db_connections():
     global async_engine, sync_engine, redis_client
     
     try:
+        await cache_manager.close()
+        
         if redis_client:
             await redis_client.close()
         
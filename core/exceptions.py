@@ -47,4 +47,34 @@ class RateLimitExceededError(BaseAIAgentException):
         super().__init__(
             f"Rate limit exceeded for service '{service_name}'",
             {"service": service_name}
-        )
\ No newline at end of file
+        )
+
+
+class CircuitOpenError(BaseAIAgentException):
+    """Raised when every deployment of a model has an open circuit"""
+    def __init__(self, service_name: str):
+        super().__init__(
+            f"Circuit open for service '{service_name}'",
+            {"service": service_name}
+        )
+
+
+class AgentException(Exception):
+    """Base exception for errors surfaced through the API with a status code"""
+    def __init__(self, detail: str, status_code: int = 500, error_code: str = "AGENT_ERROR",
+                 context: Optional[Dict[str, Any]] = None):
+        super().__init__(detail)
+        self.detail = detail
+        self.status_code = status_code
+        self.error_code = error_code
+        self.context = context or {}
+
+
+class DatabaseConnectionError(AgentException):
+    """Raised when database connection fails"""
+    def __init__(self, detail: str):
+        super().__init__(
+            f"Database connection failed: {detail}",
+            status_code=503,
+            error_code="DATABASE_CONNECTION_ERROR"
+        )
@@ -9,6 +9,15 @@ from typing import Any, Dict
 from datetime import datetime
 
 
+def setup_logging(level: int = logging.INFO) -> None:
+    """Configure the root logger"""
+    logging.basicConfig(
+        level=level,
+        stream=sys.stdout,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+
 def get_logger(name: str) -> logging.Logger:
     """Get a configured logger instance"""
     logger = logging.getLogger(name)
@@ -41,6 +50,15 @@ class PerformanceLogger:
             f"Tokens: {input_tokens}+{output_tokens}, "
             f"Time: {processing_time:.3f}s, Cost: ${cost:.6f}"
         )
+    
+    def log_cache_operation(self, cache_name: str, operation: str, lookups: int,
+                            hit_ratios: Dict[str, float]):
+        """Log cache hit ratios per tier"""
+        ratios = ", ".join(f"{tier} {ratio:.1%}" for tier, ratio in hit_ratios.items())
+        self.logger.info(
+            f"Cache: {cache_name}, Operation: {operation}, "
+            f"Lookups: {lookups}, Hit ratios: {ratios}"
+        )
 
 
 # Global instance
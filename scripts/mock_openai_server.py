@@ -0,0 +1,292 @@
+"""
+Mock Azure OpenAI Server
+Local stand-in for the chat completions and embeddings routes used by AsyncAzureOpenAI
+
+Run it and point the app at it:
+
+    python -m scripts.mock_openai_server --port 8765 --latency lognormal --latency-ms 400
+    AZURE_OPENAI_ENDPOINT=http://127.0.0.1:8765 AZURE_OPENAI_API_KEY=mock ...
+
+Completions are pseudo-text of a configurable length, delivered after a
+sampled time-to-first-token at a fixed token rate (also as SSE streams).
+Embeddings are deterministic unit vectors derived from the input text, so
+caches and similarity searches behave reproducibly. Throttling can be
+injected at random or by a requests-per-minute budget.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+import uvicorn
+
+# Optional exact token counts
+try:
+    import tiktoken
+    ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    ENCODING = None
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+
+WORDS = (
+    "el sistema procesa la solicitud con datos del cliente y devuelve una respuesta "
+    "clara sobre desarrollo web azure servicios presupuesto proyecto plazo equipo "
+    "tecnología integración análisis propuesta siguiente paso"
+).split()
+
+
+@dataclass
+class MockConfig:
+    """Behaviour of the mock server"""
+    latency: str = "lognormal"
+    latency_ms: float = 300.0
+    latency_sigma: float = 0.5
+    tokens_per_second: float = 80.0
+    completion_tokens: int = 60
+    embedding_latency_ms: float = 30.0
+    embedding_dimensions: int = 1536
+    throttle_probability: float = 0.0
+    error_probability: float = 0.0
+    requests_per_minute: int = 0
+    retry_after_seconds: int = 1
+    seed: Optional[int] = None
+
+
+def count_tokens(text: str) -> int:
+    if ENCODING is not None:
+        return len(ENCODING.encode(text))
+    return math.ceil(len(text.split()) * 1.3)
+
+
+def message_tokens(messages: List[Dict[str, Any]]) -> int:
+    total = 0
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, str):
+            total += count_tokens(content)
+        elif isinstance(content, list):
+            total += sum(count_tokens(item.get("text", "")) for item in content if item.get("type") == "text")
+    return total
+
+
+def pseudo_embedding(text: str, dimensions: int) -> List[float]:
+    """Unit vector seeded by the text, identical across runs and processes"""
+    seed = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+    rng = random.Random(seed)
+    vector = [rng.gauss(0.0, 1.0) for _ in range(dimensions)]
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [value / norm for value in vector]
+
+
+class MockOpenAI:
+    """Request handling state: latency sampling, throttling and counters"""
+
+    def __init__(self, config: MockConfig):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self._recent: deque = deque()
+        self.stats = {"chat": 0, "streams": 0, "embeddings": 0, "throttled": 0, "errors": 0}
+
+    def sample_latency(self) -> float:
+        """Seconds before the first token, from the configured distribution"""
+        mean = self.config.latency_ms / 1000
+        if self.config.latency == "fixed":
+            return mean
+        if self.config.latency == "uniform":
+            return self.rng.uniform(0.5 * mean, 1.5 * mean)
+        if self.config.latency == "exponential":
+            return self.rng.expovariate(1 / mean) if mean > 0 else 0.0
+        # lognormal with latency_ms as its median
+        return mean * math.exp(self.rng.gauss(0.0, self.config.latency_sigma))
+
+    def reject(self) -> Optional[JSONResponse]:
+        """An injected 429 or 500, or None to serve the request"""
+        now = time.monotonic()
+        throttled = self.rng.random() < self.config.throttle_probability
+        if self.config.requests_per_minute:
+            while self._recent and self._recent[0] <= now - 60:
+                self._recent.popleft()
+            throttled = throttled or len(self._recent) >= self.config.requests_per_minute
+
+        if throttled:
+            self.stats["throttled"] += 1
+            return JSONResponse(
+                status_code=429,
+                headers={"retry-after": str(self.config.retry_after_seconds)},
+                content={"error": {"code": "429", "message": "Rate limit is exceeded. Try again later."}}
+            )
+        if self.rng.random() < self.config.error_probability:
+            self.stats["errors"] += 1
+            return JSONResponse(
+                status_code=500,
+                content={"error": {"code": "InternalServerError", "message": "Injected server error"}}
+            )
+
+        self._recent.append(now)
+        return None
+
+    def completion_words(self, max_tokens: Optional[int]) -> List[str]:
+        length = self.config.completion_tokens
+        if max_tokens:
+            length = min(length, max_tokens)
+        return [self.rng.choice(WORDS) for _ in range(max(1, length))]
+
+    async def chat(self, deployment: str, body: Dict[str, Any]):
+        rejection = self.reject()
+        if rejection is not None:
+            return rejection
+
+        prompt_tokens = message_tokens(body.get("messages", []))
+        words = self.completion_words(body.get("max_tokens") or body.get("max_completion_tokens"))
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(words),
+            "total_tokens": prompt_tokens + len(words)
+        }
+
+        if body.get("stream"):
+            self.stats["streams"] += 1
+            include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+            return StreamingResponse(
+                self._stream(deployment, words, completion_id, created, usage if include_usage else None),
+                media_type="text/event-stream"
+            )
+
+        self.stats["chat"] += 1
+        await asyncio.sleep(self.sample_latency() + len(words) / self.config.tokens_per_second)
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": deployment,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": " ".join(words)},
+                "finish_reason": "stop"
+            }],
+            "usage": usage
+        }
+
+    async def _stream(self, deployment: str, words: List[str], completion_id: str,
+                      created: int, usage: Optional[Dict[str, int]]):
+        def event(choices: List[Dict[str, Any]], chunk_usage: Optional[Dict[str, int]] = None) -> str:
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": deployment,
+                "choices": choices
+            }
+            if chunk_usage is not None:
+                chunk["usage"] = chunk_usage
+            return f"data: {json.dumps(chunk)}\n\n"
+
+        await asyncio.sleep(self.sample_latency())
+        yield event([{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}])
+
+        interval = 1 / self.config.tokens_per_second
+        for position, word in enumerate(words):
+            content = word if position == 0 else f" {word}"
+            yield event([{"index": 0, "delta": {"content": content}, "finish_reason": None}])
+            await asyncio.sleep(interval)
+
+        yield event([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+        if usage is not None:
+            yield event([], usage)
+        yield "data: [DONE]\n\n"
+
+    async def embeddings(self, deployment: str, body: Dict[str, Any]):
+        rejection = self.reject()
+        if rejection is not None:
+            return rejection
+
+        inputs = body.get("input", [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        dimensions = body.get("dimensions") or self.config.embedding_dimensions
+
+        self.stats["embeddings"] += 1
+        await asyncio.sleep(self.config.embedding_latency_ms / 1000)
+        prompt_tokens = sum(count_tokens(text) for text in inputs)
+        return {
+            "object": "list",
+            "model": deployment,
+            "data": [
+                {"object": "embedding", "index": index, "embedding": pseudo_embedding(text, dimensions)}
+                for index, text in enumerate(inputs)
+            ],
+            "usage": {"prompt_tokens": prompt_tokens, "total_tokens": prompt_tokens}
+        }
+
+
+def create_app(config: MockConfig) -> FastAPI:
+    """FastAPI app serving the Azure OpenAI deployment routes"""
+    mock = MockOpenAI(config)
+    app = FastAPI(title="Mock Azure OpenAI")
+
+    @app.post("/openai/deployments/{deployment}/chat/completions")
+    async def chat_completions(deployment: str, request: Request):
+        return await mock.chat(deployment, await request.json())
+
+    @app.post("/openai/deployments/{deployment}/embeddings")
+    async def embeddings(deployment: str, request: Request):
+        return await mock.embeddings(deployment, await request.json())
+
+    @app.get("/stats")
+    async def stats():
+        return mock.stats
+
+    app.state.mock = mock
+    return app
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    defaults = MockConfig()
+    parser = argparse.ArgumentParser(description="Mock Azure OpenAI server for offline load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", choices=LATENCY_DISTRIBUTIONS, default=defaults.latency,
+                        help="Distribution of time to first token")
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms,
+                        help="Mean (median for lognormal) time to first token")
+    parser.add_argument("--latency-sigma", type=float, default=defaults.latency_sigma,
+                        help="Spread of the lognormal distribution")
+    parser.add_argument("--tokens-per-second", type=float, default=defaults.tokens_per_second)
+    parser.add_argument("--completion-tokens", type=int, default=defaults.completion_tokens,
+                        help="Completion length, capped by the request's max_tokens")
+    parser.add_argument("--embedding-latency-ms", type=float, default=defaults.embedding_latency_ms)
+    parser.add_argument("--embedding-dimensions", type=int, default=defaults.embedding_dimensions)
+    parser.add_argument("--throttle-probability", type=float, default=defaults.throttle_probability,
+                        help="Share of requests answered with 429")
+    parser.add_argument("--error-probability", type=float, default=defaults.error_probability,
+                        help="Share of requests answered with 500")
+    parser.add_argument("--requests-per-minute", type=int, default=defaults.requests_per_minute,
+                        help="Answer 429 above this many requests per minute (0 disables)")
+    parser.add_argument("--retry-after-seconds", type=int, default=defaults.retry_after_seconds)
+    parser.add_argument("--seed", type=int, default=None)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    config = MockConfig(**{
+        name: getattr(args, name) for name in MockConfig.__dataclass_fields__
+    })
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Tests for the Redis cache manager against the in-memory Redis stand-in
+"""
+
+import asyncio
+
+import pytest
+
+import core.database
+from benchmarks.stubs import InMemoryRedis
+from core.database import CacheManager, SessionManager
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    redis = InMemoryRedis()
+    monkeypatch.setattr(core.database, "redis_client", redis)
+    return redis
+
+
+async def listening(*managers):
+    """Start the managers' invalidation listeners and wait until they are subscribed"""
+    for _ in range(100):
+        if all(manager.near_active for manager in managers):
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("invalidation listener never subscribed")
+
+
+def test_write_invalidates_other_managers_near_cache(redis):
+    async def scenario():
+        writer, reader = CacheManager(), CacheManager()
+        try:
+            await listening(writer, reader)
+            await writer.set("greeting", "hola")
+            assert await reader.get("greeting") == "hola"
+            assert reader.near.get("greeting") == b"hola"
+
+            await writer.set("greeting", "adiós")
+            await asyncio.sleep(0.05)
+            assert reader.near.get("greeting") is None
+            assert await reader.get("greeting") == "adiós"
+            assert reader.stats["invalidations_received"] >= 1
+
+            await writer.delete("greeting")
+            await asyncio.sleep(0.05)
+            assert await reader.get("greeting") is None
+        finally:
+            await writer.close()
+            await reader.close()
+
+    asyncio.run(scenario())
+
+
+def test_clear_pattern_invalidates_other_managers_near_cache(redis):
+    async def scenario():
+        writer, reader = CacheManager(), CacheManager()
+        try:
+            await listening(writer, reader)
+            await writer.set_many({"user:1": "ana", "user:2": "luis", "order:1": "web"})
+            await asyncio.sleep(0.05)
+            assert await reader.get_many(["user:1", "user:2", "order:1"]) == ["ana", "luis", "web"]
+
+            assert await writer.clear_pattern("user:*") == 2
+            await asyncio.sleep(0.05)
+            assert reader.near.get("user:1") is None
+            assert reader.near.get("order:1") == b"web"
+            assert await reader.get_many(["user:1", "user:2", "order:1"]) == [None, None, "web"]
+        finally:
+            await writer.close()
+            await reader.close()
+
+    asyncio.run(scenario())
+
+
+def test_get_many_reads_in_one_round_trip(redis):
+    async def scenario():
+        cache = CacheManager()
+        cache.near = None
+        await cache.set_many({"a": "1", "b": "2"}, ttl={"a": 60, "b": 120})
+
+        before = redis.round_trips
+        assert await cache.get_many(["a", "missing", "b"], default="-") == ["1", "-", "2"]
+        assert redis.round_trips - before == 1
+
+    asyncio.run(scenario())
+
+
+def test_pipeline_sends_commands_and_invalidation_together(redis):
+    async def scenario():
+        cache = CacheManager()
+        try:
+            await listening(cache)
+            before = redis.round_trips
+            async with cache.pipeline() as pipe:
+                pipe.set("a", "1").set_json("b", {"n": 2}).increment("count").get("a")
+            assert redis.round_trips - before == 1
+            assert pipe.results == [True, True, 1, "1"]
+            assert await cache.get_json("b") == {"n": 2}
+            assert cache.stats["invalidations_sent"] == 1
+        finally:
+            await cache.close()
+
+    asyncio.run(scenario())
+
+
+def test_get_or_set_recomputes_once_across_managers(redis):
+    async def scenario():
+        managers = [CacheManager(), CacheManager()]
+        for manager in managers:
+            manager.LEASE_POLL_SECONDS = 0.01
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return {"value": 42}
+
+        try:
+            results = await asyncio.gather(*[
+                managers[i % 2].get_or_set("expensive", fetch, ttl=60, beta=0) for i in range(10)
+            ])
+        finally:
+            for manager in managers:
+                await manager.close()
+
+        assert results == [{"value": 42}] * 10
+        assert calls == 1
+        assert sum(manager.stats["lease_waits"] for manager in managers) == 1
+        assert await redis.get("lease:expensive") is None
+
+    asyncio.run(scenario())
+
+
+def test_get_or_set_serves_stale_value_while_another_worker_refreshes(redis):
+    async def scenario():
+        cache = CacheManager()
+        cache.near = None
+        assert await cache.get_or_set("report", lambda: "old", ttl=60) == "old"
+
+        await redis.set("lease:report", "other-worker", px=10000)
+        assert await cache.get_or_set("report", lambda: "new", ttl=60, beta=1e9) == "old"
+        assert cache.stats["stale_served"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_cleanup_removes_only_expired_sessions(redis):
+    async def scenario():
+        cache = CacheManager()
+        cache.near = None
+        sessions = SessionManager(cache)
+        now = asyncio.get_event_loop().time()
+
+        for index in range(30):
+            idle = sessions.session_ttl + 60 if index % 3 == 0 else 0
+            await cache.set_json(f"session:{index}", {"session_id": str(index), "last_activity": now - idle})
+        await cache.set("order:1", "not a session")
+
+        removed = await sessions.cleanup_expired_sessions(max_keys=0)
+
+        assert removed == 10
+        remaining = await cache.get_many_json([f"session:{index}" for index in range(30)])
+        assert [session is not None for session in remaining] == [index % 3 != 0 for index in range(30)]
+        assert await cache.get("order:1") == "not a session"
+        assert sessions.get_cleanup_stats()["passes_completed"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_cleanup_resumes_from_stored_cursor(redis, monkeypatch):
+    monkeypatch.setattr(core.database.settings, "REDIS_SCAN_COUNT", 10)
+
+    async def scenario():
+        cache = CacheManager()
+        cache.near = None
+        sessions = SessionManager(cache)
+        expired_at = asyncio.get_event_loop().time() - sessions.session_ttl - 60
+        for index in range(25):
+            await cache.set_json(f"session:{index}", {"session_id": str(index), "last_activity": expired_at})
+
+        assert await sessions.cleanup_expired_sessions(max_keys=10) == 10
+        assert int(await redis.get(sessions.cleanup_cursor_key)) == 10
+        assert await sessions.cleanup_expired_sessions(max_keys=0) == 15
+        assert await redis.get(sessions.cleanup_cursor_key) is None
+
+    asyncio.run(scenario())
@@ -0,0 +1,155 @@
+"""
+Tests for the circuit breaker and backend failure classification
+"""
+
+import pytest
+from openai import APIConnectionError
+
+from core.ai import circuit_breaker
+from core.ai.backend_pool import Backend, BackendPool
+from core.ai.circuit_breaker import CircuitBreaker, CircuitState
+from core.exceptions import RateLimitExceededError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", clock)
+    return clock
+
+
+def make_breaker(**options) -> CircuitBreaker:
+    defaults = {"min_calls": 4, "consecutive_failures": 3, "open_seconds": 30.0}
+    return CircuitBreaker("test", **{**defaults, **options})
+
+
+class StatusError(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class TestCircuitBreaker:
+    def test_opens_after_consecutive_failures(self, clock):
+        breaker = make_breaker()
+        for _ in range(3):
+            assert breaker.acquire()
+            breaker.record_failure()
+        assert breaker.state == CircuitState.OPEN
+        assert not breaker.acquire()
+        assert breaker.rejected == 1
+
+    def test_success_resets_the_failure_streak(self, clock):
+        breaker = make_breaker(min_calls=100)
+        for _ in range(2):
+            breaker.record_failure()
+        breaker.record_success(0.1)
+        for _ in range(2):
+            breaker.record_failure()
+        assert breaker.state == CircuitState.CLOSED
+
+    def test_opens_on_failure_rate(self, clock):
+        breaker = make_breaker(consecutive_failures=100, failure_rate_threshold=0.5)
+        for _ in range(2):
+            breaker.record_success(0.1)
+            breaker.record_failure()
+        assert breaker.state == CircuitState.OPEN
+
+    def test_opens_on_slow_call_rate(self, clock):
+        breaker = make_breaker(slow_call_seconds=1.0, slow_call_rate_threshold=0.75)
+        for _ in range(4):
+            breaker.record_success(2.0)
+        assert breaker.state == CircuitState.OPEN
+
+    def test_half_open_after_the_open_period(self, clock):
+        breaker = make_breaker(half_open_probes=1)
+        for _ in range(3):
+            breaker.record_failure()
+        assert not breaker.is_available()
+
+        clock.now += 30.0
+        assert breaker.is_available()
+        assert breaker.acquire()
+        assert breaker.state == CircuitState.HALF_OPEN
+        # Only one probe at a time
+        assert not breaker.acquire()
+
+    def test_successful_probe_closes(self, clock):
+        breaker = make_breaker()
+        for _ in range(3):
+            breaker.record_failure()
+        clock.now += 30.0
+        breaker.acquire()
+        breaker.record_success(0.1)
+        assert breaker.state == CircuitState.CLOSED
+
+    def test_failed_probe_reopens_for_longer(self, clock):
+        breaker = make_breaker()
+        for _ in range(3):
+            breaker.record_failure()
+        clock.now += 30.0
+        breaker.acquire()
+        breaker.record_failure()
+        assert breaker.state == CircuitState.OPEN
+        assert breaker.opened_until == pytest.approx(clock.now + 60.0)
+        assert breaker.trips == 2
+
+    def test_release_returns_the_probe(self, clock):
+        breaker = make_breaker()
+        for _ in range(3):
+            breaker.record_failure()
+        clock.now += 30.0
+        assert breaker.acquire()
+        breaker.release()
+        assert breaker.acquire()
+
+
+class TestBackendFailure:
+    @pytest.mark.parametrize("status_code", [500, 502, 503])
+    def test_server_errors_count(self, status_code):
+        assert BackendPool.is_backend_failure(StatusError(status_code))
+
+    @pytest.mark.parametrize("status_code", [400, 401, 404, 429])
+    def test_client_errors_do_not_count(self, status_code):
+        assert not BackendPool.is_backend_failure(StatusError(status_code))
+
+    def test_connection_errors_count(self):
+        assert BackendPool.is_backend_failure(APIConnectionError(request=None))
+
+    @pytest.mark.parametrize("error", [
+        TypeError("bad argument"),
+        KeyError("usage"),
+        ValueError("bad value"),
+        RateLimitExceededError("Azure OpenAI (gpt-4o-mini)")
+    ])
+    def test_local_errors_do_not_count(self, error):
+        assert not BackendPool.is_backend_failure(error)
+
+    def test_local_errors_leave_the_breaker_closed(self):
+        pool = BackendPool("test", [Backend("https://a", "chat")],
+                           breaker_options={"consecutive_failures": 1})
+        backend = pool.backends[0]
+        assert pool.on_start(backend)
+        pool.on_failure(backend, KeyError("usage"))
+        assert backend.breaker.state == CircuitState.CLOSED
+        assert backend.outstanding == 0
+        assert backend.failures == 0
+
+    def test_throttling_leaves_the_breaker_closed(self):
+        pool = BackendPool("test", [Backend("https://a", "chat")],
+                           breaker_options={"consecutive_failures": 1})
+        backend = pool.backends[0]
+        for _ in range(5):
+            assert pool.on_start(backend)
+            pool.on_failure(backend, StatusError(429))
+        assert BackendPool.is_throttled(StatusError(429))
+        assert backend.breaker.state == CircuitState.CLOSED
+        assert backend.failures == 0
@@ -0,0 +1,71 @@
+"""
+Tests for the cache codec
+"""
+
+import json
+
+import pytest
+
+from core.codec import HEADER_SIZE, MAGIC, MSGPACK_AVAILABLE, ZSTD_AVAILABLE, CacheCodec, CodecError
+
+VALUE = {"content": "¿Qué servicios ofrecen?", "usage": {"total_tokens": 42}, "tags": ["a", "b"], "ok": True}
+
+
+@pytest.mark.parametrize("serializer", ["legacy", "json", "msgpack"])
+def test_round_trip(serializer):
+    codec = CacheCodec(serializer=serializer)
+    assert codec.decode(codec.encode(VALUE)) == VALUE
+
+
+def test_legacy_writes_bare_json():
+    payload = CacheCodec(serializer="legacy").encode(VALUE)
+    assert not payload.startswith(MAGIC)
+    assert json.loads(payload) == VALUE
+
+
+def test_headered_writes_carry_magic():
+    payload = CacheCodec(serializer="json").encode(VALUE)
+    assert payload.startswith(MAGIC)
+    assert json.loads(payload[HEADER_SIZE:]) == VALUE
+
+
+@pytest.mark.parametrize("payload", [json.dumps(VALUE), json.dumps(VALUE).encode("utf-8")])
+def test_decodes_legacy_values_written_without_codec(payload):
+    codec = CacheCodec(serializer="json")
+    assert codec.decode(payload) == VALUE
+    assert codec.stats["legacy_decoded"] == 1
+
+
+def test_reads_every_format_whatever_the_write_setting():
+    legacy = CacheCodec(serializer="legacy")
+    headered = CacheCodec(serializer="msgpack" if MSGPACK_AVAILABLE else "json")
+    assert legacy.decode(headered.encode(VALUE)) == VALUE
+    assert headered.decode(legacy.encode(VALUE)) == VALUE
+
+
+@pytest.mark.skipif(not ZSTD_AVAILABLE, reason="zstandard not installed")
+def test_compresses_large_bodies_only():
+    codec = CacheCodec(serializer="json", compression="zstd", compression_min_bytes=100)
+    large = {"content": "hola " * 200}
+    assert codec.decode(codec.encode(large)) == large
+    assert codec.decode(codec.encode(VALUE)) == VALUE
+    assert codec.stats["compressed"] == 1
+
+
+def test_legacy_disables_compression():
+    assert CacheCodec(serializer="legacy", compression="zstd").compression == "none"
+
+
+def test_rejects_truncated_header():
+    with pytest.raises(CodecError):
+        CacheCodec().decode(MAGIC + b"\x01")
+
+
+def test_rejects_unknown_header_version():
+    with pytest.raises(CodecError):
+        CacheCodec().decode(MAGIC + bytes((99, 1, 0)) + b"{}")
+
+
+def test_rejects_invalid_json():
+    with pytest.raises(CodecError):
+        CacheCodec().decode(b"{not json")
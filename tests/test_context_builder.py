@@ -0,0 +1,115 @@
+"""
+Tests for token-budgeted context building and rolling summaries
+"""
+
+import asyncio
+
+import pytest
+
+from core.ai.context_builder import MESSAGE_OVERHEAD_TOKENS, ContextBuilder
+from core.ai.model_manager import ModelManager
+
+
+def count_words(content) -> int:
+    return len(content.split()) if isinstance(content, str) else 0
+
+
+def turns(count, words=6):
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": " ".join([f"m{i}"] * words)}
+        for i in range(count)
+    ]
+
+
+def test_packs_newest_turns_within_the_budget():
+    # Each turn costs 6 words plus the per-message overhead
+    builder = ContextBuilder(count_words, max_history_tokens=3 * (6 + MESSAGE_OVERHEAD_TOKENS))
+    history = turns(10)
+
+    messages = builder.build(history, system_prompt="eres un asistente")
+
+    assert messages[0] == {"role": "system", "content": "eres un asistente"}
+    assert messages[1:] == history[-3:]
+    assert builder.stats["dropped_messages"] == 7
+
+
+def test_newest_turn_is_kept_even_when_over_budget():
+    builder = ContextBuilder(count_words, max_history_tokens=5)
+    history = turns(3, words=50)
+
+    assert builder.build(history) == history[-1:]
+
+
+def test_completion_reserve_limits_history():
+    builder = ContextBuilder(count_words, max_history_tokens=10000)
+    history = turns(10)
+
+    messages = builder.build(history, context_window=40, max_tokens=10)
+
+    assert messages == history[-3:]
+
+
+def test_dropped_turns_are_folded_into_a_summary():
+    calls = []
+
+    async def summarize(previous, dropped):
+        calls.append((previous, [m["content"] for m in dropped]))
+        return "resumen"
+
+    async def scenario():
+        builder = ContextBuilder(count_words, summarize=summarize,
+                                 max_history_tokens=2 * (6 + MESSAGE_OVERHEAD_TOKENS),
+                                 summary_min_messages=4)
+        history = turns(8)
+
+        first = builder.build(history, conversation_id="c1")
+        assert all("resumen" not in m["content"] for m in first)
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+
+        second = builder.build(history, conversation_id="c1")
+        return builder, history, second
+
+    builder, history, second = asyncio.run(scenario())
+
+    assert len(calls) == 1 and len(calls[0][1]) == 6
+    assert "resumen" in second[0]["content"]
+    assert second[-1] == history[-1]
+    assert builder.stats["summaries"] == 1
+
+
+def test_summary_is_dropped_when_the_history_changes():
+    async def summarize(previous, dropped):
+        return "resumen"
+
+    async def scenario():
+        builder = ContextBuilder(count_words, summarize=summarize,
+                                 max_history_tokens=2 * (6 + MESSAGE_OVERHEAD_TOKENS),
+                                 summary_min_messages=4)
+        builder.build(turns(8), conversation_id="c1")
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+
+        edited = turns(8)
+        edited[5] = {"role": "assistant", "content": "editado"}
+        return builder.build(edited, conversation_id="c1")
+
+    messages = asyncio.run(scenario())
+    assert all("resumen" not in m["content"] for m in messages)
+
+
+@pytest.mark.parametrize("fallback, expected", [
+    (None, "resumen"), ("model", "resumen"), ("handler", None), ("cache", None)
+])
+def test_summaries_from_fallbacks(fallback, expected):
+    manager = ModelManager()
+
+    async def fake_chat(**request):
+        response = {"content": "resumen"}
+        if fallback is not None:
+            response["fallback"] = fallback
+        return response
+
+    manager.chat_completion = fake_chat
+
+    assert asyncio.run(manager._summarize_history(None, turns(2))) == expected
@@ -0,0 +1,65 @@
+"""
+Tests for embedding micro-batching
+"""
+
+import asyncio
+
+import pytest
+
+from core.ai.embedding_batcher import EmbeddingBatcher
+
+
+def make_batcher(submit, **options) -> EmbeddingBatcher:
+    return EmbeddingBatcher(submit, count_tokens=lambda text: len(text.split()), **options)
+
+
+def test_concurrent_requests_share_one_batch():
+    async def scenario():
+        batches = []
+
+        async def submit(texts, priority):
+            batches.append(list(texts))
+            return [[float(len(text))] for text in texts]
+
+        batcher = make_batcher(submit, max_wait_ms=5)
+        results = await asyncio.gather(*(batcher.embed(text) for text in ["a", "bb", "ccc"]))
+
+        assert results == [[1.0], [2.0], [3.0]]
+        assert batches == [["a", "bb", "ccc"]]
+
+    asyncio.run(scenario())
+
+
+def test_failed_batch_fails_every_caller():
+    async def scenario():
+        async def submit(texts, priority):
+            raise ValueError("upstream failed")
+
+        batcher = make_batcher(submit, max_wait_ms=1)
+        results = await asyncio.gather(batcher.embed("a"), batcher.embed("b"), return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+        assert batcher.stats.failed_batches == 1
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_batch_does_not_leave_callers_waiting():
+    async def scenario():
+        started = asyncio.Event()
+
+        async def submit(texts, priority):
+            started.set()
+            await asyncio.sleep(10)
+
+        batcher = make_batcher(submit, max_batch_size=2)
+        callers = [asyncio.ensure_future(batcher.embed(text)) for text in ("a", "b")]
+        await started.wait()
+
+        for task in list(batcher._in_flight):
+            task.cancel()
+
+        for caller in callers:
+            with pytest.raises(asyncio.CancelledError):
+                await asyncio.wait_for(caller, 1.0)
+
+    asyncio.run(scenario())
@@ -0,0 +1,92 @@
+"""
+Tests for the persistent embedding store
+"""
+
+import asyncio
+import os
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from core.ai.embedding_store import EmbeddingStore
+from core.ai.model_manager import ModelManager
+
+
+@pytest.fixture
+def store(tmp_path):
+    return EmbeddingStore(str(tmp_path / "store"), dtype="float32")
+
+
+def test_put_then_get_from_a_fresh_store(store):
+    store.put_many("small", ["a", "b"], [[1.0, 2.0], [3.0, 4.0]])
+
+    reader = EmbeddingStore(store.path, dtype="float32")
+    assert reader.get_many("small", ["a", "b", "c"]) == [[1.0, 2.0], [3.0, 4.0], None]
+    assert reader.stats["disk_hits"] == 2
+    assert reader.stats["misses"] == 1
+
+
+def test_keys_are_scoped_to_the_deployment(store):
+    store.put_many("small", ["a"], [[1.0, 2.0]])
+    assert store.get_many("large", ["a"]) == [None]
+
+
+def test_duplicates_are_written_once(store):
+    store.put_many("small", ["a", "a"], [[1.0, 2.0], [1.0, 2.0]])
+    store.put_many("small", ["a"], [[1.0, 2.0]])
+    assert store.stats["writes"] == 1
+
+
+def test_dimension_mismatch_is_rejected(store):
+    store.put_many("small", ["a"], [[1.0, 2.0]])
+    with pytest.raises(ValueError):
+        store.put_many("small", ["b"], [[1.0, 2.0, 3.0]])
+
+
+def test_compaction_moves_readers_to_the_next_generation(store):
+    store.put_many("old", ["a"], [[1.0, 2.0]])
+    store.put_many("small", ["b"], [[3.0, 4.0]])
+    reader = EmbeddingStore(store.path, dtype="float32")
+    assert reader.get_many("small", ["b"]) == [[3.0, 4.0]]
+    old_files = (store._vectors_path, store._index_path)
+
+    assert store.compact(keep_deployments=["small"]) == {"rows_before": 2, "rows_after": 1}
+    assert store.generation == 1
+    assert not any(os.path.exists(path) for path in old_files)
+
+    # A reader that cached the old generation follows meta.json to the new one
+    reader._hot.clear()
+    assert reader.get_many("small", ["b"]) == [[3.0, 4.0]]
+    assert reader.get_many("old", ["a"]) == [None]
+    assert reader.generation == 1
+
+    store.put_many("small", ["c"], [[5.0, 6.0]])
+    assert EmbeddingStore(store.path, dtype="float32").get_many("small", ["b", "c"]) == \
+        [[3.0, 4.0], [5.0, 6.0]]
+
+
+class UnreadableStore(EmbeddingStore):
+    def get_many(self, deployment, texts):
+        raise OSError("permission denied")
+
+
+class FullStore(EmbeddingStore):
+    def put_many(self, deployment, texts, embeddings):
+        raise OSError("no space left on device")
+
+
+@pytest.mark.parametrize("store_class", [UnreadableStore, FullStore])
+def test_store_errors_do_not_fail_embeddings(tmp_path, store_class):
+    manager = ModelManager()
+    manager.initialized = True
+    manager.embedding_store = store_class(str(tmp_path / "store"))
+
+    async def embed(texts, priority, tenant_id):
+        return [[1.0, 2.0] for _ in texts]
+
+    manager._embed_uncached = embed
+
+    assert asyncio.run(manager._generate_embeddings(["a"], None, None)) == [[1.0, 2.0]]
+    assert not manager.embedding_store.enabled
+    assert asyncio.run(manager._generate_embeddings(["a"], None, None)) == [[1.0, 2.0]]
@@ -0,0 +1,63 @@
+"""
+Tests for hedged requests
+"""
+
+import asyncio
+
+from core.ai.hedging import RequestHedger
+
+
+def warmed_hedger(**options) -> RequestHedger:
+    hedger = RequestHedger(min_samples=5, budget=1.0, **options)
+    for _ in range(5):
+        hedger._window("chat").record(0.01, True)
+    return hedger
+
+
+def test_fast_primary_is_not_hedged():
+    async def scenario():
+        hedger = warmed_hedger()
+
+        async def primary():
+            return "primary"
+
+        def hedge():
+            raise AssertionError("hedge started")
+
+        assert await hedger.run("chat", primary, hedge) == "primary"
+        assert hedger.stats["fired"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_slow_primary_loses_to_the_hedge():
+    async def scenario():
+        hedger = warmed_hedger()
+
+        async def primary():
+            await asyncio.sleep(1.0)
+            return "primary"
+
+        async def backup():
+            return "hedge"
+
+        assert await hedger.run("chat", primary, lambda: backup()) == "hedge"
+        assert hedger.stats["fired"] == 1
+        assert hedger.stats["won"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_no_capacity_waits_for_the_primary():
+    async def scenario():
+        hedger = warmed_hedger()
+
+        async def primary():
+            await asyncio.sleep(0.05)
+            return "primary"
+
+        assert await hedger.run("chat", primary, lambda: None) == "primary"
+        assert hedger.stats["fired"] == 0
+        assert hedger.stats["skipped_capacity"] == 1
+
+    asyncio.run(scenario())
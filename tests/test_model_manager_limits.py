@@ -0,0 +1,65 @@
+"""
+Tests for requeueing throttled model calls
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from core.ai.model_manager import ModelManager, ModelType
+from core.exceptions import RateLimitExceededError
+
+
+class ThrottledError(Exception):
+    """An upstream 429 carrying Retry-After headers"""
+
+    status_code = 429
+
+    def __init__(self, retry_after_ms="20"):
+        super().__init__("Rate limit reached")
+        self.response = SimpleNamespace(headers={"retry-after-ms": retry_after_ms})
+
+
+@pytest.fixture
+def manager():
+    manager = ModelManager()
+    manager.initialized = True
+    if ModelType.CHAT not in manager.rate_limiters:
+        pytest.skip("rate limiter disabled")
+    return manager
+
+
+def call_failing(times, calls):
+    async def call(client, deployment):
+        calls.append(deployment)
+        if len(calls) <= times:
+            raise ThrottledError()
+        return SimpleNamespace(usage=SimpleNamespace(total_tokens=10))
+    return call
+
+
+def test_throttled_call_is_queued_again(manager):
+    calls = []
+    response = asyncio.run(manager._call_with_limits(ModelType.CHAT, 100, call_failing(1, calls)))
+
+    assert response.usage.total_tokens == 10
+    assert len(calls) == 2
+    limiter = manager.rate_limiters[ModelType.CHAT]
+    assert limiter.stats.throttled == 1
+    assert limiter.in_flight == 0
+    # A 429 is the limiter's business, not the breaker's
+    backend = manager.backend_pools[ModelType.CHAT].backends[0]
+    assert backend.failures == 0
+
+
+def test_throttled_call_fails_once_the_deadline_passes(manager):
+    manager.rate_limiters[ModelType.CHAT].queue_timeout = 0.05
+    calls = []
+
+    # The last 429 itself, or the queue timeout when the wait outlasts the deadline
+    with pytest.raises((ThrottledError, RateLimitExceededError)):
+        asyncio.run(manager._call_with_limits(ModelType.CHAT, 100, call_failing(1000, calls)))
+
+    assert len(calls) > 1
+    assert manager.rate_limiters[ModelType.CHAT].in_flight == 0
@@ -0,0 +1,166 @@
+"""
+Tests for streamed chat completion accounting
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from openai import APIConnectionError
+
+from core.ai import model_manager
+from core.ai.model_manager import ModelManager, ModelType
+from core.ai.scheduler import RequestPriority
+from core.exceptions import ModelInferenceError
+
+
+def chunk(content=None, usage=None):
+    choices = [SimpleNamespace(delta=SimpleNamespace(content=content))] if content is not None else []
+    return SimpleNamespace(choices=choices, usage=usage)
+
+
+class FakeStream:
+    """Chunks of a streamed completion, checking the manager's accounting as they are read"""
+
+    def __init__(self, chunks, on_chunk=None, fail_after=None):
+        self.chunks = chunks
+        self.on_chunk = on_chunk
+        self.fail_after = fail_after
+        self.closed = False
+
+    async def __aiter__(self):
+        for i, item in enumerate(self.chunks):
+            if self.fail_after is not None and i == self.fail_after:
+                raise APIConnectionError(request=None)
+            if self.on_chunk is not None:
+                self.on_chunk()
+            yield item
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeClient:
+    def __init__(self, stream):
+        self.stream = stream
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, **params):
+        assert params["stream"] is True
+        return self.stream
+
+
+@pytest.fixture
+def manager():
+    manager = ModelManager()
+    manager.initialized = True
+    return manager
+
+
+def held(manager):
+    """Scheduler slots, limiter permits and backend claims currently held for the chat model"""
+    limiter = manager.rate_limiters.get(ModelType.CHAT)
+    scheduler = manager.schedulers.get(ModelType.CHAT)
+    backend = manager.backend_pools[ModelType.CHAT].backends[0]
+    return (
+        scheduler.in_flight if scheduler is not None else None,
+        limiter.in_flight if limiter is not None else None,
+        backend.outstanding
+    )
+
+
+def expected_held(manager, count):
+    return (
+        count if ModelType.CHAT in manager.schedulers else None,
+        count if ModelType.CHAT in manager.rate_limiters else None,
+        count
+    )
+
+
+def stream(manager):
+    params = {"model": "chat", "messages": [{"role": "user", "content": "hola"}],
+              "temperature": 0.7, "max_tokens": 100}
+    return manager._stream_chat(ModelType.CHAT, params, 5, 105, RequestPriority.INTERACTIVE, None)
+
+
+async def consume(manager, limit=None):
+    parts = []
+    async for content in stream(manager):
+        parts.append(content)
+        if limit is not None and len(parts) == limit:
+            break
+    return parts
+
+
+def test_limits_and_backend_are_held_until_the_stream_ends(manager):
+    observed = []
+    usage = SimpleNamespace(prompt_tokens=5, completion_tokens=2, total_tokens=7)
+    fake = FakeStream([chunk("Ho"), chunk("la"), chunk(usage=usage)], on_chunk=lambda: observed.append(held(manager)))
+    manager.client = FakeClient(fake)
+
+    assert asyncio.run(consume(manager)) == ["Ho", "la"]
+
+    assert observed and all(state == expected_held(manager, 1) for state in observed)
+    assert held(manager) == expected_held(manager, 0)
+    assert fake.closed
+
+    stats = manager.usage_stats[ModelType.CHAT.value]
+    assert (stats.total_requests, stats.total_tokens_input, stats.total_tokens_output) == (1, 5, 2)
+    backend = manager.backend_pools[ModelType.CHAT].backends[0]
+    assert backend.breaker.get_stats()["recent_calls"] == 1
+
+
+def test_mid_stream_failure_counts_against_the_backend(manager):
+    manager.client = FakeClient(FakeStream([chunk("Ho"), chunk("la")], fail_after=1))
+
+    with pytest.raises(ModelInferenceError):
+        asyncio.run(consume(manager))
+
+    backend = manager.backend_pools[ModelType.CHAT].backends[0]
+    assert backend.failures == 1
+    assert backend.breaker.get_stats()["recent_failure_rate"] == 1.0
+    assert held(manager) == expected_held(manager, 0)
+
+    # The delivered part is still metered
+    assert manager.usage_stats[ModelType.CHAT.value].total_requests == 1
+
+
+def test_consumer_stopping_early_releases_without_a_failure(manager):
+    fake = FakeStream([chunk("Ho"), chunk("la"), chunk("!")])
+    manager.client = FakeClient(fake)
+
+    async def scenario():
+        generator = stream(manager)
+        first = await generator.__anext__()
+        await generator.aclose()
+        return first
+
+    assert asyncio.run(scenario()) == "Ho"
+
+    backend = manager.backend_pools[ModelType.CHAT].backends[0]
+    assert backend.failures == 0
+    assert backend.breaker.get_stats()["recent_calls"] == 0
+    assert held(manager) == expected_held(manager, 0)
+    assert fake.closed
+
+
+def test_breakers_use_per_model_slow_call_thresholds(manager):
+    def slow_call_seconds(model_type):
+        return manager.backend_pools[model_type].backends[0].breaker.slow_call_seconds
+
+    assert slow_call_seconds(ModelType.REASONING) > slow_call_seconds(ModelType.CHAT)
+
+
+def test_breaker_judges_a_stream_by_its_first_chunk(manager, monkeypatch):
+    clock = SimpleNamespace(now=0.0)
+    monkeypatch.setattr(model_manager.time, "perf_counter", lambda: clock.now)
+
+    def advance():
+        clock.now += 10.0
+
+    fake = FakeStream([chunk("Ho"), chunk("la"), chunk("!")], on_chunk=advance)
+    manager.client = FakeClient(fake)
+    asyncio.run(consume(manager))
+
+    backend = manager.backend_pools[ModelType.CHAT].backends[0]
+    assert backend.average_latency_ms == pytest.approx(10000.0)
@@ -0,0 +1,74 @@
+"""
+Tests for latency- and cost-aware model routing
+"""
+
+import pytest
+
+from core.ai.model_manager import ModelManager, ModelType
+from core.ai.model_router import ModelRouter, required_capabilities
+
+
+@pytest.fixture
+def manager():
+    manager = ModelManager()
+    manager.router = ModelRouter(latency_slo=2.0, min_samples=5)
+    return manager
+
+
+def record(manager, model_type, latency, count=10, success=True):
+    for _ in range(count):
+        manager.router.record(model_type, latency, success)
+
+
+def test_plain_chat_never_routes_to_audio(manager):
+    assert required_capabilities("chat") == [("chat",)]
+    record(manager, ModelType.CHAT, 5.0)
+
+    assert manager.select_optimal_model("chat") != ModelType.AUDIO
+
+
+def test_unmeasured_models_do_not_count_as_within_slo(manager):
+    record(manager, ModelType.CHAT, 5.0)
+    record(manager, ModelType.VISION, 1.0, count=2)
+
+    assert manager.select_optimal_model("chat") == ModelType.CHAT
+
+
+def test_cheapest_model_within_slo_wins(manager):
+    record(manager, ModelType.CHAT, 5.0)
+    record(manager, ModelType.VISION, 1.0)
+
+    assert manager.select_optimal_model("chat") == ModelType.VISION
+
+
+def test_unhealthy_model_is_routed_around(manager):
+    record(manager, ModelType.CHAT, 1.0, success=False)
+    record(manager, ModelType.VISION, 1.0)
+
+    assert manager.select_optimal_model("chat") == ModelType.VISION
+    assert manager.router.failovers == 1
+
+
+def test_reasoning_prefers_the_matching_tier(manager):
+    assert manager.select_optimal_model("reasoning") == ModelType.REASONING
+    assert manager.select_optimal_model("reasoning", speed_requirement="fast") == ModelType.FAST_REASONING
+
+
+def test_static_strategy_ignores_statistics(manager):
+    manager.router = ModelRouter(strategy="static")
+    record(manager, ModelType.CHAT, 1.0, success=False)
+
+    assert manager.select_optimal_model("chat") == ModelType.CHAT
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+
+@pytest.mark.parametrize("status_code, counted", [(400, False), (429, False), (500, True)])
+def test_only_backend_failures_count_against_the_model(manager, status_code, counted):
+    manager._record_route_failure(ModelType.CHAT, StatusError(status_code), 0.0)
+
+    assert manager.router._stats(ModelType.CHAT).count == (1 if counted else 0)
@@ -0,0 +1,206 @@
+"""
+Tests for the model rate limiter
+"""
+
+import asyncio
+import random
+
+import pytest
+
+from core.ai import rate_limiter
+from core.ai.rate_limiter import AIMDConcurrencyLimit, ModelRateLimiter, TokenBucket
+from core.exceptions import RateLimitExceededError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, "monotonic", clock)
+    return clock
+
+
+class TestTokenBucket:
+    def test_starts_full(self, clock):
+        bucket = TokenBucket(60)
+        assert bucket.delay(60) == 0.0
+
+    def test_delay_until_refilled(self, clock):
+        bucket = TokenBucket(60)
+        bucket.consume(60)
+        assert bucket.delay(1) == pytest.approx(1.0)
+
+        clock.now += 0.5
+        assert bucket.delay(1) == pytest.approx(0.5)
+
+        clock.now += 0.5
+        assert bucket.delay(1) == 0.0
+
+    def test_refill_is_capped_at_capacity(self, clock):
+        bucket = TokenBucket(60)
+        clock.now += 3600
+        bucket.consume(0)
+        assert bucket.tokens == 60
+
+    def test_oversized_requests_wait_for_a_full_bucket(self, clock):
+        bucket = TokenBucket(60)
+        assert bucket.delay(1000) == 0.0
+        bucket.consume(1000)
+        assert bucket.tokens == 0
+
+    def test_adjust_refunds_overestimates(self, clock):
+        bucket = TokenBucket(60)
+        bucket.consume(50)
+        bucket.adjust(-30)
+        assert bucket.tokens == pytest.approx(40)
+
+
+class TestAIMDConcurrencyLimit:
+    def test_increases_additively_while_latency_is_stable(self, clock):
+        limit = AIMDConcurrencyLimit(initial=4, max_limit=8)
+        # +1/limit per success: about one more slot per limit's worth of successes
+        for _ in range(8):
+            limit.on_success(0.1)
+        assert limit.current == 5
+
+    def test_never_exceeds_max(self, clock):
+        limit = AIMDConcurrencyLimit(initial=8, max_limit=8)
+        for _ in range(100):
+            limit.on_success(0.1)
+        assert limit.current == 8
+
+    def test_halves_when_throttled(self, clock):
+        limit = AIMDConcurrencyLimit(initial=8)
+        limit.on_throttled()
+        assert limit.current == 4
+
+    def test_backs_off_at_most_once_per_interval(self, clock):
+        limit = AIMDConcurrencyLimit(initial=8, decrease_interval=1.0)
+        limit.on_throttled()
+        limit.on_throttled()
+        assert limit.current == 4
+
+        clock.now += 1.0
+        limit.on_throttled()
+        assert limit.current == 2
+
+    def test_never_drops_below_min(self, clock):
+        limit = AIMDConcurrencyLimit(initial=2, min_limit=1)
+        for _ in range(5):
+            clock.now += 1.0
+            limit.on_throttled()
+        assert limit.current == 1
+
+    def test_decreases_when_latency_grows_past_tolerance(self, clock):
+        limit = AIMDConcurrencyLimit(initial=8, latency_tolerance=2.0)
+        for _ in range(100):
+            clock.now += 0.1
+            limit.on_success(0.1)
+        for _ in range(30):
+            clock.now += 0.1
+            limit.on_success(1.0)
+        assert limit.current < 8
+
+    def test_stays_stable_under_mixed_completion_lengths(self, clock):
+        limit = AIMDConcurrencyLimit(initial=16, max_limit=32)
+        rng = random.Random(7)
+        for _ in range(2000):
+            clock.now += 0.1
+            limit.on_success(rng.uniform(0.4, 8.0))
+        assert limit.current >= 16
+
+
+class TestModelRateLimiter:
+    def test_acquire_counts_in_flight_and_releases(self):
+        async def scenario():
+            limiter = ModelRateLimiter("test", 60, 10000, max_concurrency=4)
+            async with limiter.acquire(100):
+                assert limiter.in_flight == 1
+            assert limiter.in_flight == 0
+            assert limiter.stats.acquired == 1
+
+        asyncio.run(scenario())
+
+    def test_queue_timeout_raises_rate_limit_error(self):
+        async def scenario():
+            limiter = ModelRateLimiter("test", 60, 10000, max_concurrency=2, queue_timeout=0.05)
+            async with limiter.acquire(100):
+                with pytest.raises(RateLimitExceededError):
+                    async with limiter.acquire(100):
+                        pass
+            assert limiter.stats.timeouts == 1
+
+        asyncio.run(scenario())
+
+    def test_waiter_is_admitted_when_a_slot_frees(self):
+        async def scenario():
+            limiter = ModelRateLimiter("test", 60, 10000, max_concurrency=2, queue_timeout=1.0)
+            admitted = asyncio.Event()
+
+            async def waiter():
+                async with limiter.acquire(100):
+                    admitted.set()
+
+            async with limiter.acquire(100):
+                task = asyncio.ensure_future(waiter())
+                await asyncio.sleep(0.01)
+                assert not admitted.is_set()
+                assert limiter.queue_depth == 1
+            await asyncio.wait_for(task, 1.0)
+            assert admitted.is_set()
+
+        asyncio.run(scenario())
+
+    def test_throttled_permit_shrinks_concurrency(self):
+        async def scenario():
+            limiter = ModelRateLimiter("test", 60, 10000, max_concurrency=8)
+            async with limiter.acquire(100) as permit:
+                permit.throttled()
+            assert limiter.concurrency.current == 2
+            assert limiter.stats.throttled == 1
+
+        asyncio.run(scenario())
+
+    def test_success_refunds_unused_tokens(self):
+        async def scenario():
+            limiter = ModelRateLimiter("test", 60, 10000, max_concurrency=4)
+            async with limiter.acquire(1000) as permit:
+                permit.success(actual_tokens=200)
+            assert limiter.tokens.tokens == pytest.approx(9800, abs=5)
+
+        asyncio.run(scenario())
+
+    def test_try_acquire_does_not_wait(self):
+        async def scenario():
+            limiter = ModelRateLimiter("test", 60, 10000, max_concurrency=2)
+            permit = limiter.try_acquire(100)
+            assert permit is not None
+            assert limiter.try_acquire(100) is None
+
+            permit.release()
+            permit.release()
+            assert limiter.in_flight == 0
+
+        asyncio.run(scenario())
+
+    def test_retry_after_holds_off_admission(self, clock):
+        limiter = ModelRateLimiter("test", 60, 10000, max_concurrency=8)
+        permit = limiter.try_acquire(100)
+        permit.throttled(retry_after=2.0)
+        permit.release()
+        assert limiter.try_acquire(100) is None
+
+        clock.now += 2.0
+        assert limiter.try_acquire(100) is not None
+
+    def test_try_acquire_respects_token_budget(self):
+        limiter = ModelRateLimiter("test", 60, 1000, max_concurrency=4)
+        limiter.tokens.consume(1000)
+        assert limiter.try_acquire(100) is None
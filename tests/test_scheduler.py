@@ -0,0 +1,139 @@
+"""
+Tests for the priority and fair-queuing request scheduler
+"""
+
+import asyncio
+
+import pytest
+
+from core.ai.model_manager import ModelManager
+from core.ai.scheduler import RequestPriority, RequestScheduler
+from core.exceptions import RateLimitExceededError
+
+
+def make_scheduler(capacity=1, **options) -> RequestScheduler:
+    return RequestScheduler("test", capacity=lambda: capacity, latency_threshold=0.05, **options)
+
+
+async def dispatch_order(scheduler, requests):
+    """Queue (label, priority, tenant) requests behind a held slot and return their dispatch order"""
+    order = []
+    gate = asyncio.Event()
+
+    async def holder():
+        async with scheduler.slot(RequestPriority.STANDARD):
+            await gate.wait()
+
+    async def request(label, priority, tenant):
+        async with scheduler.slot(priority, tenant):
+            order.append(label)
+
+    held = asyncio.ensure_future(holder())
+    await asyncio.sleep(0)
+    tasks = []
+    for label, priority, tenant in requests:
+        tasks.append(asyncio.ensure_future(request(label, priority, tenant)))
+        await asyncio.sleep(0)
+    gate.set()
+    await asyncio.gather(held, *tasks)
+    return order
+
+
+def test_higher_priority_classes_go_first():
+    async def scenario():
+        scheduler = make_scheduler()
+        return await dispatch_order(scheduler, [
+            ("background", RequestPriority.BACKGROUND, None),
+            ("standard", RequestPriority.STANDARD, None),
+            ("interactive", RequestPriority.INTERACTIVE, None),
+        ])
+
+    assert asyncio.run(scenario()) == ["interactive", "standard", "background"]
+
+
+def test_tenants_share_a_class_fairly():
+    async def scenario():
+        scheduler = make_scheduler()
+        return await dispatch_order(scheduler, [
+            ("a1", RequestPriority.STANDARD, "a"),
+            ("a2", RequestPriority.STANDARD, "a"),
+            ("a3", RequestPriority.STANDARD, "a"),
+            ("b1", RequestPriority.STANDARD, "b"),
+        ])
+
+    order = asyncio.run(scenario())
+    assert order.index("b1") < order.index("a2")
+
+
+def test_tenant_weights_scale_the_share():
+    async def scenario():
+        scheduler = make_scheduler(tenant_weights={"a": 3.0})
+        return await dispatch_order(scheduler, [
+            ("b1", RequestPriority.STANDARD, "b"),
+            ("b2", RequestPriority.STANDARD, "b"),
+            ("a1", RequestPriority.STANDARD, "a"),
+            ("a2", RequestPriority.STANDARD, "a"),
+            ("a3", RequestPriority.STANDARD, "a"),
+        ])
+
+    order = asyncio.run(scenario())
+    assert order.index("a3") < order.index("b2")
+
+
+def test_long_interactive_calls_are_not_pressure():
+    async def scenario():
+        scheduler = make_scheduler(capacity=4)
+        async with scheduler.slot(RequestPriority.INTERACTIVE):
+            await asyncio.sleep(0.1)
+        return scheduler.under_pressure
+
+    assert asyncio.run(scenario()) is False
+
+
+def test_interactive_queue_wait_holds_background_back():
+    async def scenario():
+        scheduler = make_scheduler(pressure_window=0.5)
+        gate = asyncio.Event()
+
+        async def holder():
+            async with scheduler.slot(RequestPriority.STANDARD):
+                await gate.wait()
+
+        async def interactive():
+            async with scheduler.slot(RequestPriority.INTERACTIVE):
+                await gate.wait()
+
+        held = asyncio.ensure_future(holder())
+        await asyncio.sleep(0)
+        waiting = asyncio.ensure_future(interactive())
+        await asyncio.sleep(0.1)
+        gate.set()
+        await asyncio.gather(held, waiting)
+        assert scheduler.under_pressure
+
+        with pytest.raises(RateLimitExceededError):
+            async with scheduler.slot(RequestPriority.BACKGROUND, timeout=0.05):
+                pass
+        return scheduler.stats[RequestPriority.BACKGROUND].preemptions
+
+    assert asyncio.run(scenario()) >= 1
+
+
+def test_tenant_scope_reaches_the_scheduler():
+    manager = ModelManager()
+    seen = []
+
+    async def fake_chat(**request):
+        seen.append(request["tenant_id"])
+        return {}
+
+    manager._chat_completion = fake_chat
+
+    async def scenario():
+        with manager.tenant("user-1"):
+            await manager.chat_completion([{"role": "user", "content": "hola"}])
+        await manager.chat_completion([{"role": "user", "content": "hola"}], tenant_id="user-2")
+        await manager.chat_completion([{"role": "user", "content": "hola"}])
+
+    asyncio.run(scenario())
+    assert seen == ["user-1", "user-2", None]
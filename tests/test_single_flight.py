@@ -0,0 +1,98 @@
+"""
+Tests for in-flight request coalescing
+"""
+
+import asyncio
+
+import pytest
+
+from core.ai.single_flight import SingleFlight
+
+
+def test_concurrent_identical_calls_share_one_upstream_call():
+    async def scenario():
+        flights = SingleFlight("test")
+        calls = 0
+        release = asyncio.Event()
+
+        async def upstream():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return "answer"
+
+        tasks = [asyncio.ensure_future(flights.run("key", upstream)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*tasks)
+
+        assert calls == 1
+        assert sorted(shared for _, shared in results) == [False, True, True]
+        assert all(result == "answer" for result, _ in results)
+        assert flights.get_stats() == {"calls": 3, "upstream_calls": 1, "coalesced": 2, "in_flight": 0}
+
+    asyncio.run(scenario())
+
+
+def test_different_keys_do_not_share():
+    async def scenario():
+        flights = SingleFlight("test")
+
+        async def upstream(value):
+            await asyncio.sleep(0)
+            return value
+
+        results = await asyncio.gather(
+            flights.run("a", lambda: upstream("a")),
+            flights.run("b", lambda: upstream("b"))
+        )
+        assert results == [("a", False), ("b", False)]
+
+    asyncio.run(scenario())
+
+
+def test_errors_reach_every_caller_and_are_not_cached():
+    async def scenario():
+        flights = SingleFlight("test")
+        release = asyncio.Event()
+
+        async def failing():
+            await release.wait()
+            raise ValueError("upstream failed")
+
+        tasks = [asyncio.ensure_future(flights.run("key", failing)) for _ in range(2)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+
+        async def succeeding():
+            return "recovered"
+
+        assert await flights.run("key", succeeding) == ("recovered", False)
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_call():
+    async def scenario():
+        flights = SingleFlight("test")
+        release = asyncio.Event()
+
+        async def upstream():
+            await release.wait()
+            return "answer"
+
+        leader = asyncio.ensure_future(flights.run("key", upstream))
+        follower = asyncio.ensure_future(flights.run("key", upstream))
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await follower == ("answer", True)
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+
+    asyncio.run(scenario())
@@ -0,0 +1,110 @@
+"""
+Tests for traffic capture pseudonymization and redaction
+"""
+
+import asyncio
+import json
+import threading
+
+from core.ai.traffic_capture import PSEUDO_WORDS, TrafficRecorder, pseudonymize, pseudonymous_id, read_capture
+
+
+def test_pseudonymize_is_deterministic():
+    assert pseudonymize("Necesito una página web") == pseudonymize("Necesito una página web")
+
+
+def test_pseudonymize_keeps_word_count_and_drops_the_text():
+    text = "Mi correo es juan.perez@example.com y mi teléfono 555-1234"
+    stand_in = pseudonymize(text)
+    assert len(stand_in.split()) == len(text.split())
+    assert all(word in PSEUDO_WORDS for word in stand_in.split())
+    assert "juan" not in stand_in
+
+
+def test_pseudonymize_distinguishes_inputs():
+    assert pseudonymize("hola mundo cruel") != pseudonymize("adiós mundo cruel")
+
+
+def test_pseudonymize_keeps_empty_text():
+    assert pseudonymize("") == ""
+
+
+def test_pseudonymous_id():
+    assert pseudonymous_id(None) is None
+    assert pseudonymous_id("session-1") == pseudonymous_id("session-1")
+    assert pseudonymous_id("session-1") != "session-1"
+
+
+def record(tmp_path, messages, redact=True):
+    path = tmp_path / "capture.jsonl"
+    recorder = TrafficRecorder(str(path), redact=redact)
+    recorder.record_chat(
+        {"messages": messages, "session_id": "session-1", "tenant_id": "acme"},
+        started_at=0.0, latency=0.1, result={"content": "Claro, te ayudo"}
+    )
+    asyncio.run(recorder.close())
+    return next(read_capture(str(path)))
+
+
+def test_redacted_messages_keep_only_allowed_keys(tmp_path):
+    messages = [
+        {"role": "user", "content": "Me llamo Ana", "name": "ana_garcia"},
+        {
+            "role": "assistant",
+            "content": None,
+            "tool_calls": [{
+                "id": "call_1",
+                "type": "function",
+                "function": {"name": "create_lead", "arguments": "{\"email\": \"ana@example.com\"}"}
+            }],
+            "function_call": {"name": "create_lead", "arguments": "{\"phone\": \"555-1234\"}"}
+        },
+        {"role": "tool", "tool_call_id": "call_1", "content": "lead 42 created"}
+    ]
+    captured = record(tmp_path, messages)
+    raw = json.dumps(captured)
+
+    for secret in ("Ana", "ana_garcia", "ana@example.com", "555-1234", "lead 42", "acme", "session-1"):
+        assert secret not in raw
+
+    user, assistant, tool = captured["request"]["messages"]
+    assert set(user) == {"role", "content"}
+    assert assistant["tool_calls"][0]["function"]["name"] == "create_lead"
+    assert assistant["function_call"]["name"] == "create_lead"
+    assert tool["tool_call_id"] == pseudonymous_id("call_1")
+    assert captured["response"]["content"] == pseudonymize("Claro, te ayudo")
+
+
+def test_redacted_multimodal_content_drops_image_data(tmp_path):
+    messages = [{"role": "user", "content": [
+        {"type": "text", "text": "¿Qué ves?"},
+        {"type": "image_url", "image_url": {"url": "data:image/jpeg;base64,AAAA", "detail": "high"}}
+    ]}]
+    content = record(tmp_path, messages)["request"]["messages"][0]["content"]
+    assert content[1] == {"type": "image_url", "image_url": {"url": "redacted", "detail": "high"}}
+    assert content[0]["text"] == pseudonymize("¿Qué ves?")
+
+
+def test_unredacted_capture_keeps_messages(tmp_path):
+    messages = [{"role": "user", "content": "Me llamo Ana", "name": "ana_garcia"}]
+    captured = record(tmp_path, messages, redact=False)
+    assert captured["request"]["messages"] == messages
+    assert captured["request"]["session_id"] == "session-1"
+
+
+def test_flush_runs_off_the_event_loop(tmp_path, monkeypatch):
+    path = tmp_path / "capture.jsonl"
+    recorder = TrafficRecorder(str(path), flush_every=2)
+    threads = []
+    write = recorder._write
+    monkeypatch.setattr(recorder, "_write", lambda lines: (threads.append(threading.get_ident()), write(lines)))
+
+    async def scenario():
+        for i in range(3):
+            recorder.record_embeddings({"texts": [f"texto {i}"]}, started_at=0.0, latency=0.1)
+        await recorder.close()
+
+    asyncio.run(scenario())
+
+    assert len(list(read_capture(str(path)))) == 3
+    assert threads and threading.get_ident() not in threads